@@ -19,10 +19,17 @@ import pandas as pd
 import json
 import os
 import re
+import io
+import shutil
 import tarfile
 import traceback
+import zipfile
 import gc  # 添加垃圾回收模块
+import time
 import psutil  # 添加系统资源监控模块
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from tqdm import tqdm
@@ -71,13 +78,479 @@ def force_garbage_collection(verbose: bool = False) -> None:
         print(f"当前内存使用: {after_memory.get('rss_mb', 0):.2f} MB ({after_memory.get('percent', 0):.1f}%)")
 
 
-def save_backtest_balances(backtest_id: str, output_dir: str = "data") -> Optional[Dict]:
+# 自适应分段的粒度，从小到大排列，值为每段的近似天数
+CHUNK_GRANULARITIES = [("week", 7), ("month", 30), ("quarter", 91), ("half_year", 182)]
+
+
+def _period_end(current: datetime, granularity: str) -> datetime:
+    """
+    计算 current 所在周期（周/月/季度/半年）的最后一天
+
+    Parameters:
+    current (datetime): 周期内的任意一天
+    granularity (str): "week"、"month"、"quarter" 或 "half_year"
+
+    Returns:
+    datetime: 周期的最后一天
+    """
+    if granularity == "week":
+        return current + timedelta(days=6 - current.weekday())
+    if granularity == "month":
+        last_month = current.month
+    elif granularity == "quarter":
+        last_month = ((current.month - 1) // 3 + 1) * 3
+    else:
+        last_month = 6 if current.month <= 6 else 12
+    if last_month == 12:
+        return datetime(current.year, 12, 31)
+    return datetime(current.year, last_month + 1, 1) - timedelta(days=1)
+
+
+class AdaptiveChunkPlanner:
+    """
+    按内存预算自适应调整分段大小的日期范围生成器
+
+    从季度开始，每下载完一段后根据该段的记录数和进程RSS（psutil）调整下一段的粒度：
+    - RSS 超出预算时缩小为月/周，降低单段数据量
+    - 预计放大一级后仍远低于预算时扩大到半年，减少接口调用次数
+    已提交（在途）的分段不受影响，调整只作用于之后生成的分段。
+    """
+
+    def __init__(self, start_date: str, end_date: str, max_rss_mb: float,
+                 granularity: str = "quarter", in_flight: int = 1, grow_threshold: float = 0.6):
+        """
+        Parameters:
+        start_date (str): 开始日期，格式为 'YYYY-MM-DD'
+        end_date (str): 结束日期，格式为 'YYYY-MM-DD'
+        max_rss_mb (float): 进程RSS预算（MB）
+        granularity (str): 初始粒度，默认为"quarter"
+        in_flight (int): 同时在途的分段数，用于估算放大粒度后的内存占用
+        grow_threshold (float): 预计RSS低于预算的该比例时才放大粒度
+        """
+        self.cursor = datetime.strptime(start_date, '%Y-%m-%d')
+        self.end = datetime.strptime(end_date, '%Y-%m-%d')
+        self.max_rss_mb = max_rss_mb
+        self.in_flight = max(1, in_flight)
+        self.grow_threshold = grow_threshold
+        names = [name for name, _ in CHUNK_GRANULARITIES]
+        self.level = names.index(granularity)
+        self.history: List[Dict[str, Any]] = []
+
+    @property
+    def granularity(self) -> str:
+        """当前粒度名称"""
+        return CHUNK_GRANULARITIES[self.level][0]
+
+    def next_range(self) -> Optional[tuple]:
+        """
+        生成下一段日期范围
+
+        Returns:
+        tuple: (start_date, end_date)；已覆盖到结束日期时返回None
+        """
+        if self.cursor > self.end:
+            return None
+        actual_end = min(_period_end(self.cursor, self.granularity), self.end)
+        date_range = (self.cursor.strftime('%Y-%m-%d'), actual_end.strftime('%Y-%m-%d'))
+        self.cursor = actual_end + timedelta(days=1)
+        return date_range
+
+    def observe(self, date_range: tuple, records: int, rss_peak_mb: float, rss_base_mb: float) -> None:
+        """
+        记录一段下载的内存表现，并据此调整之后分段的粒度
+
+        Parameters:
+        date_range (tuple): 该段的 (start_date, end_date)
+        records (int): 该段的记录数
+        rss_peak_mb (float): 该段数据在内存中时的RSS（MB）
+        rss_base_mb (float): 写入并回收该段数据后的RSS（MB）
+        """
+        start = datetime.strptime(date_range[0], '%Y-%m-%d')
+        end = datetime.strptime(date_range[1], '%Y-%m-%d')
+        days = (end - start).days + 1
+        chunk_mb = max(rss_peak_mb - rss_base_mb, 0.0)
+        self.history.append({
+            "start_date": date_range[0],
+            "end_date": date_range[1],
+            "granularity": self.granularity,
+            "records": records,
+            "rss_peak_mb": round(rss_peak_mb, 2),
+            "chunk_mb": round(chunk_mb, 2)
+        })
+        if rss_peak_mb <= 0:
+            return  # 无法获取内存信息时保持当前粒度
+
+        if rss_peak_mb > self.max_rss_mb:
+            if self.level > 0:
+                self.level -= 1
+                print(f"RSS {rss_peak_mb:.0f} MB 超出预算 {self.max_rss_mb:.0f} MB，分段缩小为 {self.granularity}")
+            else:
+                print(f"警告: 已使用最小分段 {self.granularity}，RSS {rss_peak_mb:.0f} MB 仍超出预算 {self.max_rss_mb:.0f} MB")
+        elif self.level < len(CHUNK_GRANULARITIES) - 1:
+            next_days = CHUNK_GRANULARITIES[self.level + 1][1]
+            projected = rss_base_mb + chunk_mb / days * next_days * self.in_flight
+            if projected < self.max_rss_mb * self.grow_threshold:
+                self.level += 1
+                print(f"预计 RSS {projected:.0f} MB，低于预算 {self.max_rss_mb:.0f} MB，分段放大为 {self.granularity}")
+
+
+class QuarterDownloadError(RuntimeError):
+    """季度数据重试耗尽后仍获取失败，已写入的数据不完整，不能打包或归档"""
+
+
+def _fetch_quarter_with_retry(fetch_func, quarter_start: str, quarter_end: str,
+                              max_retries: int = 2, retry_delay: float = 2.0) -> List[Dict]:
+    """
+    获取单个季度的数据，失败时按指数退避重试
+
+    Parameters:
+    fetch_func (callable): 形如 gt.get_positions / gt.get_orders 的函数，接受 start_date 和 end_date
+    quarter_start (str): 季度开始日期
+    quarter_end (str): 季度结束日期
+    max_retries (int): 最大重试次数
+    retry_delay (float): 首次重试前等待的秒数，之后每次翻倍
+
+    Returns:
+    list: 该季度的数据记录；重试耗尽时抛出最后一次的异常
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fetch_func(start_date=quarter_start, end_date=quarter_end) or []
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            delay = retry_delay * (2 ** attempt)
+            print(f"获取季度 {quarter_start} 至 {quarter_end} 的数据时出错: {e}，{delay:.1f} 秒后第 {attempt + 1} 次重试")
+            time.sleep(delay)
+
+
+def _download_quarters_to_jsonl(fetch_func, date_ranges: Optional[List[tuple]], filename: str, desc: str,
+                                workers: int = 1, max_in_flight: Optional[int] = None,
+                                max_retries: int = 2, archive: Optional["BacktestArchiveWriter"] = None,
+                                planner: Optional[AdaptiveChunkPlanner] = None) -> int:
+    """
+    按季度获取数据并按季度顺序写入 JSONL 文件
+
+    - workers=1 时逐个季度串行获取；workers>1 时使用线程池并发获取
+    - 同时在途的季度数不超过 max_in_flight，避免已获取未写入的数据占用过多内存
+    - 只有一个写入方（当前线程）持有打开的文件，严格按季度顺序写入
+    - 失败的季度会重试，重试耗尽时抛出 QuarterDownloadError，而不是跳过该季度生成不完整的文件
+    - 指定 planner 时分段由 AdaptiveChunkPlanner 按内存预算动态生成，不再使用固定季度
+
+    Parameters:
+    fetch_func (callable): 形如 gt.get_positions / gt.get_orders 的函数
+    date_ranges (list | None): generate_quarterly_date_ranges 生成的季度列表；指定 planner 时忽略
+    filename (str): 输出的 JSONL 文件路径（会被覆盖）
+    desc (str): 进度条描述
+    workers (int): 并发获取的线程数，默认为1（串行）
+    max_in_flight (int | None): 最多同时在途的季度数，默认为 workers 的2倍
+    max_retries (int): 单个季度的最大重试次数
+    archive (BacktestArchiveWriter | None): 不为None时每段写入归档中同名成员的一个分段，供按日期随机读取
+    planner (AdaptiveChunkPlanner | None): 按内存预算生成分段的规划器
+
+    Returns:
+    int: 写入的记录总数
+    """
+    workers = max(1, workers)
+    max_in_flight = max(workers, max_in_flight or workers * 2)
+    total_records = 0
+    total = len(date_ranges) if planner is None else None
+    label = "个季度" if planner is None else "段"
+
+    member_name = os.path.basename(filename)
+    with (open(filename, 'w', encoding='utf-8') if archive is None else nullcontext()) as f, \
+            ThreadPoolExecutor(max_workers=workers) as executor, \
+            tqdm(total=total, desc=desc) as progress:
+        pending = deque()
+        next_index = 0
+
+        def next_range() -> Optional[tuple]:
+            if planner is not None:
+                return planner.next_range()
+            return date_ranges[next_index] if next_index < len(date_ranges) else None
+
+        def submit_until_full():
+            nonlocal next_index
+            while len(pending) < max_in_flight:
+                date_range = next_range()
+                if date_range is None:
+                    break
+                quarter_start, quarter_end = date_range
+                future = executor.submit(_fetch_quarter_with_retry, fetch_func,
+                                         quarter_start, quarter_end, max_retries)
+                pending.append((next_index, quarter_start, quarter_end, future))
+                next_index += 1
+
+        submit_until_full()
+        while pending:
+            # 按提交顺序取结果，保证文件内容按季度排列
+            i, quarter_start, quarter_end, future = pending.popleft()
+            try:
+                quarter_records = future.result()
+            except Exception as e:
+                for _, _, _, other in pending:
+                    other.cancel()
+                raise QuarterDownloadError(
+                    f"季度 {quarter_start} 至 {quarter_end} 重试 {max_retries} 次后仍失败: {e}") from e
+            if planner is None:
+                submit_until_full()
+            else:
+                # 自适应模式下先观察本段的内存占用，再生成后续分段
+                rss_peak_mb = get_memory_usage().get("rss_mb", 0.0)
+
+            position = f"{i+1}/{total}" if total else f"{i+1}"
+            record_count = len(quarter_records)
+            if quarter_records:
+                lines = [json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in quarter_records]
+                if archive is None:
+                    f.writelines(lines)
+                else:
+                    archive.write_part(member_name, quarter_start, quarter_end, lines)
+                del lines
+                total_records += record_count
+                print(f"\n第 {position} {label} {quarter_start} 至 {quarter_end}: 写入 {record_count} 条记录")
+            else:
+                print(f"\n第 {position} {label} {quarter_start} 至 {quarter_end}: 无数据")
+
+            # 释放内存
+            del quarter_records
+            force_garbage_collection()
+            if planner is not None:
+                rss_base_mb = get_memory_usage().get("rss_mb", 0.0)
+                planner.observe((quarter_start, quarter_end), record_count, rss_peak_mb, rss_base_mb)
+                submit_until_full()
+            progress.update(1)
+
+    return total_records
+
+
+class BacktestSession:
+    """
+    单个回测的共享会话：回测对象、参数和回测结果只获取一次，供各个保存步骤共用
+
+    在聚宽研究环境中，get_backtest、get_params 和 get_results 都需要访问接口，
+    其中 get_results 返回完整的日度结果，多次调用既增加接口负载也会抬高内存峰值。
+    """
+
+    def __init__(self, backtest_id: str):
+        """
+        Parameters:
+        backtest_id (str): 聚宽回测ID
+        """
+        self.backtest_id = backtest_id
+        self._gt = None
+        self._params = None
+        self._results = None
+        self._date_range = None
+
+    @property
+    def gt(self):
+        """回测对象（get_backtest 的返回值）"""
+        if self._gt is None:
+            self._gt = get_backtest(self.backtest_id)
+        return self._gt
+
+    @property
+    def params(self) -> Dict:
+        """回测参数（gt.get_params 的返回值）"""
+        if self._params is None:
+            self._params = self.gt.get_params() or {}
+        return self._params
+
+    @property
+    def backtest_name(self) -> str:
+        """用于文件名的回测名称（空格替换为下划线）"""
+        return self.params.get('name', 'unknown').replace(' ', '_')
+
+    @property
+    def results(self) -> List[Dict]:
+        """回测的日度结果（gt.get_results 的返回值）"""
+        if self._results is None:
+            self._results = self.gt.get_results() or []
+        return self._results
+
+    @property
+    def date_range(self) -> Optional[tuple]:
+        """回测的 (开始日期, 结束日期)，格式为 'YYYY-MM-DD'；没有结果数据时为None"""
+        if self._date_range is None:
+            results = self.results
+            if not results:
+                return None
+            self._date_range = (
+                str(results[0]['time']).split(' ')[0],  # 提取日期部分
+                str(results[-1]['time']).split(' ')[0]
+            )
+        return self._date_range
+
+    def release_results(self) -> None:
+        """释放缓存的回测结果，释放前先计算并保留日期范围"""
+        if self._results is not None:
+            _ = self.date_range
+            self._results = None
+            force_garbage_collection()
+
+
+# 带索引 zip 归档中的索引成员名（读取端见 libs/archive_reader.py）
+ARCHIVE_INDEX_MEMBER = "index.json"
+
+
+def _record_date(record: Dict) -> str:
+    """提取持仓/订单记录的日期（YYYY-MM-DD），取 time 或 date 字段的前10位"""
+    return str(record.get('time') or record.get('date') or '')[:10]
+
+
+def _part_member_name(member_name: str, start_date: str, end_date: str) -> str:
+    """分段成员名，如 xxx_orders_<id>.jsonl.parts/20090101_20090331.jsonl"""
+    return f"{member_name}.parts/{start_date.replace('-', '')}_{end_date.replace('-', '')}.jsonl"
+
+
+class BacktestArchiveWriter:
+    """
+    可随机访问的压缩归档写入器（zip，每个成员单独使用 deflate 压缩）
+
+    tar 需要预先知道成员大小，无法边下载边写入；zip 支持流式写入成员，
+    因此数据只写一次磁盘，不会出现原始文件和归档同时存在的情况。
+    归档内的成员名与原先单独保存的文件名一致；持仓详情、订单等 JSONL 数据可按日期分段
+    写入多个分段成员，关闭时写入 index.json 记录每个成员和分段的日期范围与记录数，
+    读取端可以只解压需要的成员或分段。
+    写入过程中使用 .part 临时文件，close() 成功后才重命名为最终文件名。
+    """
+
+    def __init__(self, archive_path: str, compresslevel: int = 6, metadata: Optional[Dict] = None):
+        """
+        Parameters:
+        archive_path (str): 最终的归档文件路径（.zip）
+        compresslevel (int): deflate 压缩级别（1-9），默认为6
+        metadata (dict | None): 写入索引顶层的元数据（回测ID、名称、日期范围等）
+        """
+        self.archive_path = archive_path
+        self.temp_path = archive_path + ".part"
+        self.members: List[str] = []
+        self.index: Dict[str, Any] = dict(metadata or {})
+        self.index["members"] = {}
+        self._zip = zipfile.ZipFile(self.temp_path, "w", compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=compresslevel)
+
+    def _entry(self, member_name: str) -> Dict[str, Any]:
+        """获取（或创建）成员的索引条目"""
+        if member_name not in self.index["members"]:
+            self.members.append(member_name)
+            self.index["members"][member_name] = {}
+        return self.index["members"][member_name]
+
+    def open_member(self, member_name: str, date_range: Optional[tuple] = None, binary: bool = False):
+        """
+        打开一个归档成员用于写入（同一时间只能打开一个成员）
+
+        Parameters:
+        member_name (str): 成员名称（不含目录）
+        date_range (tuple | None): 成员数据的 (开始日期, 结束日期)，写入索引
+        binary (bool): 为True时返回字节流，用于原样复制已有文件
+
+        Returns:
+        TextIOWrapper: 可写入的文件对象（binary=True 时为字节流），关闭后成员写入完成
+        """
+        entry = self._entry(member_name)
+        if date_range:
+            entry["start_date"], entry["end_date"] = date_range
+        raw = self._zip.open(member_name, "w", force_zip64=True)
+        if binary:
+            return raw
+        return io.TextIOWrapper(raw, encoding="utf-8")
+
+    def write_part(self, member_name: str, start_date: str, end_date: str, lines: List[str],
+                   records: Optional[int] = None) -> str:
+        """
+        写入 JSONL 成员的一个日期分段
+
+        Parameters:
+        member_name (str): 逻辑成员名称（如 xxx_position_details_<id>.jsonl）
+        start_date (str): 分段开始日期（YYYY-MM-DD）
+        end_date (str): 分段结束日期（YYYY-MM-DD）
+        lines (list): 分段内容，每个元素为一行（含换行符）
+        records (int | None): 记录数，默认为行数
+
+        Returns:
+        str: 分段成员名
+        """
+        entry = self._entry(member_name)
+        parts = entry.setdefault("parts", [])
+        part_name = _part_member_name(member_name, start_date, end_date)
+        if any(part["member"] == part_name for part in parts):
+            part_name = part_name[:-len(".jsonl")] + f"_{len(parts)}.jsonl"
+        with self._zip.open(part_name, "w", force_zip64=True) as raw:
+            for line in lines:
+                raw.write(line.encode("utf-8"))
+        count = len(lines) if records is None else records
+        parts.append({"member": part_name, "start_date": start_date, "end_date": end_date, "records": count})
+        entry["records"] = entry.get("records", 0) + count
+        entry["start_date"] = min(entry.get("start_date", start_date), start_date)
+        entry["end_date"] = max(entry.get("end_date", end_date), end_date)
+        return part_name
+
+    def location(self, member_name: str) -> str:
+        """返回用于显示的成员位置，如 归档路径:成员名"""
+        return f"{self.archive_path}:{member_name}"
+
+    def _write_index(self) -> None:
+        """根据已写入的成员补全大小信息并写入 index.json"""
+        sizes = {info.filename: (info.file_size, info.compress_size) for info in self._zip.infolist()}
+        for member_name, entry in self.index["members"].items():
+            names = [part["member"] for part in entry.get("parts", [])] or [member_name]
+            entry["size"] = sum(sizes.get(name, (0, 0))[0] for name in names)
+            entry["compressed_size"] = sum(sizes.get(name, (0, 0))[1] for name in names)
+        self.index["created_time"] = datetime.now().isoformat()
+        self._zip.writestr(ARCHIVE_INDEX_MEMBER, json.dumps(self.index, ensure_ascii=False, indent=2))
+
+    def close(self) -> Optional[str]:
+        """
+        写入索引，完成归档并重命名为最终文件名
+
+        Returns:
+        str: 归档文件路径；没有写入任何成员时删除临时文件并返回None
+        """
+        if self.members:
+            self._write_index()
+        self._zip.close()
+        if not self.members:
+            os.remove(self.temp_path)
+            return None
+        os.replace(self.temp_path, self.archive_path)
+        return self.archive_path
+
+    def abort(self) -> None:
+        """放弃写入并删除临时文件"""
+        try:
+            self._zip.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+
+def _open_output(filename: str, archive: Optional[BacktestArchiveWriter] = None,
+                 date_range: Optional[tuple] = None):
+    """打开输出文件：未指定归档时写入磁盘文件，否则写入归档中的同名成员（date_range 记入索引）"""
+    if archive is None:
+        return open(filename, 'w', encoding='utf-8')
+    return archive.open_member(os.path.basename(filename), date_range)
+
+
+def _output_location(filename: str, archive: Optional[BacktestArchiveWriter] = None) -> str:
+    """返回用于显示的输出位置"""
+    return filename if archive is None else archive.location(os.path.basename(filename))
+
+
+def save_backtest_balances(backtest_id: str, output_dir: str = "data",
+                           session: Optional[BacktestSession] = None,
+                           archive: Optional[BacktestArchiveWriter] = None) -> Optional[Dict]:
     """
     获取回测的账户余额数据，保存为JSON文件，并计算仓位比例
     
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 输出目录，默认为"data"
+    session (BacktestSession | None): 共享的回测会话，为None时新建
+    archive (BacktestArchiveWriter | None): 不为None时直接写入归档中的同名成员，不再单独保存文件
     
     Returns:
     dict: 处理后的数据字典，如果失败返回None
@@ -86,12 +559,10 @@ def save_backtest_balances(backtest_id: str, output_dir: str = "data") -> Option
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 获取回测对象
-        gt = get_backtest(backtest_id)
-        
-        # 获取回测名称
-        params = gt.get_params()
-        backtest_name = params.get('name', 'unknown').replace(' ', '_')
+        # 获取回测对象和名称（同一会话内只请求一次）
+        session = session or BacktestSession(backtest_id)
+        gt = session.gt
+        backtest_name = session.backtest_name
         
         # 获取余额数据
         results = gt.get_balances()
@@ -143,10 +614,10 @@ def save_backtest_balances(backtest_id: str, output_dir: str = "data") -> Option
         
         # 保存为JSON文件 - 使用新的命名格式
         filename = os.path.join(output_dir, f"{backtest_name}_position_ratio_{backtest_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
+        with _open_output(filename, archive, session.date_range if archive else None) as f:
             json.dump(output_data, f, indent=2, ensure_ascii=False, default=str)
         
-        print(f"回测余额数据已保存到: {filename}")
+        print(f"回测余额数据已保存到: {_output_location(filename, archive)}")
         print(f"初始仓位比例: {output_data['position_analysis']['first_position']:.2%}")
         print(f"最终仓位比例: {output_data['position_analysis']['last_position']:.2%}")
         print(f"平均仓位比例: {output_data['position_analysis']['average_position']:.2%}")
@@ -154,7 +625,6 @@ def save_backtest_balances(backtest_id: str, output_dir: str = "data") -> Option
         
         # 内存优化：及时释放大变量
         del results  # 释放原始余额数据
-        del params   # 释放参数数据
         force_garbage_collection(verbose=True)  # 强制垃圾回收并显示详细信息
         
         return output_data
@@ -165,29 +635,37 @@ def save_backtest_balances(backtest_id: str, output_dir: str = "data") -> Option
         return None
 
 
-def save_backtest_positions(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True) -> Optional[Dict]:
+def save_backtest_positions(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True,
+                            workers: int = 1, max_in_flight: Optional[int] = None,
+                            max_retries: int = 2, session: Optional[BacktestSession] = None,
+                            archive: Optional[BacktestArchiveWriter] = None,
+                            max_rss_mb: Optional[float] = None) -> Optional[Dict]:
     """
     获取回测的持仓详情数据，保存为JSON文件
-    支持分季度下载以防止内存溢出，每季度数据下载后立即保存到临时文件
+    支持分季度下载以防止内存溢出，每季度数据下载后立即按季度顺序写入 JSONL 文件
     
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 输出目录，默认为"data"
     use_quarterly (bool): 是否使用分季度下载，默认为True
+    workers (int): 分季度下载时并发获取的线程数，默认为1（串行）
+    max_in_flight (int | None): 最多同时在途的季度数，默认为 workers 的2倍
+    max_retries (int): 单个季度失败后的最大重试次数，默认为2
+    session (BacktestSession | None): 共享的回测会话，为None时新建
+    archive (BacktestArchiveWriter | None): 不为None时直接写入归档中的同名成员，不再单独保存文件
+    max_rss_mb (float | None): 进程RSS预算（MB），指定后按内存预算在周/月/季度/半年之间自适应调整分段
     
     Returns:
-    dict: 处理后的数据字典，如果失败返回None
+    dict: 处理后的数据字典，如果失败返回None；分季度下载的某个季度重试耗尽时抛出 QuarterDownloadError
     """
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 获取回测对象
-        gt = get_backtest(backtest_id)
-        
-        # 获取回测名称
-        params = gt.get_params()
-        backtest_name = params.get('name', 'unknown').replace(' ', '_')
+        # 获取回测对象和名称（同一会话内只请求一次）
+        session = session or BacktestSession(backtest_id)
+        gt = session.gt
+        backtest_name = session.backtest_name
         
         if not use_quarterly:
             # 传统方式：一次性获取所有数据
@@ -201,79 +679,71 @@ def save_backtest_positions(backtest_id: str, output_dir: str = "data", use_quar
             
         else:
             # 分季度下载方式，使用 JSONL 格式进行流式写入
-            # 首先获取回测结果以确定日期范围
-            results = gt.get_results()
-            if not results:
+            # 首先根据回测结果确定日期范围（会话内缓存，不重复获取结果）
+            date_range = session.date_range
+            if not date_range:
                 print(f"无法获取回测 {backtest_id} 的结果数据，无法确定日期范围")
                 return None
             
-            start_date = str(results[0]['time']).split(' ')[0]  # 提取日期部分
-            end_date = str(results[-1]['time']).split(' ')[0]
+            start_date, end_date = date_range
             
             print(f"回测日期范围: {start_date} 至 {end_date}")
             
             # 生成季度日期范围
-            date_ranges = generate_quarterly_date_ranges(start_date, end_date)
-            print(f"将分 {len(date_ranges)} 个季度下载持仓数据")
+            planner = None
+            if max_rss_mb:
+                # 按内存预算自适应调整分段大小
+                date_ranges = None
+                planner = AdaptiveChunkPlanner(start_date, end_date, max_rss_mb,
+                                               in_flight=max_in_flight or max(1, workers) * 2)
+                print(f"内存预算: {max_rss_mb:.0f} MB，从季度分段开始自适应下载持仓数据")
+            else:
+                date_ranges = generate_quarterly_date_ranges(start_date, end_date)
+                print(f"将分 {len(date_ranges)} 个季度下载持仓数据")
             
             # 准备最终文件路径（使用 JSONL 格式）
             filename = os.path.join(output_dir, f"{backtest_name}_position_details_{backtest_id}.jsonl")
             
-            total_records = 0
+            if workers > 1:
+                print(f"并发下载: {workers} 个线程，最多 {max_in_flight or workers * 2} 个季度在途")
             
-            # 清空文件（如果存在）
-            with open(filename, 'w', encoding='utf-8') as f:
-                pass  # 创建空文件
-            
-            # 使用进度条显示下载进度
-            for i, (quarter_start, quarter_end) in enumerate(tqdm(date_ranges, desc="下载持仓数据")):
-                try:
-                    print(f"\n下载第 {i+1}/{len(date_ranges)} 个季度: {quarter_start} 至 {quarter_end}")
-                    
-                    # 获取该季度的持仓数据
-                    quarter_positions = gt.get_positions(start_date=quarter_start, end_date=quarter_end)
-                    
-                    if quarter_positions:
-                        total_records += len(quarter_positions)
-                        
-                        # 使用 JSONL 格式追加写入，每条记录一行
-                        with open(filename, 'a', encoding='utf-8') as f:
-                            for pos in quarter_positions:
-                                # 为每条记录添加元数据
-                                f.write(json.dumps(pos, ensure_ascii=False, default=str) + '\n')
-                        
-                        print(f"获取到 {len(quarter_positions)} 条持仓记录，已追加到 JSONL 文件")
-                        
-                        # 释放内存
-                        del quarter_positions
-                        force_garbage_collection()  # 每季度处理完后强制垃圾回收
-                    else:
-                        print(f"该季度无持仓数据")
-                        
-                except Exception as e:
-                    print(f"获取季度 {quarter_start} 至 {quarter_end} 的持仓数据时出错: {e}")
-                    continue
+            # 按季度获取并顺序写入，失败的季度会重试
+            total_records = _download_quarters_to_jsonl(
+                gt.get_positions, date_ranges, filename, "下载持仓数据",
+                workers=workers, max_in_flight=max_in_flight, max_retries=max_retries,
+                archive=archive, planner=planner
+            )
             
             if total_records == 0:
                 print(f"未获取到回测 {backtest_id} 的任何持仓数据")
                 return None
         
-            del params         # 释放参数数据
+            print(f"持仓数据已保存到: {_output_location(filename, archive)}，共 {total_records} 条记录")
             force_garbage_collection(verbose=True)  # 强制垃圾回收并显示详细信息
+            
+            chunks = len(planner.history) if planner else len(date_ranges)
+            return {"filename": filename, "total_records": total_records, "chunks": chunks}
                     
+    except QuarterDownloadError:
+        # 持仓数据不完整，交由调用方中止归档，不能当作普通失败跳过
+        raise
     except Exception as e:
         traceback.print_exc()
         print(f"处理回测持仓数据时出错 (ID: {backtest_id}): {e}")
         return None
 
 
-def save_backtest_results(backtest_id: str, output_dir: str = "data") -> Optional[Dict]:
+def save_backtest_results(backtest_id: str, output_dir: str = "data",
+                          session: Optional[BacktestSession] = None,
+                          archive: Optional[BacktestArchiveWriter] = None) -> Optional[Dict]:
     """
     获取回测结果数据，保存为JSON文件
     
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 输出目录，默认为"data"
+    session (BacktestSession | None): 共享的回测会话，为None时新建
+    archive (BacktestArchiveWriter | None): 不为None时直接写入归档中的同名成员，不再单独保存文件
     
     Returns:
     dict: 处理后的数据字典，如果失败返回None
@@ -282,15 +752,12 @@ def save_backtest_results(backtest_id: str, output_dir: str = "data") -> Optiona
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 获取回测对象
-        gt = get_backtest(backtest_id)
-        
-        # 获取回测名称
-        params = gt.get_params()
-        backtest_name = params.get('name', 'unknown').replace(' ', '_')
+        # 获取回测名称（同一会话内只请求一次）
+        session = session or BacktestSession(backtest_id)
+        backtest_name = session.backtest_name
         
         # 获取回测结果
-        results = gt.get_results()
+        results = session.results
         
         if not results:
             print(f"未获取到回测 {backtest_id} 的结果数据")
@@ -308,15 +775,14 @@ def save_backtest_results(backtest_id: str, output_dir: str = "data") -> Optiona
         
         # 保存为JSON文件
         filename = os.path.join(output_dir, f"{backtest_name}_daily_return_{backtest_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
+        with _open_output(filename, archive, session.date_range if archive else None) as f:
             json.dump(output_data, f, indent=2, ensure_ascii=False, default=str)
         
-        print(f"回测结果数据已保存到: {filename}")
+        print(f"回测结果数据已保存到: {_output_location(filename, archive)}")
         print(f"结果记录数: {len(results)}")
         
         # 内存优化：及时释放大变量
-        del results  # 释放原始结果数据
-        del params   # 释放参数数据
+        del results  # 释放原始结果数据（会话中的缓存由调用方决定何时释放）
         force_garbage_collection(verbose=True)  # 强制垃圾回收并显示详细信息
         
         return output_data
@@ -327,29 +793,37 @@ def save_backtest_results(backtest_id: str, output_dir: str = "data") -> Optiona
         return None
 
 
-def save_backtest_orders(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True) -> Optional[Dict]:
+def save_backtest_orders(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True,
+                         workers: int = 1, max_in_flight: Optional[int] = None,
+                         max_retries: int = 2, session: Optional[BacktestSession] = None,
+                         archive: Optional[BacktestArchiveWriter] = None,
+                         max_rss_mb: Optional[float] = None) -> Optional[Dict]:
     """
     获取回测的订单数据，保存为JSON文件
-    支持分季度下载以防止内存溢出，每季度数据下载后立即保存到临时文件
+    支持分季度下载以防止内存溢出，每季度数据下载后立即按季度顺序写入 JSONL 文件
     
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 输出目录，默认为"data"
     use_quarterly (bool): 是否使用分季度下载，默认为True
+    workers (int): 分季度下载时并发获取的线程数，默认为1（串行）
+    max_in_flight (int | None): 最多同时在途的季度数，默认为 workers 的2倍
+    max_retries (int): 单个季度失败后的最大重试次数，默认为2
+    session (BacktestSession | None): 共享的回测会话，为None时新建
+    archive (BacktestArchiveWriter | None): 不为None时直接写入归档中的同名成员，不再单独保存文件
+    max_rss_mb (float | None): 进程RSS预算（MB），指定后按内存预算在周/月/季度/半年之间自适应调整分段
     
     Returns:
-    dict: 处理后的数据字典，如果失败返回None
+    dict: 处理后的数据字典，如果失败返回None；分季度下载的某个季度重试耗尽时抛出 QuarterDownloadError
     """
     try:
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
         
-        # 获取回测对象
-        gt = get_backtest(backtest_id)
-        
-        # 获取回测名称
-        params = gt.get_params()
-        backtest_name = params.get('name', 'unknown').replace(' ', '_')
+        # 获取回测对象和名称（同一会话内只请求一次）
+        session = session or BacktestSession(backtest_id)
+        gt = session.gt
+        backtest_name = session.backtest_name
         
         if not use_quarterly:
             # 传统方式：一次性获取所有数据
@@ -363,65 +837,55 @@ def save_backtest_orders(backtest_id: str, output_dir: str = "data", use_quarter
             
         else:
             # 分季度下载方式，使用 JSONL 格式进行流式写入
-            # 首先获取回测结果以确定日期范围
-            results = gt.get_results()
-            if not results:
+            # 首先根据回测结果确定日期范围（会话内缓存，不重复获取结果）
+            date_range = session.date_range
+            if not date_range:
                 print(f"无法获取回测 {backtest_id} 的结果数据，无法确定日期范围")
                 return None
             
-            start_date = str(results[0]['time']).split(' ')[0]  # 提取日期部分
-            end_date = str(results[-1]['time']).split(' ')[0]
+            start_date, end_date = date_range
             
             print(f"回测日期范围: {start_date} 至 {end_date}")
             
             # 生成季度日期范围
-            date_ranges = generate_quarterly_date_ranges(start_date, end_date)
-            print(f"将分 {len(date_ranges)} 个季度下载订单数据")
+            planner = None
+            if max_rss_mb:
+                # 按内存预算自适应调整分段大小
+                date_ranges = None
+                planner = AdaptiveChunkPlanner(start_date, end_date, max_rss_mb,
+                                               in_flight=max_in_flight or max(1, workers) * 2)
+                print(f"内存预算: {max_rss_mb:.0f} MB，从季度分段开始自适应下载订单数据")
+            else:
+                date_ranges = generate_quarterly_date_ranges(start_date, end_date)
+                print(f"将分 {len(date_ranges)} 个季度下载订单数据")
             
             # 准备最终文件路径（使用 JSONL 格式）
             filename = os.path.join(output_dir, f"{backtest_name}_orders_{backtest_id}.jsonl")
             
-            total_orders = 0
+            if workers > 1:
+                print(f"并发下载: {workers} 个线程，最多 {max_in_flight or workers * 2} 个季度在途")
             
-            # 清空文件（如果存在）
-            with open(filename, 'w', encoding='utf-8') as f:
-                pass  # 创建空文件
-            
-            # 使用进度条显示下载进度
-            for i, (quarter_start, quarter_end) in enumerate(tqdm(date_ranges, desc="下载订单数据")):
-                try:
-                    print(f"\n下载第 {i+1}/{len(date_ranges)} 个季度: {quarter_start} 至 {quarter_end}")
-                    
-                    # 获取该季度的订单数据
-                    quarter_orders = gt.get_orders(start_date=quarter_start, end_date=quarter_end)
-                    
-                    if quarter_orders:
-                        total_orders += len(quarter_orders)
-                        
-                        # 使用 JSONL 格式追加写入，每条记录一行
-                        with open(filename, 'a', encoding='utf-8') as f:
-                            for order in quarter_orders:
-                                # 为每条记录添加元数据
-                                f.write(json.dumps(order, ensure_ascii=False, default=str) + '\n')
-                        
-                        print(f"获取到 {len(quarter_orders)} 条订单记录，已追加到 JSONL 文件")
-                        
-                        # 释放内存
-                        del quarter_orders
-                        force_garbage_collection()  # 每季度处理完后强制垃圾回收
-                    else:
-                        print(f"该季度无订单数据")
-                        
-                except Exception as e:
-                    print(f"获取季度 {quarter_start} 至 {quarter_end} 的订单数据时出错: {e}")
-                    continue
+            # 按季度获取并顺序写入，失败的季度会重试
+            total_orders = _download_quarters_to_jsonl(
+                gt.get_orders, date_ranges, filename, "下载订单数据",
+                workers=workers, max_in_flight=max_in_flight, max_retries=max_retries,
+                archive=archive, planner=planner
+            )
             
             if total_orders == 0:
                 print(f"未获取到回测 {backtest_id} 的任何订单数据")
                 return None
+            
+            print(f"订单数据已保存到: {_output_location(filename, archive)}，共 {total_orders} 条记录")
+            
+            chunks = len(planner.history) if planner else len(date_ranges)
+            return {"filename": filename, "total_records": total_orders, "chunks": chunks}
         
         # 根据下载方式区分保存逻辑
         
+    except QuarterDownloadError:
+        # 订单数据不完整，交由调用方中止归档，不能当作普通失败跳过
+        raise
     except Exception as e:
         traceback.print_exc()
         print(f"处理回测订单数据时出错 (ID: {backtest_id}): {e}")
@@ -550,18 +1014,130 @@ def _sanitize_filename(name: str) -> str:
         return "unknown"
 
 
-def package_backtest_data(backtest_id: str, output_dir: str = "data", archive_dir: str = "data", compression: str = "gz") -> Optional[str]:
+def _build_archive_path(backtest_id: str, archive_dir: str, suffix: str,
+                        session: Optional[BacktestSession] = None) -> str:
     """
-    将指定回测ID的所有已下载数据打包为tar归档文件。
+    构造包含回测名称、日期范围和回测ID的归档文件路径
 
-    - 会扫描 `output_dir` 下所有包含该 `backtest_id` 的文件（json/jsonl）并打包。
+    Parameters:
+    backtest_id (str): 聚宽回测ID
+    archive_dir (str): 归档文件输出目录
+    suffix (str): 文件后缀，如"tar.gz"、"zip"
+    session (BacktestSession | None): 共享的回测会话，为None时新建
+
+    Returns:
+    str: 归档文件路径
+    """
+    # 获取回测名称与日期范围，用于构建有意义的归档文件名
+    backtest_name = "unknown"
+    start_date = None
+    end_date = None
+    try:
+        session = session or BacktestSession(backtest_id)
+        backtest_name = _sanitize_filename(session.params.get("name", "unknown"))
+        if session.date_range:
+            start_date, end_date = session.date_range
+    except Exception:
+        pass  # 非聚宽环境或获取失败时，回退到仅使用ID
+
+    start_part = _sanitize_filename(start_date) if start_date else "unknown_start"
+    end_part = _sanitize_filename(end_date) if end_date else "unknown_end"
+    id_part = _sanitize_filename(backtest_id)
+    name_part = _sanitize_filename(backtest_name)
+    return os.path.join(archive_dir, f"{name_part}_{start_part}_{end_part}_{id_part}.{suffix}")
+
+
+def _archive_metadata(backtest_id: str, session: Optional[BacktestSession] = None) -> Dict[str, Any]:
+    """构造写入归档索引顶层的元数据（回测ID、名称和日期范围）"""
+    metadata = {"backtest_id": backtest_id}
+    try:
+        session = session or BacktestSession(backtest_id)
+        metadata["backtest_name"] = session.backtest_name
+        if session.date_range:
+            metadata["start_date"], metadata["end_date"] = session.date_range
+    except Exception:
+        pass  # 非聚宽环境或获取失败时只记录ID
+    return metadata
+
+
+def _json_file_date_range(fpath: str) -> Optional[tuple]:
+    """读取余额/结果等JSON文件，返回其中 balances 或 results 列表的首尾日期"""
+    try:
+        with open(fpath, 'r', encoding='utf-8') as f:
+            obj = json.load(f)
+        records = obj.get("balances") or obj.get("results") or []
+        if records:
+            return _record_date(records[0]), _record_date(records[-1])
+    except Exception:
+        pass
+    return None
+
+
+def _add_jsonl_file_by_quarter(archive: BacktestArchiveWriter, fpath: str) -> int:
+    """
+    将 JSONL 文件按记录日期所在季度拆分为多个分段成员写入归档
+
+    Parameters:
+    archive (BacktestArchiveWriter): 归档写入器
+    fpath (str): JSONL 文件路径
+
+    Returns:
+    int: 写入的记录数
+    """
+    member_name = os.path.basename(fpath)
+    total = 0
+    lines: List[str] = []
+    quarter = None
+
+    def flush():
+        if lines:
+            archive.write_part(member_name, quarter[0], quarter[1], lines)
+
+    with open(fpath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record_date = _record_date(json.loads(line))
+                day = datetime.strptime(record_date, '%Y-%m-%d')
+                record_quarter = (datetime(day.year, (day.month - 1) // 3 * 3 + 1, 1).strftime('%Y-%m-%d'),
+                                  _period_end(day, "quarter").strftime('%Y-%m-%d'))
+            except Exception:
+                record_quarter = quarter  # 无法解析日期的记录归入当前分段
+            if quarter is None:
+                quarter = record_quarter
+            if record_quarter is not None and record_quarter != quarter:
+                flush()
+                lines = []
+                quarter = record_quarter
+            lines.append(line if line.endswith('\n') else line + '\n')
+            total += 1
+    if quarter is None:
+        quarter = ("", "")
+    flush()
+    return total
+
+
+# 已生成的归档文件后缀（与 libs.archive_reader.ARCHIVE_SUFFIXES 一致），重复打包时不能作为成员
+_ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar", ".zip")
+
+
+def package_backtest_data(backtest_id: str, output_dir: str = "data", archive_dir: str = "data", compression: str = "gz",
+                          session: Optional[BacktestSession] = None) -> Optional[str]:
+    """
+    将指定回测ID的所有已下载数据打包为tar归档文件（或带索引的zip归档）。
+
+    - 会扫描 `output_dir` 下所有包含该 `backtest_id` 的文件（json/jsonl）并打包，之前生成的归档文件不会被打包。
     - 归档文件名包含回测名称、日期范围和回测ID，便于识别。
+    - compression="zip" 时生成可随机访问的 zip 归档：每个成员单独压缩，JSONL 文件按季度拆分为
+      分段成员，并写入 index.json 记录成员和分段的日期范围，读取单个成员或单个季度时无需解压其余数据。
 
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 已下载数据所在目录，默认"data"
     archive_dir (str): 归档文件输出目录，默认"data"
-    compression (str): 压缩格式，可选"gz"、"bz2"、"xz"，或传入空字符串使用不压缩的tar
+    compression (str): 压缩格式，可选"gz"、"bz2"、"xz"、"zip"（带索引的zip归档），或传入空字符串使用不压缩的tar
+    session (BacktestSession | None): 共享的回测会话，为None时新建
 
     Returns:
     str: 归档文件的路径；如果没有找到可打包文件或出错，返回None
@@ -570,50 +1146,48 @@ def package_backtest_data(backtest_id: str, output_dir: str = "data", archive_di
         os.makedirs(output_dir, exist_ok=True)
         os.makedirs(archive_dir, exist_ok=True)
 
-        # 获取回测名称与日期范围，用于构建有意义的归档文件名
-        backtest_name = "unknown"
-        start_date = None
-        end_date = None
-        try:
-            gt = get_backtest(backtest_id)
-            params = gt.get_params()
-            backtest_name = _sanitize_filename(params.get("name", "unknown"))
-            results = gt.get_results()
-            if results:
-                start_date = str(results[0]["time"]).split(" ")[0]
-                end_date = str(results[-1]["time"]).split(" ")[0]
-        except Exception:
-            pass  # 非聚宽环境或获取失败时，回退到仅使用ID
-
         # 搜集需要打包的文件：凡是文件名包含 backtest_id 的都归档
         candidates: List[str] = []
         for fname in os.listdir(output_dir):
-            # 只考虑普通文件
+            # 只考虑普通文件，跳过之前生成的归档文件
             fpath = os.path.join(output_dir, fname)
-            if os.path.isfile(fpath) and backtest_id in fname:
+            if os.path.isfile(fpath) and backtest_id in fname and not fname.lower().endswith(_ARCHIVE_SUFFIXES):
                 candidates.append(fpath)
 
         if not candidates:
             print(f"未在目录 {output_dir} 找到与回测ID {backtest_id} 相关的文件，打包取消。")
             return None
 
-        # 构造有意义的归档文件名
-        start_part = _sanitize_filename(start_date) if start_date else "unknown_start"
-        end_part = _sanitize_filename(end_date) if end_date else "unknown_end"
-        id_part = _sanitize_filename(backtest_id)
-        name_part = _sanitize_filename(backtest_name)
-
-        mode = "w" if not compression else f"w:{compression}"
-        suffix = "tar" if not compression else f"tar.{compression}"
-        archive_name = f"{name_part}_{start_part}_{end_part}_{id_part}.{suffix}"
-        archive_path = os.path.join(archive_dir, archive_name)
+        if compression == "zip":
+            # 带索引的zip归档：成员可单独读取，JSONL 按季度分段
+            archive = BacktestArchiveWriter(_build_archive_path(backtest_id, archive_dir, "zip", session),
+                                            metadata=_archive_metadata(backtest_id, session))
+            try:
+                for fpath in candidates:
+                    if fpath.endswith('.jsonl'):
+                        _add_jsonl_file_by_quarter(archive, fpath)
+                    else:
+                        # 按字节复制，成员内容与原文件完全一致
+                        with open(fpath, 'rb') as src, \
+                                archive.open_member(os.path.basename(fpath), _json_file_date_range(fpath),
+                                                    binary=True) as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+            except BaseException:
+                archive.abort()
+                raise
+            archive_path = archive.close()
+        else:
+            # 构造有意义的归档文件名
+            mode = "w" if not compression else f"w:{compression}"
+            suffix = "tar" if not compression else f"tar.{compression}"
+            archive_path = _build_archive_path(backtest_id, archive_dir, suffix, session)
 
-        # 创建tar归档
-        with tarfile.open(archive_path, mode) as tar:
-            for fpath in candidates:
-                # 归档内使用相对文件名，去掉目录前缀
-                arcname = os.path.basename(fpath)
-                tar.add(fpath, arcname=arcname)
+            # 创建tar归档
+            with tarfile.open(archive_path, mode) as tar:
+                for fpath in candidates:
+                    # 归档内使用相对文件名，去掉目录前缀
+                    arcname = os.path.basename(fpath)
+                    tar.add(fpath, arcname=arcname)
 
         print(f"已生成回测数据归档文件: {archive_path}")
         print(f"包含 {len(candidates)} 个文件：")
@@ -623,10 +1197,6 @@ def package_backtest_data(backtest_id: str, output_dir: str = "data", archive_di
         # 尝试释放可能的引用
         try:
             del candidates
-            if 'results' in locals():
-                del results
-            if 'params' in locals():
-                del params
             force_garbage_collection()
         except Exception:
             pass
@@ -693,17 +1263,26 @@ def extract_backtest_ids(file_paths_text: str) -> List[str]:
     return list(set(backtest_ids))  # 去重
 
 
-def download_all_backtest_data(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True) -> Dict[str, Any]:
+def download_all_backtest_data(backtest_id: str, output_dir: str = "data", use_quarterly: bool = True,
+                               quarter_workers: int = 1, stream_archive: bool = False,
+                               max_rss_mb: Optional[float] = None) -> Dict[str, Any]:
     """
     下载指定回测ID的所有数据，并在完成后自动打包与清理原始文件。
 
-    - 下载内容：余额、持仓（可分季度）、回测结果、订单（可分季度）。
+    - 下载内容：余额、回测结果、持仓（可分季度）、订单（可分季度）。
+    - 各步骤共享同一个 BacktestSession，get_backtest/get_params/get_results 各只调用一次。
+    - stream_archive=True 时，下载过程中直接写入压缩的 zip 归档（成员名与原文件名相同），
+      不再生成原始文件，也无需事后打包和清理，磁盘写入量减半。
     - 完成后：将 `output_dir` 下该回测ID相关文件打包为 `tar.gz` 并删除原始文件，只保留归档。
+    - 持仓或订单的某个季度重试耗尽时抛出 QuarterDownloadError：丢弃流式归档，不打包也不删除原始文件。
 
     Parameters:
     backtest_id (str): 聚宽回测ID
     output_dir (str): 输出目录，默认为"data"
     use_quarterly (bool): 是否对持仓和订单数据使用分季度下载，默认为True
+    quarter_workers (int): 分季度下载时并发获取的线程数，默认为1（串行）
+    stream_archive (bool): 是否在下载时直接写入 zip 归档，默认为False（先写文件再打包为 tar.gz）
+    max_rss_mb (float | None): 进程RSS预算（MB），指定后持仓和订单按内存预算自适应调整分段大小
     
     Returns:
     dict: 包含下载模式、归档路径和删除文件数量等信息的字典
@@ -718,33 +1297,65 @@ def download_all_backtest_data(backtest_id: str, output_dir: str = "data", use_q
         "download_mode": "quarterly" if use_quarterly else "full"
     }
     
-    # 下载余额数据（不需要分季度，数据量相对较小）
-    print("\n1. 下载余额数据...")
-    save_backtest_balances(backtest_id, output_dir)
-    
-    # 下载持仓数据（支持分季度）
-    print("\n2. 下载持仓数据...")
-    save_backtest_positions(backtest_id, output_dir, use_quarterly)
+    # 回测对象、参数和回测结果在各步骤间共享，只获取一次
+    session = BacktestSession(backtest_id)
     
-    # 下载回测结果（不需要分季度，数据量相对较小）
-    print("\n3. 下载回测结果...")
-    save_backtest_results(backtest_id, output_dir)
+    # 流式归档：所有数据直接写入 zip 归档中的同名成员
+    archive = None
+    if stream_archive:
+        os.makedirs(output_dir, exist_ok=True)
+        archive = BacktestArchiveWriter(_build_archive_path(backtest_id, output_dir, "zip", session),
+                                        metadata=_archive_metadata(backtest_id, session))
+        print(f"数据将直接写入归档: {archive.archive_path}")
     
-    # 下载订单数据（支持分季度）
-    print("\n4. 下载订单数据...")
-    save_backtest_orders(backtest_id, output_dir, use_quarterly)
+    try:
+        # 下载余额数据（不需要分季度，数据量相对较小）
+        print("\n1. 下载余额数据...")
+        save_backtest_balances(backtest_id, output_dir, session=session, archive=archive)
+        
+        # 下载回测结果（不需要分季度，数据量相对较小）
+        # 先于持仓和订单保存，保存后释放结果数据，只保留日期范围，降低分季度下载时的内存峰值
+        print("\n2. 下载回测结果...")
+        save_backtest_results(backtest_id, output_dir, session=session, archive=archive)
+        session.release_results()
+        
+        # 下载持仓数据（支持分季度）
+        print("\n3. 下载持仓数据...")
+        save_backtest_positions(backtest_id, output_dir, use_quarterly, workers=quarter_workers,
+                                session=session, archive=archive, max_rss_mb=max_rss_mb)
+        
+        # 下载订单数据（支持分季度）
+        print("\n4. 下载订单数据...")
+        save_backtest_orders(backtest_id, output_dir, use_quarterly, workers=quarter_workers,
+                             session=session, archive=archive, max_rss_mb=max_rss_mb)
+    except BaseException:
+        # 任一步骤中止（如季度重试耗尽）时数据不完整：丢弃流式归档，不打包也不清理已下载的原始文件
+        if archive is not None:
+            archive.abort()
+        else:
+            print(f"回测 {backtest_id} 的数据下载不完整，跳过打包和清理")
+        raise
     
-    # 下载完成后执行打包
-    print("\n5. 打包回测数据并清理原始文件...")
-    archive_path = package_backtest_data(backtest_id, output_dir=output_dir, archive_dir=output_dir, compression="gz")
     deleted_count = 0
-    if archive_path:
-        deleted_count = cleanup_backtest_files(backtest_id, output_dir=output_dir, exclude_paths=[archive_path])
+    if archive is not None:
+        # 数据已在下载时写入归档，无需打包和清理
+        print("\n5. 完成归档写入...")
+        archive_path = archive.close()
+        if not archive_path:
+            print("没有写入任何数据，未生成归档文件。")
     else:
-        print("打包失败或没有可打包的文件，跳过清理以避免误删。")
+        # 下载完成后执行打包
+        print("\n5. 打包回测数据并清理原始文件...")
+        archive_path = package_backtest_data(backtest_id, output_dir=output_dir, archive_dir=output_dir,
+                                             compression="gz", session=session)
+        if archive_path:
+            deleted_count = cleanup_backtest_files(backtest_id, output_dir=output_dir, exclude_paths=[archive_path])
+        else:
+            print("打包失败或没有可打包的文件，跳过清理以避免误删。")
 
     results.update({
         "archive_path": archive_path,
+        "archive_format": "zip" if stream_archive else "tar.gz",
         "deleted_files": deleted_count
     })
 
@@ -758,7 +1369,9 @@ def download_all_backtest_data(backtest_id: str, output_dir: str = "data", use_q
     return results
 
 
-def batch_download_backtest_data(backtest_ids: List[str], output_dir: str = "data", use_quarterly: bool = True) -> Dict[str, Any]:
+def batch_download_backtest_data(backtest_ids: List[str], output_dir: str = "data", use_quarterly: bool = True,
+                                 quarter_workers: int = 1, stream_archive: bool = False,
+                                 max_rss_mb: Optional[float] = None) -> Dict[str, Any]:
     """
     批量下载多个回测的数据
     
@@ -766,6 +1379,9 @@ def batch_download_backtest_data(backtest_ids: List[str], output_dir: str = "dat
     backtest_ids (list): 聚宽回测ID列表
     output_dir (str): 输出目录，默认为"data"
     use_quarterly (bool): 是否对持仓和订单数据使用分季度下载，默认为True
+    quarter_workers (int): 分季度下载时并发获取的线程数，默认为1（串行）
+    stream_archive (bool): 是否在下载时直接写入 zip 归档，默认为False
+    max_rss_mb (float | None): 进程RSS预算（MB），指定后按内存预算自适应调整分段大小
     
     Returns:
     dict: 包含所有下载结果的汇总字典
@@ -784,7 +1400,8 @@ def batch_download_backtest_data(backtest_ids: List[str], output_dir: str = "dat
         print(f"\n处理第 {i}/{len(backtest_ids)} 个回测: {backtest_id}")
         
         try:
-            result = download_all_backtest_data(backtest_id, output_dir, use_quarterly)
+            result = download_all_backtest_data(backtest_id, output_dir, use_quarterly, quarter_workers,
+                                                stream_archive, max_rss_mb)
             batch_results["individual_results"][backtest_id] = result
         except Exception as e:
             print(f"处理回测 {backtest_id} 时发生错误: {e}")
@@ -4,7 +4,14 @@
 该包提供了根据聚宽回测数据和指数数据计算对冲数据的功能。
 """
 
-from .data_loader import load_backtest_data, load_position_data, load_index_data
+from .data_loader import load_backtest_data, load_position_data, load_index_data, load_jsonl_records
+from .archive_reader import list_archive_members, make_member_path, read_archive_index, set_member_cache_dir
+from .columnar_store import convert_position_details, convert_orders, PositionStore, OrderStore, PricePanel
+from .lot_matcher import match_fifo_lots
+from .downsampling import lttb_indices, lttb_zoom_levels
+from .range_statistics import RangeSeries, range_statistics
+from .chart_renderer import ChartPage
+from .echarts_asset import install_echarts_asset, echarts_script_tag
 from .format_converter import (
     generate_hedge_backtest_format,
     generate_hedge_position_format,
@@ -24,6 +31,24 @@ __all__ = [
     'load_backtest_data',
     'load_position_data',
     'load_index_data',
+    'load_jsonl_records',
+    'list_archive_members',
+    'make_member_path',
+    'read_archive_index',
+    'set_member_cache_dir',
+    'convert_position_details',
+    'PositionStore',
+    'convert_orders',
+    'OrderStore',
+    'PricePanel',
+    'match_fifo_lots',
+    'lttb_indices',
+    'lttb_zoom_levels',
+    'RangeSeries',
+    'range_statistics',
+    'ChartPage',
+    'install_echarts_asset',
+    'echarts_script_tag',
     'generate_hedge_backtest_format',
     'generate_hedge_position_format',
     'export_data_to_csv',
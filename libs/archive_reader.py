@@ -0,0 +1,365 @@
+"""
+归档读取模块
+
+该模块提供了直接读取回测归档（tar.gz/tar/zip）中成员文件的功能，无需事先解压。
+归档成员使用 "<归档路径>::<成员名>" 形式的路径表示，可以像普通文件路径一样
+传给 data_loader 中的加载函数。
+
+tar.gz 不支持随机访问，读取成员时按流式解压顺序查找；可通过 set_member_cache_dir
+开启已解压成员的缓存，重复读取同一成员时直接读取缓存文件。
+
+带索引的 zip 归档（归档内包含 index.json）支持随机访问：每个成员单独压缩，
+持仓详情、订单等 JSONL 成员按日期分段存储为多个分段成员，索引记录了每个成员和分段的
+日期范围。读取时只解压需要的成员或分段，原成员名仍可作为一个整体读取。
+"""
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+# 归档成员路径中归档路径与成员名之间的分隔符
+MEMBER_SEPARATOR = "::"
+
+# 支持的归档后缀
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar", ".zip")
+
+# 带索引 zip 归档中的索引成员名
+INDEX_MEMBER = "index.json"
+
+# 已解压成员的缓存目录，为None时不缓存
+_member_cache_dir: Optional[str] = None
+
+# 归档成员列表缓存：{(归档路径, 修改时间, 大小): 成员名列表}
+_member_list_cache: Dict[Tuple[str, int, int], List[str]] = {}
+
+# 归档索引缓存：{(归档路径, 修改时间, 大小): 索引内容或None}
+_index_cache: Dict[Tuple[str, int, int], Optional[Dict[str, Any]]] = {}
+
+
+def is_archive(path: str) -> bool:
+    """
+    判断路径是否为支持的归档文件
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        bool: 是否为归档文件
+    """
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def make_member_path(archive_path: str, member_name: str) -> str:
+    """
+    构造归档成员路径
+
+    Args:
+        archive_path: 归档文件路径
+        member_name: 成员名
+
+    Returns:
+        str: "<归档路径>::<成员名>" 形式的路径
+    """
+    return f"{archive_path}{MEMBER_SEPARATOR}{member_name}"
+
+
+def split_member_path(path: str) -> Tuple[str, Optional[str]]:
+    """
+    拆分归档成员路径
+
+    Args:
+        path: 普通文件路径或归档成员路径
+
+    Returns:
+        Tuple[str, Optional[str]]: (归档路径, 成员名)；普通文件路径返回 (路径, None)
+    """
+    path = str(path)
+    if MEMBER_SEPARATOR in path:
+        archive_path, member_name = path.split(MEMBER_SEPARATOR, 1)
+        return archive_path, member_name
+    return path, None
+
+
+def set_member_cache_dir(cache_dir: Optional[str]) -> None:
+    """
+    设置已解压成员的缓存目录
+
+    Args:
+        cache_dir: 缓存目录路径，为None时关闭缓存
+    """
+    global _member_cache_dir
+    _member_cache_dir = str(cache_dir) if cache_dir else None
+    if _member_cache_dir:
+        os.makedirs(_member_cache_dir, exist_ok=True)
+
+
+def _archive_key(archive_path: str) -> Tuple[str, int, int]:
+    """归档缓存键：归档更新后自动失效"""
+    stat = os.stat(archive_path)
+    return (os.path.abspath(archive_path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_archive_index(archive_path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取带索引 zip 归档中的 index.json（结果按归档的修改时间缓存）
+
+    索引结构：
+        {
+            "backtest_id": ..., "backtest_name": ..., "start_date": ..., "end_date": ...,
+            "members": {
+                成员名: {"size": 字节数, "start_date": ..., "end_date": ..., "records": 记录数,
+                         "parts": [{"member": 分段成员名, "start_date": ..., "end_date": ..., "records": ...}]}
+            }
+        }
+    没有分段的成员不包含 "parts"，数据直接存放在同名成员中。
+
+    Args:
+        archive_path: 归档文件路径
+
+    Returns:
+        Optional[Dict]: 索引内容；不是 zip 或没有索引时返回None
+    """
+    if not archive_path.lower().endswith(".zip"):
+        return None
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"归档文件不存在: {archive_path}")
+
+    key = _archive_key(archive_path)
+    if key not in _index_cache:
+        index = None
+        with zipfile.ZipFile(archive_path) as zf:
+            if INDEX_MEMBER in zf.namelist():
+                index = json.loads(zf.read(INDEX_MEMBER).decode("utf-8"))
+        _index_cache[key] = index
+    return _index_cache[key]
+
+
+def list_archive_members(archive_path: str) -> List[str]:
+    """
+    列出归档中的所有成员文件名（结果按归档的修改时间缓存）
+
+    带索引的 zip 归档返回索引中的逻辑成员名（分段成员和索引本身不单独列出）。
+
+    Args:
+        archive_path: 归档文件路径
+
+    Returns:
+        List[str]: 成员名列表（只包含普通文件）
+
+    Raises:
+        FileNotFoundError: 归档文件不存在
+    """
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"归档文件不存在: {archive_path}")
+
+    key = _archive_key(archive_path)
+    if key not in _member_list_cache:
+        index = read_archive_index(archive_path)
+        if index is not None:
+            names = list(index.get("members", {}).keys())
+        elif archive_path.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive_path) as zf:
+                names = [info.filename for info in zf.infolist() if not info.is_dir()]
+        else:
+            # 流式模式只顺序解压一遍，不需要回退读取
+            with tarfile.open(archive_path, "r|*") as tar:
+                names = [member.name for member in tar if member.isfile()]
+        _member_list_cache[key] = names
+    return list(_member_list_cache[key])
+
+
+def path_exists(path: str) -> bool:
+    """
+    判断普通文件或归档成员是否存在
+
+    Args:
+        path: 普通文件路径或归档成员路径
+
+    Returns:
+        bool: 是否存在
+    """
+    archive_path, member_name = split_member_path(path)
+    if member_name is None:
+        return os.path.exists(archive_path)
+    if not os.path.exists(archive_path):
+        return False
+    return member_name in list_archive_members(archive_path)
+
+
+def _cached_member_path(archive_path: str, member_name: str) -> str:
+    """返回成员在缓存目录中的路径（按归档名和修改时间区分，归档更新后自动失效）"""
+    stat = os.stat(archive_path)
+    archive_key = f"{os.path.basename(archive_path)}_{stat.st_mtime_ns}"
+    return os.path.join(_member_cache_dir, archive_key, os.path.basename(member_name))
+
+
+class _ChainedStreamReader(io.RawIOBase):
+    """
+    把一个或多个二进制流串联为一个只读流，可被 TextIOWrapper/BufferedReader 使用
+
+    用于包装流式 tar 成员（不支持 seekable），以及按顺序拼接带索引 zip 归档中的分段成员。
+    """
+
+    def __init__(self, openers: List[Callable[[], Any]]):
+        """
+        Args:
+            openers: 按顺序打开各个流的函数列表，流在读到时才打开，读完即关闭
+        """
+        self._openers = list(openers)
+        self._current = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer) -> int:
+        while True:
+            if self._current is None:
+                if not self._openers:
+                    return 0
+                self._current = self._openers.pop(0)()
+            data = self._current.read(len(buffer))
+            if data:
+                size = len(data)
+                buffer[:size] = data
+                return size
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _overlaps(item: Dict[str, Any], start_date: Optional[str], end_date: Optional[str]) -> bool:
+    """判断分段的日期范围是否与 [start_date, end_date] 相交（日期格式 YYYY-MM-DD）"""
+    if start_date and item.get("end_date") and item["end_date"] < start_date:
+        return False
+    if end_date and item.get("start_date") and item["start_date"] > end_date:
+        return False
+    return True
+
+
+def _select_parts(archive_path: str, member_name: str,
+                  start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[List[str]]:
+    """
+    根据索引选出需要读取的分段成员
+
+    Returns:
+        Optional[List[str]]: 分段成员名列表；成员没有分段（或归档没有索引）时返回None
+    """
+    index = read_archive_index(archive_path)
+    if index is None:
+        return None
+    entry = index.get("members", {}).get(member_name)
+    if entry is None:
+        raise FileNotFoundError(f"归档 {archive_path} 中不存在成员: {member_name}")
+    parts = entry.get("parts")
+    if not parts:
+        return None
+    return [part["member"] for part in parts if _overlaps(part, start_date, end_date)]
+
+
+@contextmanager
+def _open_member_binary(archive_path: str, member_name: str,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[io.BufferedIOBase]:
+    """以二进制流方式打开归档成员；带索引的分段成员只读取与日期范围相交的分段"""
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as zf:
+            parts = _select_parts(archive_path, member_name, start_date, end_date)
+            if parts is None:
+                with zf.open(member_name) as raw:
+                    yield raw
+            else:
+                openers = [lambda name=name: zf.open(name) for name in parts]
+                with io.BufferedReader(_ChainedStreamReader(openers), 1024 * 1024) as raw:
+                    yield raw
+        return
+
+    with tarfile.open(archive_path, "r|*") as tar:
+        for member in tar:
+            if member.name == member_name and member.isfile():
+                reader = _ChainedStreamReader([lambda member=member: tar.extractfile(member)])
+                with io.BufferedReader(reader, 1024 * 1024) as raw:
+                    yield raw
+                return
+    raise FileNotFoundError(f"归档 {archive_path} 中不存在成员: {member_name}")
+
+
+def extract_member(path: str, target_path: str) -> str:
+    """
+    将归档成员流式解压到指定文件
+
+    Args:
+        path: 归档成员路径
+        target_path: 目标文件路径
+
+    Returns:
+        str: 目标文件路径
+    """
+    archive_path, member_name = split_member_path(path)
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    temp_path = target_path + ".part"
+    with _open_member_binary(archive_path, member_name) as raw, open(temp_path, "wb") as out:
+        shutil.copyfileobj(raw, out, 1024 * 1024)
+    os.replace(temp_path, target_path)
+    return target_path
+
+
+@contextmanager
+def open_text(path: str, encoding: str = "utf-8",
+              start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    以文本方式打开普通文件或归档成员
+
+    指定日期范围时，带索引 zip 归档中的分段成员只解压与范围相交的分段；
+    其他情况下仍返回完整内容，需要调用方自行按日期过滤。
+
+    Args:
+        path: 普通文件路径或归档成员路径
+        encoding: 文本编码
+        start_date: 开始日期（YYYY-MM-DD，可选）
+        end_date: 结束日期（YYYY-MM-DD，可选）
+
+    Yields:
+        TextIO: 文本文件对象
+
+    Raises:
+        FileNotFoundError: 文件或成员不存在
+    """
+    archive_path, member_name = split_member_path(path)
+    if member_name is None:
+        with open(archive_path, "r", encoding=encoding) as f:
+            yield f
+        return
+
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"归档文件不存在: {archive_path}")
+
+    if start_date or end_date:
+        # 按日期范围读取时只解压需要的分段，不使用整成员缓存
+        with _open_member_binary(archive_path, member_name, start_date, end_date) as raw:
+            with io.TextIOWrapper(raw, encoding=encoding) as f:
+                yield f
+        return
+
+    if _member_cache_dir:
+        cached_path = _cached_member_path(archive_path, member_name)
+        if not os.path.exists(cached_path):
+            extract_member(path, cached_path)
+        with open(cached_path, "r", encoding=encoding) as f:
+            yield f
+        return
+
+    with _open_member_binary(archive_path, member_name) as raw:
+        with io.TextIOWrapper(raw, encoding=encoding) as f:
+            yield f
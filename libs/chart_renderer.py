@@ -0,0 +1,228 @@
+"""
+轻量图表渲染模块
+
+按列传入图表数据（一列横轴，每条曲线一列数值），生成由若干 ECharts 图表组成的HTML页面，不依赖 pyecharts：
+- 图表配置就是 ECharts 的 option 字典，数值列由 numpy 数组一次性转换为列表（NaN/inf 写为 null）；
+- 页面模板在模块加载时编译一次（string.Template），渲染只需一次 json.dumps 和一次模板替换；
+- ECharts 优先从共享的 output/assets/echarts.min.js 加载（见 libs.echarts_asset）。
+"""
+
+import json
+from string import Template
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .echarts_asset import echarts_script_tag
+
+# 所有图表共用的数据缩放组件：底部滑块 + 鼠标滚轮/拖动
+DATA_ZOOM = [
+    {'type': 'slider', 'show': True, 'xAxisIndex': [0], 'start': 0, 'end': 100},
+    {'type': 'inside', 'xAxisIndex': [0], 'start': 0, 'end': 100},
+]
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>$title</title>
+    $echarts_script
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            margin: 20px;
+        }
+        .chart {
+            margin-bottom: 20px;
+        }
+    </style>
+</head>
+<body>
+$charts
+    <script>
+        var chartOptions = $options;
+        chartOptions.forEach(function(option, i) {
+            var chart = echarts.init(document.getElementById('chart_' + i));
+            chart.setOption(option);
+            window.addEventListener('resize', function() {
+                chart.resize();
+            });
+        });
+    </script>
+</body>
+</html>
+""")
+
+CHART_TEMPLATE = Template('    <div id="chart_$index" class="chart" style="width: $width; height: $height;"></div>')
+
+
+def to_column(values: Sequence) -> List:
+    """
+    将一列数据转换为可 JSON 序列化的列表
+
+    Args:
+        values: 数值列（列表、numpy 数组或 pandas Series）或字符串列
+
+    Returns:
+        List: 数值列中的 NaN/inf 转换为 None，其他列原样转换为列表
+    """
+    array = np.asarray(values)
+    if array.dtype.kind != 'f':
+        return array.tolist()
+    column = array.tolist()
+    invalid = np.flatnonzero(~np.isfinite(array))
+    for i in invalid.tolist():
+        column[i] = None
+    return column
+
+
+class ChartPage:
+    """由多个 ECharts 图表纵向排列组成的页面"""
+
+    def __init__(self, page_title: str, width: str = '1200px', inline_echarts: bool = False):
+        """
+        初始化页面
+
+        Args:
+            page_title: 页面标题
+            width: 图表宽度（CSS 长度）
+            inline_echarts: 是否将本地 ECharts 文件嵌入页面
+        """
+        self.page_title = page_title
+        self.width = width
+        self.inline_echarts = inline_echarts
+        self.charts = []
+
+    def add_chart(self, option: Dict, height: str = '600px') -> Dict:
+        """
+        添加一个图表
+
+        Args:
+            option: ECharts option 字典
+            height: 图表高度（CSS 长度）
+
+        Returns:
+            Dict: 传入的 option，可继续修改（如添加标记点）
+        """
+        self.charts.append((option, height))
+        return option
+
+    def add_line(self, title: str, x: Sequence[str], columns: Dict[str, Sequence[float]], y_name: str,
+                 colors: Optional[Sequence[str]] = None, line_width: float = 2, area: bool = False,
+                 tooltip_formatter: Optional[str] = None, legend: Optional[Dict] = None,
+                 height: str = '600px') -> Dict:
+        """
+        添加折线图（类目横轴，可缩放）
+
+        Args:
+            title: 图表标题
+            x: 横轴数据（如日期字符串）
+            columns: 曲线名称到数值列的映射，每列与横轴等长
+            y_name: 纵轴名称
+            colors: 每条曲线的颜色（可选）
+            line_width: 线宽
+            area: 是否填充曲线下方区域
+            tooltip_formatter: 提示框格式字符串（可选，ECharts 模板语法）
+            legend: 图例配置（可选，默认居中显示）
+            height: 图表高度（CSS 长度）
+
+        Returns:
+            Dict: 图表的 option
+        """
+        series = []
+        for i, (name, values) in enumerate(columns.items()):
+            item = {
+                'name': name,
+                'type': 'line',
+                'showSymbol': False,
+                'data': to_column(values),
+                'lineStyle': {'width': line_width},
+            }
+            if colors:
+                item['itemStyle'] = {'color': colors[i]}
+            if area:
+                item['areaStyle'] = {'opacity': 0.5}
+            series.append(item)
+
+        tooltip = {'trigger': 'axis', 'axisPointer': {'type': 'cross'}}
+        if tooltip_formatter:
+            tooltip['formatter'] = tooltip_formatter
+        return self.add_chart({
+            'title': {'text': title},
+            'tooltip': tooltip,
+            'legend': legend if legend is not None else {'left': 'center'},
+            'dataZoom': DATA_ZOOM,
+            'xAxis': {'type': 'category', 'boundaryGap': False, 'data': to_column(x), 'axisLabel': {'rotate': 45}},
+            'yAxis': {'type': 'value', 'name': y_name, 'splitLine': {'show': True}},
+            'series': series,
+        }, height)
+
+    def add_bar(self, title: str, x: Sequence[str], columns: Dict[str, Sequence[float]], x_name: str, y_name: str,
+                colors: Optional[Sequence[str]] = None, tooltip_formatter: Optional[str] = None,
+                height: str = '600px') -> Dict:
+        """
+        添加柱状图（类目横轴）
+
+        Args:
+            title: 图表标题
+            x: 横轴类目
+            columns: 系列名称到数值列的映射
+            x_name: 横轴名称
+            y_name: 纵轴名称
+            colors: 每个系列的颜色（可选）
+            tooltip_formatter: 提示框格式字符串（可选）
+            height: 图表高度（CSS 长度）
+
+        Returns:
+            Dict: 图表的 option
+        """
+        series = []
+        for i, (name, values) in enumerate(columns.items()):
+            item = {'name': name, 'type': 'bar', 'data': to_column(values)}
+            if colors:
+                item['itemStyle'] = {'color': colors[i]}
+            series.append(item)
+
+        tooltip = {'trigger': 'axis', 'axisPointer': {'type': 'shadow'}}
+        if tooltip_formatter:
+            tooltip['formatter'] = tooltip_formatter
+        return self.add_chart({
+            'title': {'text': title},
+            'tooltip': tooltip,
+            'legend': {'left': 'center'},
+            'xAxis': {'type': 'category', 'name': x_name, 'data': to_column(x), 'axisLabel': {'rotate': 45}},
+            'yAxis': {'type': 'value', 'name': y_name, 'splitLine': {'show': True}},
+            'series': series,
+        }, height)
+
+    def render_html(self, output_file: str = 'page.html') -> str:
+        """
+        生成页面HTML
+
+        Args:
+            output_file: 页面文件路径（用于计算本地 ECharts 文件的相对路径）
+
+        Returns:
+            str: 页面HTML
+        """
+        charts = '\n'.join(CHART_TEMPLATE.substitute(index=i, width=self.width, height=height)
+                           for i, (_, height) in enumerate(self.charts))
+        # "</" 转义后脚本中的字符串不会提前结束 <script> 标签
+        options = json.dumps([option for option, _ in self.charts], ensure_ascii=False).replace('</', '<\\/')
+        echarts_script = echarts_script_tag(output_file, inline=self.inline_echarts)
+        return PAGE_TEMPLATE.substitute(title=self.page_title, echarts_script=echarts_script,
+                                        charts=charts, options=options)
+
+    def render(self, output_file: str) -> str:
+        """
+        生成HTML文件
+
+        Args:
+            output_file: 输出文件路径
+
+        Returns:
+            str: 输出文件路径
+        """
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(self.render_html(output_file))
+        return output_file
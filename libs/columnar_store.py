@@ -0,0 +1,901 @@
+"""
+列式存储模块
+
+该模块把聚宽下载的持仓详情（_position_details_*.jsonl，每天每只持仓一行）和订单（_orders_*.jsonl）
+转换为按年分区的列式存储，并提供读取接口：持仓可按日期查询全部持仓、按证券查询持仓历史；
+订单存储只保存已成交订单并按时间预先排序，回放时直接内存映射读取，无需解析JSON。
+
+持仓存储目录结构：
+    <存储目录>/
+        meta.json               元数据：证券字典、各年份行数与日期范围
+        2009/date.npy           日期序数（date.toordinal()，int32）
+        2009/security.npy       证券ID（int32，对应 meta.json 中 securities 列表的下标）
+        2009/amount.npy         持仓数量（float64）
+        2009/price.npy          价格（float64）
+        2009/value.npy          市值（float64）
+        2009/security_order.npy   按 (证券ID, 日期) 排序的行号（int64）
+        2009/security_offsets.npy 每个证券ID在 security_order 中的起始位置（int64，长度为证券数+1）
+
+每个年份内的行按 (日期, 证券ID) 排序，按日期查询时对 date 列二分查找；按证券查询时通过
+security_offsets 定位该证券的行号区间，再对其日期二分查找。
+
+订单存储目录结构相同，列为：
+    time（日期序数*86400+当日秒数，int64）、security（证券ID，int32）、action（动作编码，int8，见 ORDER_ACTIONS）、
+    filled（成交数量，float64）、price（成交价，float64）、commission（手续费，float64）
+年份内按时间排序，同一时间的订单保持原文件中的顺序。
+
+收盘价面板（日期 × 证券）不分区：
+    <存储目录>/
+        meta.json               元数据：证券列表
+        dates.npy               日期序数（int32，升序）
+        close.npy               收盘价（float64，形状为 日期数 × 证券数，缺失值向前填充，首次出现前为NaN）
+可由持仓列式存储中的每日价格或外部CSV（日期, 证券, 收盘价）构建，用于按日期逐日估值。
+
+列文件均为 .npy 格式，读取时使用内存映射，只有实际访问到的部分才会读入内存。
+"""
+
+import csv
+import json
+import os
+import shutil
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .archive_reader import open_text, path_exists
+
+# 存储格式标识与版本
+POSITION_STORE_FORMAT = "position_store"
+ORDER_STORE_FORMAT = "order_store"
+PRICE_PANEL_FORMAT = "price_panel"
+STORE_VERSION = 1
+
+# 持仓列及其数据类型
+POSITION_COLUMNS = {
+    "date": np.int32,
+    "security": np.int32,
+    "amount": np.float64,
+    "price": np.float64,
+    "value": np.float64,
+}
+
+# 订单列及其数据类型
+ORDER_COLUMNS = {
+    "time": np.int64,
+    "security": np.int32,
+    "action": np.int8,
+    "filled": np.float64,
+    "price": np.float64,
+    "commission": np.float64,
+}
+
+# 订单动作编码，未知动作编码为0
+ORDER_ACTIONS = {"open": 1, "close": 2}
+ORDER_ACTION_NAMES = {code: action for action, code in ORDER_ACTIONS.items()}
+
+# 持仓分区中按证券查询使用的索引文件
+_SECURITY_INDEX_FILES = ("security_order", "security_offsets")
+
+# 收盘价面板向前填充时每块处理的证券列数
+_PANEL_FILL_BLOCK = 512
+
+# array.array 类型码，转换时用于紧凑地累积各列数据
+_ARRAY_TYPECODES = {np.int8: "b", np.int32: "i", np.int64: "q", np.float64: "d"}
+
+
+def date_to_ordinal(date_str: str) -> int:
+    """
+    将日期字符串转换为日期序数
+
+    Args:
+        date_str: 日期字符串，前10位为 YYYY-MM-DD
+
+    Returns:
+        int: date.toordinal() 得到的序数
+    """
+    return datetime.strptime(str(date_str)[:10], "%Y-%m-%d").toordinal()
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    """
+    将日期序数转换为 YYYY-MM-DD 字符串
+
+    Args:
+        ordinal: 日期序数
+
+    Returns:
+        str: 日期字符串
+    """
+    return date.fromordinal(int(ordinal)).strftime("%Y-%m-%d")
+
+
+def time_to_seconds(time_str: str) -> int:
+    """
+    将时间字符串转换为时间序数（日期序数*86400+当日秒数）
+
+    Args:
+        time_str: 'YYYY-MM-DD HH:MM:SS' 或 'YYYY-MM-DD' 格式的时间
+
+    Returns:
+        int: 时间序数
+    """
+    time_str = str(time_str)
+    seconds = 0
+    if len(time_str) >= 19:
+        seconds = int(time_str[11:13]) * 3600 + int(time_str[14:16]) * 60 + int(time_str[17:19])
+    return date_to_ordinal(time_str) * 86400 + seconds
+
+
+def seconds_to_time(value: int) -> str:
+    """
+    将时间序数转换为 'YYYY-MM-DD HH:MM:SS' 字符串
+
+    Args:
+        value: 时间序数
+
+    Returns:
+        str: 时间字符串
+    """
+    ordinal, seconds = divmod(int(value), 86400)
+    return f"{ordinal_to_date(ordinal)} {seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class _SecurityDictionary:
+    """转换过程中的证券字典：证券代码 -> 连续的证券ID"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.securities: List[str] = []
+        self.names: List[str] = []
+
+    def get_id(self, security: str, name: Optional[str]) -> int:
+        security_id = self.ids.get(security)
+        if security_id is None:
+            security_id = self.ids[security] = len(self.securities)
+            self.securities.append(security)
+            self.names.append(name or "")
+        return security_id
+
+
+class _ColumnBuffer:
+    """转换过程中单个年份的列数据缓冲区"""
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.dtypes = columns
+        self.columns = {name: array(_ARRAY_TYPECODES[dtype]) for name, dtype in columns.items()}
+
+    def append(self, *values):
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            name: np.frombuffer(self.columns[name], dtype=dtype) if len(self.columns[name]) else np.empty(0, dtype=dtype)
+            for name, dtype in self.dtypes.items()
+        }
+
+
+def _save_columns(year_dir: str, columns: Dict[str, np.ndarray]):
+    """将列数组保存为 .npy 文件"""
+    os.makedirs(year_dir, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(year_dir, f"{name}.npy"), values)
+
+
+def _write_position_partition(year_dir: str, columns: Dict[str, np.ndarray], security_count: int) -> Dict[str, Any]:
+    """
+    排序并写入单个年份的持仓分区
+
+    Returns:
+        Dict: 该年份的行数与日期范围
+    """
+    # 年份内按 (日期, 证券ID) 排序
+    order = np.lexsort((columns["security"], columns["date"]))
+    columns = {name: values[order] for name, values in columns.items()}
+
+    # 按证券的行号索引：稳定排序保证同一证券的行仍按日期递增
+    security_order = np.argsort(columns["security"], kind="stable").astype(np.int64)
+    security_offsets = np.searchsorted(
+        columns["security"][security_order], np.arange(security_count + 1), side="left"
+    ).astype(np.int64)
+    _save_columns(year_dir, dict(columns, security_order=security_order, security_offsets=security_offsets))
+
+    rows = len(order)
+    return {
+        "rows": int(rows),
+        "start_date": ordinal_to_date(columns["date"][0]) if rows else None,
+        "end_date": ordinal_to_date(columns["date"][-1]) if rows else None,
+    }
+
+
+def _write_order_partition(year_dir: str, columns: Dict[str, np.ndarray], security_count: int) -> Dict[str, Any]:
+    """
+    排序并写入单个年份的订单分区
+
+    Returns:
+        Dict: 该年份的行数与日期范围
+    """
+    # 稳定排序：同一时间的订单保持原文件中的顺序
+    order = np.argsort(columns["time"], kind="stable")
+    columns = {name: values[order] for name, values in columns.items()}
+    _save_columns(year_dir, columns)
+
+    rows = len(order)
+    return {
+        "rows": int(rows),
+        "start_date": ordinal_to_date(columns["time"][0] // 86400) if rows else None,
+        "end_date": ordinal_to_date(columns["time"][-1] // 86400) if rows else None,
+    }
+
+
+def _write_store(output_dir: str, store_format: str, source: str, buffers: Dict[int, _ColumnBuffer],
+                 dictionary: _SecurityDictionary, write_partition) -> Dict[str, Any]:
+    """
+    写入按年分区的列式存储
+
+    先写入临时目录，完成后再替换，避免中断时留下不完整的存储。
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+    """
+    temp_dir = output_dir.rstrip("/\\") + ".part"
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+
+    years = {}
+    for year in sorted(buffers):
+        year_dir = os.path.join(temp_dir, str(year))
+        years[str(year)] = write_partition(year_dir, buffers[year].to_arrays(), len(dictionary.securities))
+
+    meta = {
+        "format": store_format,
+        "version": STORE_VERSION,
+        "source": str(source),
+        "rows": sum(info["rows"] for info in years.values()),
+        "securities": dictionary.securities,
+        "security_names": dictionary.names,
+        "years": years,
+    }
+    with open(os.path.join(temp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(temp_dir, output_dir)
+    return meta
+
+
+def _iter_json_lines(input_path: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """逐行解析JSONL，跳过空行，解析失败的行返回None"""
+    with open_text(input_path, start_date=start_date, end_date=end_date) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+
+def convert_position_details(input_path: str, output_dir: str,
+                             start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    将持仓详情JSONL转换为按年分区的列式存储
+
+    Args:
+        input_path: 持仓详情JSONL文件路径（也可以是归档成员路径）
+        output_dir: 存储目录（已存在时会被覆盖）
+        start_date: 开始日期（YYYY-MM-DD，可选，包含）
+        end_date: 结束日期（YYYY-MM-DD，可选，包含）
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+
+    Raises:
+        FileNotFoundError: 输入文件不存在
+    """
+    if not path_exists(input_path):
+        raise FileNotFoundError(f"持仓详情文件不存在: {input_path}")
+
+    dictionary = _SecurityDictionary()
+    buffers: Dict[int, _ColumnBuffer] = {}
+    skipped = 0
+
+    for record in _iter_json_lines(input_path, start_date, end_date):
+        try:
+            date_str = str(record["time"])[:10]
+            security = record["security"]
+            amount = float(record.get("amount") or 0.0)
+            price = float(record.get("price") or 0.0)
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+        if start_date and date_str < start_date:
+            continue
+        if end_date and date_str > end_date:
+            continue
+
+        value = record.get("value")
+        value = float(value) if value is not None else amount * price
+        year = int(date_str[:4])
+        buffer = buffers.get(year)
+        if buffer is None:
+            buffer = buffers[year] = _ColumnBuffer(POSITION_COLUMNS)
+        buffer.append(date_to_ordinal(date_str), dictionary.get_id(security, record.get("security_name")),
+                      amount, price, value)
+
+    if skipped:
+        print(f"警告: 跳过 {skipped} 条无效的持仓记录")
+
+    return _write_store(output_dir, POSITION_STORE_FORMAT, input_path, buffers, dictionary, _write_position_partition)
+
+
+def convert_orders(input_path: str, output_dir: str,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    将订单JSONL中的已成交订单（status == 'done'）转换为按年分区、按时间排序的列式存储
+
+    Args:
+        input_path: 订单JSONL文件路径（也可以是归档成员路径）
+        output_dir: 存储目录（已存在时会被覆盖）
+        start_date: 开始日期（YYYY-MM-DD，可选，包含）
+        end_date: 结束日期（YYYY-MM-DD，可选，包含）
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+
+    Raises:
+        FileNotFoundError: 输入文件不存在
+    """
+    if not path_exists(input_path):
+        raise FileNotFoundError(f"订单文件不存在: {input_path}")
+
+    dictionary = _SecurityDictionary()
+    buffers: Dict[int, _ColumnBuffer] = {}
+    skipped = 0
+
+    for order in _iter_json_lines(input_path, start_date, end_date):
+        try:
+            if order.get("status") != "done":
+                continue
+            time_str = str(order["time"])
+            security = order["security"]
+            filled = float(order.get("filled") or 0.0)
+            price = float(order.get("price") or 0.0)
+            commission = float(order.get("commission") or 0.0)
+            time_value = time_to_seconds(time_str)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+        date_str = time_str[:10]
+        if start_date and date_str < start_date:
+            continue
+        if end_date and date_str > end_date:
+            continue
+
+        year = int(date_str[:4])
+        buffer = buffers.get(year)
+        if buffer is None:
+            buffer = buffers[year] = _ColumnBuffer(ORDER_COLUMNS)
+        buffer.append(time_value, dictionary.get_id(security, order.get("security_name")),
+                      ORDER_ACTIONS.get(order.get("action"), 0), filled, price, commission)
+
+    if skipped:
+        print(f"警告: 跳过 {skipped} 条无效的订单记录")
+
+    return _write_store(output_dir, ORDER_STORE_FORMAT, input_path, buffers, dictionary, _write_order_partition)
+
+
+def is_columnar_store(path: str, store_format: Optional[str] = None) -> bool:
+    """
+    判断路径是否为列式存储目录
+
+    Args:
+        path: 目录路径
+        store_format: 期望的存储格式（POSITION_STORE_FORMAT 或 ORDER_STORE_FORMAT），为None时不检查
+
+    Returns:
+        bool: 是否为列式存储
+    """
+    meta_path = os.path.join(str(path), "meta.json")
+    if not os.path.isfile(meta_path):
+        return False
+    if store_format is None:
+        return True
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("format") == store_format
+    except (OSError, json.JSONDecodeError):
+        return False
+
+
+class _YearPartitionedStore:
+    """按年分区列式存储的公共读取逻辑：元数据、证券字典与分区的内存映射"""
+
+    store_format = ""
+    store_label = ""
+    columns: Dict[str, Any] = {}
+    index_files: Tuple[str, ...] = ()
+
+    def __init__(self, store_dir: str):
+        """
+        Args:
+            store_dir: 存储目录
+
+        Raises:
+            FileNotFoundError: 存储目录或元数据不存在
+            ValueError: 存储格式不匹配
+        """
+        meta_path = os.path.join(store_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"{self.store_label}不存在: {store_dir}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != self.store_format:
+            raise ValueError(f"不是{self.store_label}: {store_dir}")
+
+        self.store_dir = store_dir
+        self.securities: List[str] = self.meta["securities"]
+        self.security_names: List[str] = self.meta.get("security_names", [""] * len(self.securities))
+        self.years: List[int] = sorted(int(year) for year in self.meta["years"])
+        self._security_ids = {security: i for i, security in enumerate(self.securities)}
+        self._partitions: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def _partition(self, year: int) -> Optional[Dict[str, np.ndarray]]:
+        """按需以内存映射方式打开年份分区"""
+        if year not in self._partitions:
+            if year not in self.years:
+                return None
+            year_dir = os.path.join(self.store_dir, str(year))
+            names = list(self.columns) + list(self.index_files)
+            self._partitions[year] = {
+                name: np.load(os.path.join(year_dir, f"{name}.npy"), mmap_mode="r") for name in names
+            }
+        return self._partitions[year]
+
+    def _years_in_range(self, start_date: Optional[str], end_date: Optional[str]) -> List[int]:
+        return [
+            year for year in self.years
+            if not (start_date and year < int(start_date[:4])) and not (end_date and year > int(end_date[:4]))
+        ]
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in self.columns.items()}
+
+    def _concat(self, chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        if not chunks:
+            return self._empty()
+        if len(chunks) == 1:
+            return chunks[0]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in self.columns}
+
+    def security_id(self, security: str) -> Optional[int]:
+        """
+        返回证券代码对应的证券ID
+
+        Args:
+            security: 证券代码，如 000001.XSHE
+
+        Returns:
+            Optional[int]: 证券ID；不存在时返回None
+        """
+        return self._security_ids.get(security)
+
+    def date_range(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        返回存储的日期范围
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: (开始日期, 结束日期)
+        """
+        if not self.years:
+            return None, None
+        return (self.meta["years"][str(self.years[0])]["start_date"],
+                self.meta["years"][str(self.years[-1])]["end_date"])
+
+
+class PositionStore(_YearPartitionedStore):
+    """
+    按年分区的持仓列式存储读取器
+
+    查询结果为列数组字典：{"date": 日期序数, "security": 证券ID, "amount", "price", "value"}，
+    可通过 to_records 转换为带日期字符串和证券代码的记录列表。
+    """
+
+    store_format = POSITION_STORE_FORMAT
+    store_label = "持仓列式存储"
+    columns = POSITION_COLUMNS
+    index_files = _SECURITY_INDEX_FILES
+
+    def trading_dates(self) -> List[str]:
+        """
+        返回存储中所有有持仓的日期
+
+        Returns:
+            List[str]: 按时间排序的日期列表（YYYY-MM-DD）
+        """
+        dates = []
+        for year in self.years:
+            for ordinal in np.unique(self._partition(year)["date"]):
+                dates.append(ordinal_to_date(ordinal))
+        return dates
+
+    def holdings_on(self, date_str: str) -> Dict[str, np.ndarray]:
+        """
+        查询某一天的全部持仓
+
+        Args:
+            date_str: 日期（YYYY-MM-DD）
+
+        Returns:
+            Dict[str, np.ndarray]: 当天持仓的列数组（按证券ID排序）；当天没有持仓记录时各列为空数组
+        """
+        part = self._partition(int(date_str[:4]))
+        if part is None:
+            return self._empty()
+        ordinal = date_to_ordinal(date_str)
+        dates = part["date"]
+        lo = int(np.searchsorted(dates, ordinal, side="left"))
+        hi = int(np.searchsorted(dates, ordinal, side="right"))
+        return {name: np.asarray(part[name][lo:hi]) for name in self.columns}
+
+    def security_history(self, security: str, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        查询单个证券的持仓历史
+
+        Args:
+            security: 证券代码
+            start_date: 开始日期（YYYY-MM-DD，可选，包含）
+            end_date: 结束日期（YYYY-MM-DD，可选，包含）
+
+        Returns:
+            Dict[str, np.ndarray]: 按日期排序的列数组；证券不存在时各列为空数组
+        """
+        security_id = self.security_id(security)
+        if security_id is None:
+            return self._empty()
+
+        start_ordinal = date_to_ordinal(start_date) if start_date else None
+        end_ordinal = date_to_ordinal(end_date) if end_date else None
+        chunks = []
+        for year in self._years_in_range(start_date, end_date):
+            part = self._partition(year)
+            offsets = part["security_offsets"]
+            rows = np.asarray(part["security_order"][offsets[security_id]:offsets[security_id + 1]])
+            if not len(rows):
+                continue
+            dates = part["date"][rows]
+            lo = int(np.searchsorted(dates, start_ordinal, side="left")) if start_ordinal is not None else 0
+            hi = int(np.searchsorted(dates, end_ordinal, side="right")) if end_ordinal is not None else len(rows)
+            rows = rows[lo:hi]
+            chunks.append({name: np.asarray(part[name][rows]) for name in self.columns})
+
+        return self._concat(chunks)
+
+    def to_records(self, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        将查询结果转换为记录列表
+
+        Args:
+            columns: holdings_on 或 security_history 返回的列数组
+
+        Returns:
+            List[Dict]: 每行一个字典，包含 date、security、security_name、amount、price、value
+        """
+        records = []
+        for i in range(len(columns["date"])):
+            security_id = int(columns["security"][i])
+            records.append({
+                "date": ordinal_to_date(columns["date"][i]),
+                "security": self.securities[security_id],
+                "security_name": self.security_names[security_id],
+                "amount": float(columns["amount"][i]),
+                "price": float(columns["price"][i]),
+                "value": float(columns["value"][i]),
+            })
+        return records
+
+
+class OrderStore(_YearPartitionedStore):
+    """
+    按年分区的已成交订单列式存储读取器
+
+    查询结果为按时间排序的列数组字典：{"time": 时间序数, "security": 证券ID, "action": 动作编码,
+    "filled", "price", "commission"}。不跨年份且不限定日期时直接返回内存映射数组，不复制数据。
+    """
+
+    store_format = ORDER_STORE_FORMAT
+    store_label = "订单列式存储"
+    columns = ORDER_COLUMNS
+
+    def load_columns(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        读取日期范围内的全部已成交订单
+
+        Args:
+            start_date: 开始日期（YYYY-MM-DD，可选，包含）
+            end_date: 结束日期（YYYY-MM-DD，可选，包含）
+
+        Returns:
+            Dict[str, np.ndarray]: 按时间排序的列数组
+        """
+        start_value = date_to_ordinal(start_date) * 86400 if start_date else None
+        end_value = (date_to_ordinal(end_date) + 1) * 86400 if end_date else None
+        chunks = []
+        for year in self._years_in_range(start_date, end_date):
+            part = self._partition(year)
+            times = part["time"]
+            lo = int(np.searchsorted(times, start_value, side="left")) if start_value is not None else 0
+            hi = int(np.searchsorted(times, end_value, side="left")) if end_value is not None else len(times)
+            if lo < hi:
+                chunks.append({name: part[name][lo:hi] for name in self.columns})
+        return self._concat(chunks)
+
+    def orders_on(self, date_str: str) -> Dict[str, np.ndarray]:
+        """
+        查询某一天的已成交订单
+
+        Args:
+            date_str: 日期（YYYY-MM-DD）
+
+        Returns:
+            Dict[str, np.ndarray]: 当天订单的列数组
+        """
+        return self.load_columns(date_str, date_str)
+
+    def to_records(self, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        将查询结果转换为与订单JSONL字段一致的记录列表
+
+        Args:
+            columns: load_columns 或 orders_on 返回的列数组
+
+        Returns:
+            List[Dict]: 每行一个字典，包含 time、security、security_name、action、filled、price、commission、status
+        """
+        times = columns["time"].tolist()
+        securities = columns["security"].tolist()
+        actions = columns["action"].tolist()
+        filled = columns["filled"].tolist()
+        prices = columns["price"].tolist()
+        commissions = columns["commission"].tolist()
+        records = []
+        for i in range(len(times)):
+            records.append({
+                "time": seconds_to_time(times[i]),
+                "security": self.securities[securities[i]],
+                "security_name": self.security_names[securities[i]],
+                "action": ORDER_ACTION_NAMES.get(actions[i], ""),
+                "filled": filled[i],
+                "price": prices[i],
+                "commission": commissions[i],
+                "status": "done",
+            })
+        return records
+
+
+def _build_price_panel(output_dir: str, date_ordinals: np.ndarray, security_ids: np.ndarray, prices: np.ndarray,
+                       securities: List[str], source: str) -> Dict[str, Any]:
+    """
+    由 (日期序数, 证券ID, 价格) 三列构建收盘价面板
+
+    同一日期同一证券有多条记录时取最后一条；缺失值按日期向前填充。
+    面板通过 np.lib.format.open_memmap 直接写入磁盘，向前填充按列分块进行，内存占用与分块大小成正比。
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+    """
+    dates = np.unique(date_ordinals).astype(np.int32)
+    rows = np.searchsorted(dates, date_ordinals)
+
+    temp_dir = output_dir.rstrip("/\\") + ".part"
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+
+    np.save(os.path.join(temp_dir, "dates.npy"), dates)
+    close = np.lib.format.open_memmap(os.path.join(temp_dir, "close.npy"), mode="w+", dtype=np.float64,
+                                      shape=(len(dates), len(securities)))
+    close[:] = np.nan
+    # 重复的 (日期, 证券) 只保留最后一条
+    keys = rows.astype(np.int64) * max(1, len(securities)) + security_ids
+    _, last_index = np.unique(keys[::-1], return_index=True)
+    keep = len(keys) - 1 - last_index
+    close[rows[keep], security_ids[keep]] = prices[keep]
+
+    # 按列分块向前填充：每个位置取该列此前最后一个有效值的行号
+    row_numbers = np.arange(len(dates))[:, None]
+    for start in range(0, len(securities), _PANEL_FILL_BLOCK):
+        block = np.array(close[:, start:start + _PANEL_FILL_BLOCK])
+        last_valid = np.where(np.isnan(block), 0, row_numbers)
+        np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+        close[:, start:start + _PANEL_FILL_BLOCK] = block[last_valid, np.arange(block.shape[1])[None, :]]
+    close.flush()
+    del close
+
+    meta = {
+        "format": PRICE_PANEL_FORMAT,
+        "version": STORE_VERSION,
+        "source": str(source),
+        "rows": int(len(dates)),
+        "start_date": ordinal_to_date(dates[0]) if len(dates) else None,
+        "end_date": ordinal_to_date(dates[-1]) if len(dates) else None,
+        "securities": list(securities),
+    }
+    with open(os.path.join(temp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(temp_dir, output_dir)
+    return meta
+
+
+def build_price_panel_from_positions(store_dir: str, output_dir: str) -> Dict[str, Any]:
+    """
+    用持仓列式存储中每天每只持仓的价格构建收盘价面板
+
+    Args:
+        store_dir: convert_position_details 生成的持仓存储目录
+        output_dir: 面板目录（已存在时会被覆盖）
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+    """
+    store = PositionStore(store_dir)
+    chunks = [store._partition(year) for year in store.years]
+    date_ordinals = np.concatenate([np.asarray(c["date"]) for c in chunks]) if chunks else np.zeros(0, dtype=np.int32)
+    security_ids = np.concatenate([np.asarray(c["security"]) for c in chunks]) if chunks else np.zeros(0, dtype=np.int32)
+    prices = np.concatenate([np.asarray(c["price"]) for c in chunks]) if chunks else np.zeros(0)
+    return _build_price_panel(output_dir, date_ordinals, security_ids, prices, store.securities, store_dir)
+
+
+def build_price_panel_from_csv(csv_path: str, output_dir: str, date_column: str = "date",
+                               security_column: str = "security", price_column: str = "close") -> Dict[str, Any]:
+    """
+    用长表格式的CSV（每行一个日期、证券和收盘价）构建收盘价面板
+
+    Args:
+        csv_path: CSV文件路径（也可以是归档成员路径）
+        output_dir: 面板目录（已存在时会被覆盖）
+        date_column: 日期列名（YYYY-MM-DD 或 YYYYMMDD）
+        security_column: 证券代码列名
+        price_column: 收盘价列名
+
+    Returns:
+        Dict: 写入的元数据（同 meta.json）
+
+    Raises:
+        FileNotFoundError: 文件不存在
+        ValueError: 缺少必要的列
+    """
+    if not path_exists(csv_path):
+        raise FileNotFoundError(f"价格文件不存在: {csv_path}")
+
+    dictionary = _SecurityDictionary()
+    buffer = _ColumnBuffer({"date": np.int32, "security": np.int32, "price": np.float64})
+    day_ordinals: Dict[str, int] = {}
+    skipped = 0
+
+    with open_text(csv_path) as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in (date_column, security_column, price_column) if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"价格文件缺少列: {', '.join(missing)}")
+        for row in reader:
+            try:
+                date_str = row[date_column].strip()
+                ordinal = day_ordinals.get(date_str)
+                if ordinal is None:
+                    normalized = date_str if "-" in date_str else f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
+                    ordinal = day_ordinals[date_str] = date_to_ordinal(normalized)
+                price = float(row[price_column])
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            buffer.append(ordinal, dictionary.get_id(row[security_column].strip(), None), price)
+
+    if skipped:
+        print(f"警告: 跳过 {skipped} 行无效的价格记录")
+
+    arrays = buffer.to_arrays()
+    return _build_price_panel(output_dir, arrays["date"], arrays["security"], arrays["price"],
+                              dictionary.securities, csv_path)
+
+
+class PricePanel:
+    """
+    收盘价面板读取器（日期 × 证券，内存映射）
+
+    按日期取一行价格，配合 security_columns 得到的列下标即可对任意持仓数组做向量化估值。
+    """
+
+    def __init__(self, panel_dir: str):
+        """
+        Args:
+            panel_dir: 面板目录
+
+        Raises:
+            FileNotFoundError: 面板目录或元数据不存在
+            ValueError: 存储格式不匹配
+        """
+        meta_path = os.path.join(panel_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"收盘价面板不存在: {panel_dir}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != PRICE_PANEL_FORMAT:
+            raise ValueError(f"不是收盘价面板: {panel_dir}")
+
+        self.panel_dir = panel_dir
+        self.securities: List[str] = self.meta["securities"]
+        self.dates = np.load(os.path.join(panel_dir, "dates.npy"))
+        self.close = np.load(os.path.join(panel_dir, "close.npy"), mmap_mode="r")
+        self._security_columns = {security: i for i, security in enumerate(self.securities)}
+
+    def security_columns(self, securities: List[str]) -> np.ndarray:
+        """
+        返回证券在面板中的列下标
+
+        Args:
+            securities: 证券代码列表
+
+        Returns:
+            np.ndarray: 列下标数组（int64），面板中没有的证券为-1
+        """
+        return np.array([self._security_columns.get(security, -1) for security in securities], dtype=np.int64)
+
+    def row_index(self, date_str: str) -> Optional[int]:
+        """
+        返回日期在面板中的行号
+
+        Args:
+            date_str: 日期（YYYY-MM-DD）
+
+        Returns:
+            Optional[int]: 行号；面板中没有该日期时返回None
+        """
+        ordinal = date_to_ordinal(date_str)
+        index = int(np.searchsorted(self.dates, ordinal))
+        if index < len(self.dates) and self.dates[index] == ordinal:
+            return index
+        return None
+
+    def prices_on(self, date_str: str, columns: np.ndarray) -> np.ndarray:
+        """
+        取某一天指定列的收盘价，面板中没有该日期时取此前最近一个交易日的收盘价
+
+        Args:
+            date_str: 日期（YYYY-MM-DD）
+            columns: security_columns 返回的列下标
+
+        Returns:
+            np.ndarray: 收盘价数组；日期早于面板、没有该证券或尚无价格时为NaN
+        """
+        prices = np.full(len(columns), np.nan)
+        index = int(np.searchsorted(self.dates, date_to_ordinal(date_str), side="right")) - 1
+        if index < 0:
+            return prices
+        valid = columns >= 0
+        prices[valid] = self.close[index][columns[valid]]
+        return prices
+
+    def date_ordinals(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> np.ndarray:
+        """
+        返回日期范围内的面板日期序数
+
+        Args:
+            start_date: 开始日期（YYYY-MM-DD，可选，包含）
+            end_date: 结束日期（YYYY-MM-DD，可选，包含）
+
+        Returns:
+            np.ndarray: 日期序数数组
+        """
+        lo = int(np.searchsorted(self.dates, date_to_ordinal(start_date), side="left")) if start_date else 0
+        hi = int(np.searchsorted(self.dates, date_to_ordinal(end_date), side="right")) if end_date else len(self.dates)
+        return np.asarray(self.dates[lo:hi])
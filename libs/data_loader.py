@@ -2,21 +2,23 @@
 数据加载模块
 
 该模块提供了加载各种数据格式的功能，包括聚宽回测数据、持仓数据和指数数据。
+文件路径既可以是普通文件，也可以是 "<归档路径>::<成员名>" 形式的归档成员（见 archive_reader）。
 """
 
 import json
-import os
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
+from .archive_reader import open_text, path_exists
+
 
 def load_backtest_data(file_path: str) -> List[Dict]:
     """
     加载聚宽回测数据
     
     Args:
-        file_path: 回测数据文件路径（支持JSONL和新的JSON结果文件）
+        file_path: 回测数据文件路径（支持JSONL和新的JSON结果文件，也可以是归档成员路径）
         
     Returns:
         List[Dict]: 解析后的回测数据列表
@@ -25,13 +27,13 @@ def load_backtest_data(file_path: str) -> List[Dict]:
         FileNotFoundError: 文件不存在
         json.JSONDecodeError: JSON格式错误
     """
-    if not os.path.exists(file_path):
+    if not path_exists(file_path):
         raise FileNotFoundError(f"回测数据文件不存在: {file_path}")
     
     # 根据文件扩展名与内容格式进行解析
     if file_path.endswith('.json'):
         # 新的JSON结果文件：包含顶层键 'results'
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open_text(file_path) as f:
             obj = json.load(f)
         
         items: List[Dict] = []
@@ -80,7 +82,7 @@ def load_backtest_data(file_path: str) -> List[Dict]:
     else:
         # 默认按照JSONL逐行解析
         data = []
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open_text(file_path) as f:
             for line in f:
                 line = line.strip()
                 if line:
@@ -101,7 +103,7 @@ def load_position_data(file_path: str) -> Dict:
     加载持仓数据
     
     Args:
-        file_path: 持仓数据文件路径
+        file_path: 持仓数据文件路径（也可以是归档成员路径）
         
     Returns:
         Dict: 解析后的持仓数据
@@ -110,12 +112,12 @@ def load_position_data(file_path: str) -> Dict:
         FileNotFoundError: 文件不存在
         json.JSONDecodeError: JSON格式错误
     """
-    if not os.path.exists(file_path):
+    if not path_exists(file_path):
         raise FileNotFoundError(f"持仓数据文件不存在: {file_path}")
     
     # 首先尝试正常解析为JSON
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open_text(file_path) as f:
             data = json.load(f)
         return data
     except json.JSONDecodeError:
@@ -123,7 +125,7 @@ def load_position_data(file_path: str) -> Dict:
         # 目标是尽可能恢复 balances 列表，忽略无法解析的条目。
         print(f"警告: 持仓数据JSON损坏，已启用容错解析: {file_path}")
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open_text(file_path) as f:
                 lines = f.readlines()
         except Exception:
             # 无法读取文件，返回空结构
@@ -207,14 +209,58 @@ def load_index_data(file_path: str) -> List[Dict]:
         FileNotFoundError: 文件不存在
         json.JSONDecodeError: JSON格式错误
     """
-    if not os.path.exists(file_path):
+    if not path_exists(file_path):
         raise FileNotFoundError(f"指数数据文件不存在: {file_path}")
     
     data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_text(file_path) as f:
         for line in f:
             line = line.strip()
             if line:
                 data.append(json.loads(line))
     
-    return data
\ No newline at end of file
+    return data
+
+
+def load_jsonl_records(file_path: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       date_field: str = 'time') -> List[Dict]:
+    """
+    加载持仓详情、订单等逐条记录的JSONL数据，可按日期范围过滤
+    
+    对带索引的 zip 归档成员，只解压与日期范围相交的分段（例如只读取某一季度的持仓详情）。
+    
+    Args:
+        file_path: JSONL文件路径（也可以是归档成员路径）
+        start_date: 开始日期（YYYY-MM-DD，可选，包含）
+        end_date: 结束日期（YYYY-MM-DD，可选，包含）
+        date_field: 记录中表示时间的字段，值的前10位为 YYYY-MM-DD
+        
+    Returns:
+        List[Dict]: 日期范围内的记录列表
+        
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    if not path_exists(file_path):
+        raise FileNotFoundError(f"数据文件不存在: {file_path}")
+    
+    records = []
+    with open_text(file_path, start_date=start_date, end_date=end_date) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"警告: 跳过无效的JSON行: {e}")
+                continue
+            # 分段按季度等粒度划分，边界分段中仍可能有范围外的记录
+            record_date = str(record.get(date_field, ''))[:10]
+            if start_date and record_date < start_date:
+                continue
+            if end_date and record_date > end_date:
+                continue
+            records.append(record)
+    
+    return records
@@ -0,0 +1,95 @@
+"""
+曲线降采样模块
+
+提供 Largest-Triangle-Three-Buckets（LTTB）降采样，用于在生成的HTML报告中减少每条曲线的绘制点数，
+同时保留曲线的形状（峰值、谷值和转折点）。
+
+LTTB 将首尾之间的点均分为若干桶，依次在每个桶中选出与"上一个选中点"和"下一个桶的平均点"
+构成三角形面积最大的点。桶的划分和各桶平均点为数组运算，宽桶的面积计算也是数组运算；
+只有逐桶的选择链（依赖上一个桶的选中点）是顺序执行的。
+"""
+
+from typing import List
+
+import numpy as np
+
+# 桶内点数超过该值时用数组运算计算三角形面积；日线曲线的桶通常只有几个点，逐点计算更快
+VECTORIZED_BUCKET_SIZE = 32
+
+
+def lttb_indices(values: np.ndarray, threshold: int, x: np.ndarray = None) -> np.ndarray:
+    """
+    用 LTTB 算法选出保留的点
+
+    Args:
+        values: 曲线的纵坐标
+        threshold: 保留的点数（小于3或不小于总点数时保留全部点）
+        x: 曲线的横坐标（可选，默认使用点的序号）
+
+    Returns:
+        np.ndarray: 保留的点的下标（升序，包含首尾两点）
+
+    Example:
+        >>> lttb_indices(np.array([0.0, 1.0, 0.0, 5.0, 0.0, 1.0, 0.0]), 4).tolist()
+        [0, 2, 3, 6]
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if threshold < 3 or threshold >= n:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # 中间的 n-2 个点均分为 threshold-2 个桶
+    every = (n - 2) / (threshold - 2)
+    starts = (np.arange(threshold - 2) * every).astype(np.int64) + 1
+    ends = np.append(starts[1:], n - 1)
+
+    # 每个桶的"下一个桶平均点"：最后一个桶使用最后一个点
+    counts = ends - starts
+    next_x = np.append((np.add.reduceat(x[1:n - 1], starts - 1) / counts)[1:], x[-1])
+    next_y = np.append((np.add.reduceat(y[1:n - 1], starts - 1) / counts)[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    xs, ys = x.tolist(), y.tolist()
+    a = 0
+    for i, (lo, hi, cx, cy) in enumerate(zip(starts.tolist(), ends.tolist(), next_x.tolist(), next_y.tolist())):
+        ax, ay = xs[a], ys[a]
+        # 三角形面积的2倍：|(ax - cx) * (by - ay) - (ax - bx) * (cy - ay)|
+        if hi - lo > VECTORIZED_BUCKET_SIZE:
+            area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+            a = lo + int(area.argmax())
+        else:
+            best = -1.0
+            for j in range(lo, hi):
+                area = abs((ax - cx) * (ys[j] - ay) - (ax - xs[j]) * (cy - ay))
+                if area > best:
+                    best, a = area, j
+        selected[i + 1] = a
+    return selected
+
+
+def lttb_zoom_levels(values: np.ndarray, target_points: int, x: np.ndarray = None) -> List[np.ndarray]:
+    """
+    生成按缩放级别逐级加密的降采样下标
+
+    第 k 级保留 target_points * 2^k 个点，直到点数不少于原始点数为止（原始数据本身即最高一级，不在返回值中）。
+    图表缩放到可见范围占比为 f 时，选择第一个满足 点数 * f >= target_points 的级别即可保证可见点数不少于目标点数。
+
+    Args:
+        values: 曲线的纵坐标
+        target_points: 每条曲线的目标绘制点数（小于3时不降采样）
+        x: 曲线的横坐标（可选，默认使用点的序号）
+
+    Returns:
+        List[np.ndarray]: 各级别保留的点的下标，由粗到细；不需要降采样时为空列表
+    """
+    levels = []
+    if target_points < 3:
+        return levels
+    threshold = target_points
+    while threshold < len(values):
+        levels.append(lttb_indices(values, threshold, x))
+        threshold *= 2
+    return levels
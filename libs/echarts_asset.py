@@ -0,0 +1,116 @@
+"""
+ECharts 本地资源模块
+
+所有报告共用 output/assets/echarts.min.js 一份 ECharts 文件：
+- 报告通过相对路径引用该文件，整个 output 目录可离线打开或整体拷贝；
+- 本地文件加载失败（如单独拷走了HTML）时，页面自动回退到CDN；
+- 也可将文件内容直接嵌入HTML，生成单文件报告（每个文件约增加 1 MB）。
+
+本地文件只需准备一次，之后所有报告生成器直接复用：
+- python main.py install_echarts 从CDN下载固定版本（需要联网，可在联网机器上运行后拷贝 output/assets/）；
+- 或在任一报告生成器中用 --echarts_js 指定已有的 echarts.min.js。
+"""
+
+import os
+import shutil
+import urllib.request
+from pathlib import Path
+from typing import Optional, Union
+
+ECHARTS_VERSION = '5.0.0'
+ECHARTS_CDN = f'https://cdn.jsdelivr.net/npm/echarts@{ECHARTS_VERSION}/dist/echarts.min.js'
+
+# 共享的本地 ECharts 文件（项目根目录/output/assets/echarts.min.js）
+ECHARTS_ASSET_DIR = Path(__file__).parent.parent / 'output' / 'assets'
+ECHARTS_ASSET_FILE = ECHARTS_ASSET_DIR / 'echarts.min.js'
+
+ECHARTS_INSTALL_HINT = "python main.py install_echarts（或 --echarts_js 指定 echarts.min.js）"
+
+
+def download_echarts_asset(url: str = ECHARTS_CDN, asset_file: Path = ECHARTS_ASSET_FILE,
+                           timeout: float = 60.0) -> Path:
+    """
+    下载 ECharts 文件到共享的本地位置
+
+    Args:
+        url: 下载地址（默认为固定版本的CDN地址）
+        asset_file: 共享的本地 ECharts 文件路径
+        timeout: 超时秒数
+
+    Returns:
+        Path: 本地 ECharts 文件路径
+
+    Raises:
+        ValueError: 下载内容不是 ECharts 脚本（如代理返回的错误页面）
+    """
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        content = response.read()
+    if b'echarts' not in content or content.lstrip()[:1] == b'<':
+        raise ValueError(f"下载内容不是 ECharts 脚本: {url}")
+    asset_file.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再替换，中断时不会留下不完整的文件
+    partial = asset_file.with_name(asset_file.name + '.part')
+    partial.write_bytes(content)
+    partial.replace(asset_file)
+    print(f"已下载 ECharts 文件到: {asset_file}（{len(content) / 1024:.0f} KB）")
+    return asset_file
+
+
+def install_echarts_asset(source: Optional[Union[str, Path]] = None, required: bool = False,
+                          asset_file: Path = ECHARTS_ASSET_FILE) -> Optional[Path]:
+    """
+    准备共享的本地 ECharts 文件
+
+    Args:
+        source: ECharts 文件路径（可选）。指定时复制到 asset_file（内容相同则跳过）
+        required: 是否必须有本地文件（如 --inline_echarts）；为True且文件不存在时抛出 FileNotFoundError
+        asset_file: 共享的本地 ECharts 文件路径
+
+    Returns:
+        Optional[Path]: 本地 ECharts 文件路径，不存在时返回 None
+    """
+    if source:
+        source = Path(source)
+        if not source.is_file():
+            raise FileNotFoundError(f"ECharts 文件不存在: {source}")
+        if not asset_file.exists() or asset_file.read_bytes() != source.read_bytes():
+            asset_file.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, asset_file)
+            print(f"已复制 ECharts 文件到: {asset_file}")
+    if not asset_file.is_file():
+        if required:
+            raise FileNotFoundError(f"未找到本地 ECharts 文件 {asset_file}，无法嵌入HTML，请先运行 {ECHARTS_INSTALL_HINT}")
+        print(f"提示: 未找到本地 ECharts 文件 {asset_file}，报告将从CDN加载图表库（离线查看请先运行 {ECHARTS_INSTALL_HINT}）")
+        return None
+    return asset_file
+
+
+def echarts_script_tag(html_file: Union[str, Path], asset_file: Optional[Path] = ECHARTS_ASSET_FILE,
+                       inline: bool = False) -> str:
+    """
+    生成报告中加载 ECharts 的 <script> 标签
+
+    Args:
+        html_file: 报告HTML文件路径（用于计算本地文件的相对路径）
+        asset_file: 本地 ECharts 文件路径，None 或文件不存在时只使用CDN
+        inline: 是否将本地文件内容直接嵌入HTML
+
+    Returns:
+        str: <script> 标签
+
+    Raises:
+        FileNotFoundError: 要求嵌入但本地文件不存在
+    """
+    if asset_file is None or not asset_file.is_file():
+        if inline:
+            raise FileNotFoundError(f"未找到本地 ECharts 文件 {asset_file}，无法嵌入HTML，请先运行 {ECHARTS_INSTALL_HINT}")
+        return f'<script src="{ECHARTS_CDN}"></script>'
+
+    if inline:
+        # "</script" 转义后文件内容不会提前结束 <script> 标签
+        source = asset_file.read_text(encoding='utf-8').rstrip().replace('</script', '<\\/script')
+        return f'<script>\n{source}\n</script>'
+
+    relative = Path(os.path.relpath(asset_file.resolve(), Path(html_file).resolve().parent)).as_posix()
+    return (f'<script src="{relative}"></script>\n'
+            f'    <script>window.echarts || document.write(\'<script src="{ECHARTS_CDN}"><\\/script>\');</script>')
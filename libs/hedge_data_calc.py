@@ -6,7 +6,6 @@
 """
 
 import json
-import os
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Union
 
@@ -14,6 +13,7 @@ import numpy as np
 import pandas as pd
 
 # 导入拆分出去的模块
+from .archive_reader import path_exists
 from .data_loader import load_backtest_data, load_position_data, load_index_data
 from .format_converter import (
     generate_hedge_backtest_format,
@@ -47,13 +47,13 @@ def calculate_hedge_data(
         FileNotFoundError: 文件不存在
     """
     # 验证参数
-    if not os.path.exists(backtest_file):
+    if not path_exists(backtest_file):
         raise FileNotFoundError(f"回测数据文件不存在: {backtest_file}")
     
-    if not os.path.exists(index_file):
+    if not path_exists(index_file):
         raise FileNotFoundError(f"指数数据文件不存在: {index_file}")
     
-    if position_file and not os.path.exists(position_file):
+    if position_file and not path_exists(position_file):
         raise FileNotFoundError(f"持仓数据文件不存在: {position_file}")
     
     # 加载数据
@@ -65,6 +65,40 @@ def calculate_hedge_data(
     if position_file:
         position_data = load_position_data(position_file)
     
+    hedge_data = {
+        "metadata": {
+            "backtest_file": backtest_file,
+            "position_file": position_file,
+            "index_file": index_file,
+            "calculation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "data": calculate_hedge_records(
+            prepare_backtest_daily_returns(backtest_data),
+            index_data,
+            prepare_position_frame(position_data)
+        )
+    }
+    
+    # 如果指定了输出文件，则保存结果
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(hedge_data, f, ensure_ascii=False, indent=2)
+    
+    return hedge_data
+
+
+def prepare_backtest_daily_returns(backtest_data: List[Dict]) -> pd.DataFrame:
+    """
+    由回测数据的累积收益率计算按日期排序的日收益率
+    
+    同一回测与多个指数计算对冲时只需计算一次。
+    
+    Args:
+        backtest_data: load_backtest_data 返回的回测数据
+        
+    Returns:
+        pd.DataFrame: 包含 date、cumulative_return、daily_return、return 列
+    """
     # 将回测数据转换为DataFrame，方便处理
     backtest_records = []
     for item in backtest_data:
@@ -90,7 +124,51 @@ def calculate_hedge_data(
     # 更新DataFrame
     backtest_df = pd.DataFrame(backtest_records_with_daily_returns)
     backtest_df['return'] = backtest_df['daily_return']
+    return backtest_df
+
+
+def prepare_position_frame(position_data: Optional[Dict]) -> Optional[pd.DataFrame]:
+    """
+    将持仓数据转换为按日期合并用的DataFrame
     
+    Args:
+        position_data: load_position_data 返回的持仓数据（可选）
+        
+    Returns:
+        Optional[pd.DataFrame]: 包含 date、position_ratio、cash、total_value、net_value 列；没有有效持仓记录时返回None
+    """
+    if not (position_data and isinstance(position_data, dict) and position_data.get('balances')):
+        return None
+    
+    position_records = []
+    for item in position_data.get('balances', []):
+        date_str = item.get('time', '').split(' ')[0]
+        date_val = parse_date_string(date_str)
+        if date_val is None:
+            continue
+        position_records.append({
+            'date': date_val,
+            'position_ratio': item.get('position_ratio', 0),
+            'cash': item.get('cash', 0),
+            'total_value': item.get('total_value', 0),
+            'net_value': item.get('net_value', 0)
+        })
+    return pd.DataFrame(position_records) if position_records else None
+
+
+def calculate_hedge_records(backtest_returns: pd.DataFrame, index_data: List[Dict],
+                            position_frame: Optional[pd.DataFrame] = None) -> List[Dict]:
+    """
+    由已准备好的回测日收益率、指数数据和持仓数据计算每日对冲数据
+    
+    Args:
+        backtest_returns: prepare_backtest_daily_returns 返回的回测日收益率
+        index_data: 指数数据（每条记录需包含 date 和 pctChg）
+        position_frame: prepare_position_frame 返回的持仓数据（可选）
+        
+    Returns:
+        List[Dict]: 每日对冲数据（date、backtest_return、index_return、position_ratio、hedge_return、cash、total_value、net_value）
+    """
     # 将指数数据转换为DataFrame
     index_df = pd.DataFrame([
         {
@@ -101,45 +179,20 @@ def calculate_hedge_data(
     ])
     
     # 合并数据
-    merged_df = pd.merge(backtest_df, index_df, on='date', how='inner', suffixes=('_backtest', '_index'))
-
-    # 如果有持仓数据且包含 balances，则合并持仓数据；否则使用默认值
-    if position_data and isinstance(position_data, dict) and position_data.get('balances'):
-        position_records = []
-        for item in position_data.get('balances', []):
-            date_str = item.get('time', '').split(' ')[0]
-            date_val = parse_date_string(date_str)
-            if date_val is None:
-                continue
-            position_records.append({
-                'date': date_val,
-                'position_ratio': item.get('position_ratio', 0),
-                'cash': item.get('cash', 0),
-                'total_value': item.get('total_value', 0),
-                'net_value': item.get('net_value', 0)
-            })
-        if position_records:
-            position_df = pd.DataFrame(position_records)
-            merged_df = pd.merge(merged_df, position_df, on='date', how='left')
+    merged_df = pd.merge(backtest_returns, index_df, on='date', how='inner', suffixes=('_backtest', '_index'))
 
+    # 如果有持仓数据，则合并持仓数据
+    if position_frame is not None:
+        merged_df = pd.merge(merged_df, position_frame, on='date', how='left')
 
     # 计算对冲收益率: 对冲日收益率 = 回测日收益率 - 回测持仓比例 * 指数收益率
     merged_df['hedge_return'] = merged_df['return_backtest'] - merged_df['position_ratio'] * merged_df['return_index']
     
     # 转换为输出格式
-    hedge_data = {
-        "metadata": {
-            "backtest_file": backtest_file,
-            "position_file": position_file,
-            "index_file": index_file,
-            "calculation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        },
-        "data": []
-    }
-    
+    records = []
     for _, row in merged_df.iterrows():
         # 处理NaN值，确保所有字段都有有效值
-        hedge_data["data"].append({
+        records.append({
             "date": row['date'],
             "backtest_return": row['return_backtest'],
             "index_return": row['return_index'],
@@ -149,10 +202,4 @@ def calculate_hedge_data(
             "total_value": row['total_value'],
             "net_value": row['net_value']
         })
-    
-    # 如果指定了输出文件，则保存结果
-    if output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(hedge_data, f, ensure_ascii=False, indent=2)
-    
-    return hedge_data
\ No newline at end of file
+    return records
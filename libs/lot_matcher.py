@@ -0,0 +1,157 @@
+"""
+FIFO 批次匹配模块
+
+按证券将买入（open）与卖出（close）成交按先进先出配对，生成完整的交易回合（round trip），
+并找出没有对应持仓的卖出（例如回测开始前已有的持仓被卖出）。
+
+匹配按证券分组进行，组内全部使用数组运算，不逐笔维护持仓批次：
+1. 持仓数量在0处截断（与 position_value_visualization 的持仓还原一致），超出当前持仓的卖出数量为未匹配部分，
+   累计未匹配数量 U = max(0, max(-C))，其中 C 为买入减卖出的累计数量；
+2. 在累计数量轴上，第 j 笔买入占据区间 [B[j-1], B[j])，第 k 笔卖出的已匹配部分占据 [M[k-1], M[k])，
+   先进先出即两组区间的交集：合并两组区间端点后，每个相邻端点之间的片段对应一对 (买入, 卖出) 及其匹配数量。
+
+输入为按时间排序的订单列数组（格式同 OrderStore.load_columns），输出同样为列数组。
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .columnar_store import ORDER_ACTIONS
+
+# 交易回合列：买入/卖出订单在输入中的下标、证券ID、时间、匹配数量、价格、持有天数、分摊手续费与盈亏
+ROUND_TRIP_COLUMNS = {
+    "entry_index": np.int64,
+    "exit_index": np.int64,
+    "security": np.int32,
+    "entry_time": np.int64,
+    "exit_time": np.int64,
+    "quantity": np.float64,
+    "entry_price": np.float64,
+    "exit_price": np.float64,
+    "holding_days": np.int32,
+    "commission": np.float64,
+    "pnl": np.float64,
+}
+
+# 未匹配卖出列：订单下标、证券ID、时间、成交数量、未匹配数量、价格、手续费
+UNMATCHED_SELL_COLUMNS = {
+    "index": np.int64,
+    "security": np.int32,
+    "time": np.int64,
+    "filled": np.float64,
+    "unmatched": np.float64,
+    "price": np.float64,
+    "commission": np.float64,
+}
+
+
+def _concat_columns(parts: Dict[str, List[np.ndarray]], spec: Dict[str, type]) -> Dict[str, np.ndarray]:
+    """拼接各证券的结果，并按列定义转换类型"""
+    return {name: (np.concatenate(parts[name]) if parts[name] else np.zeros(0)).astype(dtype, copy=False)
+            for name, dtype in spec.items()}
+
+
+def _match_security(is_open: np.ndarray, filled: np.ndarray
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    匹配单个证券的买入与卖出
+
+    Args:
+        is_open: 是否为买入（按时间排序）
+        filled: 成交数量
+
+    Returns:
+        Tuple: (买入位置, 卖出位置, 匹配数量, 未匹配卖出位置, 未匹配数量)，位置为该证券订单序列中的下标
+    """
+    # 持仓在0处截断：累计未匹配卖出数量为 max(0, 累计净买入的最小值的相反数)
+    net = np.cumsum(np.where(is_open, filled, -filled))
+    unmatched_total = np.maximum.accumulate(np.maximum(-net, 0.0))
+    unmatched = np.diff(unmatched_total, prepend=0.0)
+    unmatched_positions = np.flatnonzero(unmatched > 0)
+
+    buys = np.flatnonzero(is_open)
+    sells = np.flatnonzero(~is_open)
+    buy_ends = np.cumsum(filled[buys])
+    sell_ends = np.cumsum(filled[sells] - unmatched[sells])
+
+    total = sell_ends[-1] if len(sell_ends) else 0.0
+    if total <= 0 or not len(buy_ends):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), unmatched_positions, unmatched[unmatched_positions]
+
+    # 两组区间端点合并后，相邻端点之间的片段即一次匹配；searchsorted 找到片段右端点所属的买入与卖出
+    points = np.unique(np.concatenate([buy_ends[buy_ends < total], sell_ends]))
+    points = points[points > 0]
+    quantities = np.diff(points, prepend=0.0)
+    buy_slot = np.searchsorted(buy_ends, points, side="left")
+    sell_slot = np.searchsorted(sell_ends, points, side="left")
+    return buys[buy_slot], sells[sell_slot], quantities, unmatched_positions, unmatched[unmatched_positions]
+
+
+def match_fifo_lots(columns: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    按证券先进先出匹配买入与卖出成交
+
+    同一笔买入或卖出被拆分到多个交易回合时，手续费按匹配数量占成交数量的比例分摊；
+    盈亏 = 匹配数量 × (卖出价 - 买入价) - 分摊手续费。未匹配卖出部分不计入交易回合。
+
+    Args:
+        columns: 按时间排序的订单列数组（time、security、action、filled、price、commission），
+                 格式同 OrderStore.load_columns
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]: (交易回合列数组, 未匹配卖出列数组)，
+        列定义见 ROUND_TRIP_COLUMNS 与 UNMATCHED_SELL_COLUMNS，按证券ID分组、组内按卖出时间排序
+    """
+    times = np.asarray(columns["time"])
+    security = np.asarray(columns["security"])
+    actions = np.asarray(columns["action"])
+    filled = np.asarray(columns["filled"], dtype=np.float64)
+    prices = np.asarray(columns["price"], dtype=np.float64)
+    commissions = np.asarray(columns["commission"], dtype=np.float64)
+
+    # 只处理有成交数量的买入与卖出；稳定排序保证组内仍按时间排序（证券ID可用16位表示时走基数排序）
+    valid = np.flatnonzero(((actions == ORDER_ACTIONS["open"]) | (actions == ORDER_ACTIONS["close"])) & (filled > 0))
+    keys = security[valid]
+    if len(keys) and keys.min() >= 0 and keys.max() <= np.iinfo(np.uint16).max:
+        keys = keys.astype(np.uint16)
+    order = valid[np.argsort(keys, kind="stable")]
+    grouped = security[order]
+    boundaries = np.flatnonzero(np.diff(grouped)) + 1
+    starts = np.concatenate([[0], boundaries]) if len(order) else np.zeros(0, dtype=np.int64)
+    ends = np.concatenate([boundaries, [len(order)]]) if len(order) else np.zeros(0, dtype=np.int64)
+    opens = actions[order] == ORDER_ACTIONS["open"]
+    # 按分组顺序取出各列，组内计算只访问连续的小数组
+    times, filled, prices, commissions = times[order], filled[order], prices[order], commissions[order]
+
+    trip_parts = {name: [] for name in ROUND_TRIP_COLUMNS}
+    unmatched_parts = {name: [] for name in UNMATCHED_SELL_COLUMNS}
+    for lo, hi in zip(starts.tolist(), ends.tolist()):
+        entry, exit_, quantity, unmatched_at, unmatched = _match_security(opens[lo:hi], filled[lo:hi])
+        entry += lo
+        exit_ += lo
+        unmatched_at += lo
+        commission = (commissions[entry] * quantity / filled[entry]
+                      + commissions[exit_] * quantity / filled[exit_])
+        trip_parts["entry_index"].append(order[entry])
+        trip_parts["exit_index"].append(order[exit_])
+        trip_parts["security"].append(np.full(len(entry), grouped[lo], dtype=np.int32))
+        trip_parts["entry_time"].append(times[entry])
+        trip_parts["exit_time"].append(times[exit_])
+        trip_parts["quantity"].append(quantity)
+        trip_parts["entry_price"].append(prices[entry])
+        trip_parts["exit_price"].append(prices[exit_])
+        trip_parts["holding_days"].append(times[exit_] // 86400 - times[entry] // 86400)
+        trip_parts["commission"].append(commission)
+        trip_parts["pnl"].append(quantity * (prices[exit_] - prices[entry]) - commission)
+
+        unmatched_parts["index"].append(order[unmatched_at])
+        unmatched_parts["security"].append(np.full(len(unmatched_at), grouped[lo], dtype=np.int32))
+        unmatched_parts["time"].append(times[unmatched_at])
+        unmatched_parts["filled"].append(filled[unmatched_at])
+        unmatched_parts["unmatched"].append(unmatched)
+        unmatched_parts["price"].append(prices[unmatched_at])
+        unmatched_parts["commission"].append(commissions[unmatched_at])
+
+    return _concat_columns(trip_parts, ROUND_TRIP_COLUMNS), _concat_columns(unmatched_parts, UNMATCHED_SELL_COLUMNS)
@@ -0,0 +1,351 @@
+"""
+区间统计模块
+
+对每条日收益率曲线预先计算前缀数组，之后任意日期区间的统计指标都只需少量数组运算：
+- 净值前缀积 growth[k] = (1 + r_0/100) × … × (1 + r_{k-1}/100)：区间总收益与年化收益 = growth[j] / growth[i]，O(1)
+- 日收益率（小数，减去全序列均值以减小相消误差）的前缀和与平方前缀和：区间样本标准差，O(1)，用于夏普比率
+- 最大回撤依赖区间内的峰值，无法由前缀数组得到，在累积净值的区间切片上用 np.maximum.accumulate 计算
+
+指标口径与对冲分析报告的统计指标一致：对区间内的日收益率和累积收益率切片调用 calculate_annualized_return、
+calculate_sharpe_ratio（3%无风险利率、252个交易日）和最大回撤计算的结果相同，保留位数也相同
+（statistics_mismatches 用于逐项核对，tests/test_range_statistics.py 在随机曲线和区间上核对 Python 与浏览器端两种实现）。
+
+RANGE_STATISTICS_JS 是同一算法的浏览器端实现，供静态报告在缩放时重新计算可见区间的指标。报告中已嵌入累积收益率，
+日收益率大多可由相邻两天的累积值还原，只需另外嵌入无法还原的少数日收益率（见 irregular_returns），
+前缀数组在页面加载时由浏览器计算，不必写入HTML。
+"""
+
+import math
+from datetime import date as Date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .report_encoding import normalize_date
+
+# 夏普比率使用的无风险利率（年化，百分比）和年交易日数，与 calculate_sharpe_ratio 的默认值一致
+RISK_FREE_RATE = 3.0
+TRADING_DAYS = 252
+
+# 统计表格的列：(字段, 表头)
+STATISTICS_COLUMNS = [
+    ('name', '名称'), ('type', '类型'), ('start_date', '开始日期'), ('end_date', '结束日期'),
+    ('total_return', '区间收益(%)'), ('annualized_return', '年化收益(%)'), ('annualized_volatility', '年化波动(%)'),
+    ('max_drawdown', '最大回撤(%)'), ('max_drawdown_start_date', '回撤开始'), ('max_drawdown_end_date', '回撤结束'),
+    ('sharpe_ratio', '夏普比率'), ('trading_days', '交易日数')
+]
+
+# 核对统计指标时允许的误差：保留位数的最后一位（四舍五入边界处的浮点误差），或很大的数值（如极短区间的夏普比率）的相对误差
+STATISTICS_TOLERANCES = {'total_return': 0.01, 'annualized_return': 0.01, 'max_drawdown': 0.01, 'sharpe_ratio': 0.0001}
+STATISTICS_EXACT_FIELDS = ['start_date', 'end_date', 'max_drawdown_start_date', 'max_drawdown_end_date', 'trading_days']
+
+
+def _ordinal(date_str: str) -> int:
+    """YYYYMMDD 或 YYYY-MM-DD 格式的日期转换为日序数"""
+    return Date.fromisoformat(normalize_date(date_str)).toordinal()
+
+
+class RangeSeries:
+    """一条日收益率曲线及其前缀数组"""
+
+    def __init__(self, name: str, series_type: str, dates: Sequence[str], daily_returns: Sequence[float],
+                 cumulative_returns: Optional[Sequence[float]] = None):
+        """
+        初始化曲线并计算前缀数组
+
+        Args:
+            name: 曲线名称
+            series_type: 曲线类型（backtest、hedge、index）
+            dates: 日期列表（YYYYMMDD 或 YYYY-MM-DD，升序）
+            daily_returns: 日收益率列表（百分比形式）
+            cumulative_returns: 累积收益率列表（百分比形式，可选，缺省时由日收益率连乘得到），用于计算最大回撤
+        """
+        self.name = name
+        self.type = series_type
+        self.dates = [normalize_date(date) for date in dates]
+        self.ordinals = np.array([_ordinal(date) for date in self.dates], dtype=np.int64)
+
+        returns = np.asarray(daily_returns, dtype=np.float64)
+        self.growth = np.concatenate([[1.0], np.cumprod(1.0 + returns / 100.0)])
+        if cumulative_returns is None:
+            self.values = 100.0 * self.growth[1:]
+        else:
+            self.values = 100.0 + np.asarray(cumulative_returns, dtype=np.float64)
+
+        decimals = returns / 100.0
+        centered = decimals - (decimals.mean() if len(decimals) else 0.0)
+        self.sum1 = np.concatenate([[0.0], np.cumsum(centered)])
+        self.sum2 = np.concatenate([[0.0], np.cumsum(centered * centered)])
+
+    def locate(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """
+        查找日期区间对应的下标范围
+
+        Args:
+            start: 开始日期（含，可选）
+            end: 结束日期（含，可选）
+
+        Returns:
+            Tuple[int, int]: 下标范围 [i, j)
+        """
+        i = int(np.searchsorted(self.ordinals, _ordinal(start), side="left")) if start else 0
+        j = int(np.searchsorted(self.ordinals, _ordinal(end), side="right")) if end else len(self.ordinals)
+        return i, max(i, j)
+
+    def statistics(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """
+        计算日期区间内的统计指标
+
+        Args:
+            start: 开始日期（含，可选，默认为曲线起点）
+            end: 结束日期（含，可选，默认为曲线终点）
+
+        Returns:
+            Dict: name、type、start_date、end_date、total_return、annualized_return、annualized_volatility、max_drawdown、
+                  max_drawdown_start_date、max_drawdown_end_date、sharpe_ratio、trading_days
+        """
+        i, j = self.locate(start, end)
+        n = j - i
+        result = {
+            'name': self.name,
+            'type': self.type,
+            'start_date': self.dates[i] if n else '',
+            'end_date': self.dates[j - 1] if n else '',
+            'total_return': 0.0,
+            'annualized_return': 0.0,
+            'annualized_volatility': 0.0,
+            'max_drawdown': 0.0,
+            'max_drawdown_start_date': '',
+            'max_drawdown_end_date': '',
+            'sharpe_ratio': 0.0,
+            'trading_days': n
+        }
+        if not n:
+            return result
+
+        # 总收益率与年化收益率（按首尾日期之间的自然日数年化，与 calculate_annualized_return 一致）
+        ratio = float(self.growth[j] / self.growth[i])
+        actual_days = int(self.ordinals[j - 1] - self.ordinals[i])
+        if actual_days <= 0:
+            actual_days = n
+        if ratio <= 0:
+            annualized_return = -100.0 if ratio == 0 else -((1 + (abs(ratio) ** (1 / actual_days) - 1)) ** 365 - 1) * 100
+        else:
+            annualized_return = ((1 + (ratio ** (1 / actual_days) - 1)) ** 365 - 1) * 100
+
+        # 夏普比率：区间日收益率的样本标准差由前缀和得到
+        sharpe_ratio = annualized_volatility = 0.0
+        if n > 1:
+            s1 = self.sum1[j] - self.sum1[i]
+            s2 = self.sum2[j] - self.sum2[i]
+            variance = max((s2 - s1 * s1 / n) / (n - 1), 0.0)
+            annualized_volatility = np.sqrt(variance) * (TRADING_DAYS ** 0.5) * 100
+            if annualized_volatility > 0:
+                sharpe_ratio = (annualized_return - RISK_FREE_RATE) / annualized_volatility
+
+        # 最大回撤：区间内累积净值相对此前峰值的最大跌幅，起点为最大回撤点之前最后一个峰值
+        values = self.values[i:j]
+        peak = np.maximum.accumulate(values)
+        drawdown = (values - peak) / peak
+        end_index = int(np.argmin(drawdown))
+        start_index = end_index - int(np.argmax(values[end_index::-1] == peak[end_index]))
+
+        result.update({
+            'total_return': round((ratio - 1) * 100, 2),
+            'annualized_return': round(annualized_return, 2),
+            'annualized_volatility': round(float(annualized_volatility), 2),
+            'max_drawdown': round(float(drawdown[end_index]) * 100, 2),
+            'max_drawdown_start_date': self.dates[i + start_index],
+            'max_drawdown_end_date': self.dates[i + end_index],
+            'sharpe_ratio': round(float(sharpe_ratio), 4)
+        })
+        return result
+
+
+def range_statistics(series_list: List[RangeSeries], start: Optional[str] = None,
+                     end: Optional[str] = None) -> List[Dict]:
+    """
+    计算多条曲线在同一日期区间内的统计指标
+
+    Args:
+        series_list: 曲线列表
+        start: 开始日期（含，可选）
+        end: 结束日期（含，可选）
+
+    Returns:
+        List[Dict]: 每条曲线的统计指标，格式见 RangeSeries.statistics
+    """
+    return [series.statistics(start, end) for series in series_list]
+
+
+def statistics_mismatches(expected: Dict, actual: Dict) -> List[str]:
+    """
+    逐项核对两组统计指标（如 calculate_statistics 的结果与 RangeSeries.statistics 的结果）
+
+    Args:
+        expected: 作为基准的统计指标（只核对其中存在的字段；单日区间的夏普比率 NaN 视为 0）
+        actual: 待核对的统计指标
+
+    Returns:
+        List[str]: 不一致的字段说明，一致时为空列表
+    """
+    mismatches = []
+    for field, tolerance in STATISTICS_TOLERANCES.items():
+        if field not in expected:
+            continue
+        value = 0.0 if math.isnan(expected[field]) else expected[field]
+        if not math.isclose(value, actual[field], rel_tol=1e-6, abs_tol=tolerance + 1e-9):
+            mismatches.append(f"{field}: {expected[field]} != {actual[field]}")
+    for field in STATISTICS_EXACT_FIELDS:
+        if field in expected and expected[field] != actual[field]:
+            mismatches.append(f"{field}: {expected[field]} != {actual[field]}")
+    return mismatches
+
+
+def irregular_returns(cumulative_returns: Sequence[float], daily_returns: Sequence[float]) -> List[List[float]]:
+    """
+    找出无法由相邻两天累积收益率还原的日收益率
+
+    第 k 天（k >= 1）的日收益率通常等于 (100 + C_k) / (100 + C_{k-1}) - 1；第一天以及数据源另行定义的日子
+    （如回测首日收益率记为0、指数首日累积收益率记为0但次日起包含首日收益）需要单独嵌入，浏览器端据此还原全部日收益率。
+
+    Args:
+        cumulative_returns: 累积收益率（百分比形式）
+        daily_returns: 日收益率（百分比形式，与累积收益率等长）
+
+    Returns:
+        List[List[float]]: [下标, 日收益率] 列表，总是包含第一天
+    """
+    cumulative = np.asarray(cumulative_returns, dtype=np.float64)
+    daily = np.asarray(daily_returns, dtype=np.float64)
+    if not len(daily):
+        return []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derived = ((100.0 + cumulative[1:]) / (100.0 + cumulative[:-1]) - 1.0) * 100.0
+    irregular = np.flatnonzero(~np.isclose(derived, daily[1:], rtol=1e-9, atol=1e-9)) + 1
+    return [[0, float(daily[0])]] + [[int(k), float(daily[k])] for k in irregular]
+
+
+# 浏览器端区间统计：buildRangeSeries 由共享日期轴上的一行累积收益率（缺失为 NaN）和 irregular_returns 的结果计算前缀数组，
+# rangeStatistics 计算 [startDay, endDay]（距1970-01-01的天数，含首尾）内的统计指标，口径与 RangeSeries.statistics 相同
+RANGE_STATISTICS_JS = """
+        function dayNumber(date) {
+            var parts = date.split('-');
+            return Date.UTC(+parts[0], parts[1] - 1, +parts[2]) / 86400000;
+        }
+
+        function buildRangeSeries(dates, values, irregularReturns) {
+            var positions = [];
+            for (var j = 0; j < values.length; j++) {
+                if (!isNaN(values[j])) {
+                    positions.push(j);
+                }
+            }
+            var n = positions.length;
+            var series = {
+                dates: positions.map(function(j) { return dates[j]; }),
+                days: new Float64Array(n),
+                values: new Float64Array(n),
+                growth: new Float64Array(n + 1),
+                sum1: new Float64Array(n + 1),
+                sum2: new Float64Array(n + 1)
+            };
+            var returns = new Float64Array(n);
+            for (var k = 0; k < n; k++) {
+                series.days[k] = dayNumber(series.dates[k]);
+                series.values[k] = 100 + values[positions[k]];
+                returns[k] = k ? series.values[k] / series.values[k - 1] - 1 : 0;
+            }
+            irregularReturns.forEach(function(item) {
+                returns[item[0]] = item[1] / 100;
+            });
+            var mean = 0;
+            series.growth[0] = 1;
+            for (var k = 0; k < n; k++) {
+                series.growth[k + 1] = series.growth[k] * (1 + returns[k]);
+                mean += returns[k];
+            }
+            mean = n ? mean / n : 0;
+            for (var k = 0; k < n; k++) {
+                var centered = returns[k] - mean;
+                series.sum1[k + 1] = series.sum1[k] + centered;
+                series.sum2[k + 1] = series.sum2[k] + centered * centered;
+            }
+            return series;
+        }
+
+        function roundTo(value, digits) {
+            var scale = Math.pow(10, digits);
+            return Math.round(value * scale) / scale;
+        }
+
+        function rangeStatistics(series, startDay, endDay) {
+            // 二分查找 [i, j)
+            function bound(day, upper) {
+                var lo = 0, hi = series.days.length;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1;
+                    if (series.days[mid] < day || (upper && series.days[mid] === day)) {
+                        lo = mid + 1;
+                    } else {
+                        hi = mid;
+                    }
+                }
+                return lo;
+            }
+            var i = bound(startDay, false), j = Math.max(i, bound(endDay, true)), n = j - i;
+            var result = {
+                start_date: n ? series.dates[i] : '', end_date: n ? series.dates[j - 1] : '',
+                total_return: 0, annualized_return: 0, annualized_volatility: 0, max_drawdown: 0,
+                max_drawdown_start_date: '', max_drawdown_end_date: '', sharpe_ratio: 0, trading_days: n
+            };
+            if (!n) {
+                return result;
+            }
+
+            var ratio = series.growth[j] / series.growth[i];
+            var actualDays = series.days[j - 1] - series.days[i];
+            if (actualDays <= 0) {
+                actualDays = n;
+            }
+            var annualized;
+            if (ratio <= 0) {
+                annualized = ratio === 0 ? -100 : -(Math.pow(1 + (Math.pow(Math.abs(ratio), 1 / actualDays) - 1), 365) - 1) * 100;
+            } else {
+                annualized = (Math.pow(1 + (Math.pow(ratio, 1 / actualDays) - 1), 365) - 1) * 100;
+            }
+
+            var sharpe = 0, volatility = 0;
+            if (n > 1) {
+                var s1 = series.sum1[j] - series.sum1[i], s2 = series.sum2[j] - series.sum2[i];
+                volatility = Math.sqrt(Math.max((s2 - s1 * s1 / n) / (n - 1), 0)) * Math.sqrt(""" + str(TRADING_DAYS) + """) * 100;
+                if (volatility > 0) {
+                    sharpe = (annualized - """ + str(RISK_FREE_RATE) + """) / volatility;
+                }
+            }
+
+            // 最大回撤：区间内相对此前峰值的最大跌幅，起点为最大回撤点之前最后一个峰值
+            var peak = -Infinity, peakIndex = i, worst = Infinity, worstStart = i, worstEnd = i;
+            for (var k = i; k < j; k++) {
+                if (series.values[k] >= peak) {
+                    peak = series.values[k];
+                    peakIndex = k;
+                }
+                var drawdown = (series.values[k] - peak) / peak;
+                if (drawdown < worst) {
+                    worst = drawdown;
+                    worstStart = peakIndex;
+                    worstEnd = k;
+                }
+            }
+
+            result.total_return = roundTo((ratio - 1) * 100, 2);
+            result.annualized_return = roundTo(annualized, 2);
+            result.annualized_volatility = roundTo(volatility, 2);
+            result.max_drawdown = roundTo(worst * 100, 2);
+            result.max_drawdown_start_date = series.dates[worstStart];
+            result.max_drawdown_end_date = series.dates[worstEnd];
+            result.sharpe_ratio = roundTo(sharpe, 4);
+            return result;
+        }
+"""
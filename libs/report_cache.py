@@ -0,0 +1,181 @@
+"""
+报告增量缓存模块
+
+报告脚本将每条曲线（回测、指数）的计算结果作为 JSON 产物保存在缓存目录中，并在清单（manifest.json）里记录：
+1. 输入文件的内容哈希（SHA-256），同时记录文件大小和修改时间，两者未变时直接沿用记录的哈希，不重新读取文件；
+2. 每个产物的签名（由输入文件哈希、计算参数等组成），再次运行时签名一致即可直接复用产物，不一致时重新计算。
+
+归档成员路径（"<归档路径>::<成员名>"）按整个归档文件计算哈希。
+产物中的 numpy 数组和标量写出为普通列表和数值，读取时由调用方按需转换。
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .archive_reader import split_member_path
+
+# 缓存清单文件名
+CACHE_MANIFEST = "manifest.json"
+
+# 清单格式版本，格式变化时整个缓存失效
+MANIFEST_VERSION = 1
+
+# 计算文件哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """
+    计算文件内容的 SHA-256 哈希
+
+    Args:
+        path: 文件路径或归档成员路径（按整个归档文件计算）
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    with open(split_member_path(path)[0], "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_json(value: Any) -> Any:
+    """json.dump 的 default：numpy 数组和标量转换为 Python 对象"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class ReportCache:
+    """基于内容哈希清单的报告产物缓存"""
+
+    def __init__(self, cache_dir: str, read: bool = True):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录（清单和产物都保存在该目录下）
+            read: 是否读取已有产物；为 False 时全部重新计算，但仍会写入新的产物和清单
+        """
+        self.cache_dir = str(cache_dir)
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self._used_files = set()
+        self.manifest = {"version": MANIFEST_VERSION, "files": {}, "artifacts": {}}
+
+        manifest_file = os.path.join(self.cache_dir, CACHE_MANIFEST)
+        if os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest.get("version") == MANIFEST_VERSION:
+                    self.manifest = manifest
+            except (OSError, ValueError) as e:
+                print(f"警告: 读取缓存清单失败，将重新生成: {e}")
+
+    def file_digest(self, path: Optional[str]) -> Optional[str]:
+        """
+        获取输入文件的内容哈希（文件大小和修改时间未变时沿用清单中的记录）
+
+        Args:
+            path: 文件路径或归档成员路径，为空时返回 None
+
+        Returns:
+            Optional[str]: 十六进制哈希值
+        """
+        if not path:
+            return None
+        file_path = os.path.abspath(split_member_path(path)[0])
+        self._used_files.add(file_path)
+        stat = os.stat(file_path)
+        entry = self.manifest["files"].get(file_path)
+        if not entry or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(file_path)}
+            self.manifest["files"][file_path] = entry
+        return entry["sha256"]
+
+    def _artifact_path(self, group: str, key: str) -> str:
+        """产物文件路径：按键的哈希命名，避免键中的特殊字符"""
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, group, f"{name}.json")
+
+    def load(self, group: str, key: str, signature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        读取签名一致的产物
+
+        Args:
+            group: 产物分组（如 backtests、indices）
+            key: 产物键（如回测名称）
+            signature: 产物签名，须可 JSON 序列化
+
+        Returns:
+            Optional[Dict]: 产物内容；未缓存、签名不一致或读取失败时返回 None
+        """
+        entry = self.manifest["artifacts"].get(group, {}).get(key)
+        if self.read and entry and entry["signature"] == json.loads(json.dumps(signature)):
+            try:
+                with open(self._artifact_path(group, key), "r", encoding="utf-8") as f:
+                    artifact = json.load(f)
+                self.hits += 1
+                return artifact
+            except (OSError, ValueError):
+                pass
+        self.misses += 1
+        return None
+
+    def store(self, group: str, key: str, signature: Dict[str, Any], artifact: Dict[str, Any]):
+        """
+        保存产物并在清单中记录签名
+
+        Args:
+            group: 产物分组
+            key: 产物键
+            signature: 产物签名
+            artifact: 产物内容（可包含 numpy 数组和标量）
+        """
+        artifact_file = self._artifact_path(group, key)
+        os.makedirs(os.path.dirname(artifact_file), exist_ok=True)
+        temp_file = f"{artifact_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, default=_to_json)
+        os.replace(temp_file, artifact_file)
+        self.manifest["artifacts"].setdefault(group, {})[key] = {
+            "signature": json.loads(json.dumps(signature)),
+            "artifact": os.path.relpath(artifact_file, self.cache_dir),
+        }
+
+    def prune(self, group: str, keys: Iterable[str]):
+        """
+        删除分组中不在 keys 里的产物（例如输入目录中已移除的回测）
+
+        Args:
+            group: 产物分组
+            keys: 需要保留的产物键
+        """
+        keep = set(keys)
+        entries = self.manifest["artifacts"].get(group, {})
+        for key in [key for key in entries if key not in keep]:
+            artifact_file = self._artifact_path(group, key)
+            if os.path.exists(artifact_file):
+                os.remove(artifact_file)
+            del entries[key]
+
+    def save(self):
+        """写出缓存清单（只保留本次运行用到的输入文件记录）"""
+        self.manifest["files"] = {path: entry for path, entry in self.manifest["files"].items()
+                                  if path in self._used_files}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        manifest_file = os.path.join(self.cache_dir, CACHE_MANIFEST)
+        temp_file = f"{manifest_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, manifest_file)
@@ -0,0 +1,197 @@
+"""
+报告数据编码模块
+
+生成的HTML报告中，每条曲线原本以 [日期, 数值] 点对的形式逐点嵌入，日期字符串在每条曲线中重复出现。
+本模块将多条曲线对齐到一条共享的日期轴上：日期只写一次，每条曲线只写与日期轴对齐的数值数组（缺失处为NaN）。
+
+可选的压缩编码将日期轴（距1970-01-01天数的差分）、数值（float32，按字节分面重排）和降采样下标（int32 差分）
+依次拼接为二进制，gzip 压缩后以 base64 嵌入，由浏览器的 DecompressionStream 解压
+（float32 约7位有效数字，足够绘图和提示框显示；相邻数值的同一字节放在一起，gzip 压缩率更高）。
+PAYLOAD_DECODER_JS 提供浏览器端的解码函数，两种编码解码后的结构相同。
+"""
+
+import base64
+import gzip
+import json
+from datetime import date as Date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_date(date: str) -> str:
+    """
+    将 YYYYMMDD 格式的日期转换为 YYYY-MM-DD，其他格式保持不变
+
+    Args:
+        date: 日期字符串
+
+    Returns:
+        str: YYYY-MM-DD 格式的日期
+    """
+    if len(date) == 8 and date.isdigit():
+        return f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+    return date
+
+
+def align_series(series_dates: Sequence[Sequence[str]], series_values: Sequence[Sequence[float]]
+                 ) -> Tuple[List[str], np.ndarray]:
+    """
+    将多条曲线对齐到共享日期轴
+
+    Args:
+        series_dates: 每条曲线的日期列表（YYYYMMDD 或 YYYY-MM-DD，空字符串的点被忽略）
+        series_values: 每条曲线的数值列表（None 视为缺失）
+
+    Returns:
+        Tuple[List[str], np.ndarray]: (升序的共享日期轴 YYYY-MM-DD, 形状为 (曲线数, 日期数) 的 float64 数值矩阵，缺失处为NaN)
+    """
+    normalized = [[normalize_date(date) for date in dates] for dates in series_dates]
+    axis = sorted({date for dates in normalized for date in dates if date})
+    position = {date: i for i, date in enumerate(axis)}
+
+    values = np.full((len(normalized), len(axis)), np.nan)
+    for row, (dates, series) in enumerate(zip(normalized, series_values)):
+        pairs = [(position[date], np.nan if value is None else value)
+                 for date, value in zip(dates, series) if date]
+        if pairs:
+            columns, data = zip(*pairs)
+            values[row, list(columns)] = data
+    return axis, values
+
+
+def encode_series_payload(dates: List[str], values: np.ndarray,
+                          levels: Optional[List[List[np.ndarray]]] = None, compress: bool = False) -> Dict:
+    """
+    编码嵌入HTML的曲线数据
+
+    Args:
+        dates: 共享日期轴
+        values: align_series 返回的数值矩阵
+        levels: 每条曲线各降采样级别在日期轴上的下标（可选，见 libs.downsampling.lttb_zoom_levels）
+        compress: 是否使用 gzip+base64 压缩编码
+
+    Returns:
+        Dict: 可直接 json.dumps 的数据，不压缩时包含 dates/values/levels；
+              压缩时包含 shape/level_sizes/blob，日期无法解析为 YYYY-MM-DD 时另含 dates（不写入 blob）
+    """
+    levels = levels if levels is not None else [[] for _ in range(len(values))]
+    if not compress:
+        # JSON 不支持 NaN，缺失值写为 null
+        return {
+            'dates': dates,
+            'values': [[None if np.isnan(value) else value for value in row] for row in values.tolist()],
+            'levels': [[level.tolist() for level in series_levels] for series_levels in levels],
+        }
+
+    payload = {'shape': list(values.shape),
+               'level_sizes': [[len(level) for level in series_levels] for series_levels in levels]}
+    epoch = Date(1970, 1, 1).toordinal()
+    try:
+        days = np.array([Date.fromisoformat(date).toordinal() - epoch for date in dates], dtype=np.int64)
+        parts = [np.diff(days, prepend=0).astype('<i4').tobytes()]
+    except ValueError:
+        payload['dates'] = dates
+        parts = []
+    # float32 的4个字节分面存放：先全部第0字节，再全部第1字节……
+    parts.append(values.astype('<f4').reshape(-1).view(np.uint8).reshape(-1, 4).T.tobytes())
+    # 降采样下标升序，差分后多为很小的整数，压缩率更高
+    parts.extend(np.diff(level, prepend=0).astype('<i4').tobytes()
+                 for series_levels in levels for level in series_levels)
+    payload['blob'] = base64.b64encode(gzip.compress(b''.join(parts), compresslevel=9, mtime=0)).decode('ascii')
+    return payload
+
+
+def legacy_payload_size(dates: List[str], values: np.ndarray) -> int:
+    """
+    估算逐点嵌入 [日期, 数值] 点对时的数据大小，用于报告压缩效果
+
+    Args:
+        dates: 共享日期轴
+        values: align_series 返回的数值矩阵
+
+    Returns:
+        int: 所有曲线的有效点按点对编码后的字节数
+    """
+    total = 0
+    for row in values.tolist():
+        total += len(json.dumps([[date, value] for date, value in zip(dates, row) if value == value],
+                                ensure_ascii=False).encode('utf-8'))
+    return total
+
+
+# 浏览器端解码函数：返回 Promise，结果为 {dates, values: [数组], levels: [[下标数组]]}，缺失值为 NaN；
+# seriesPoints 将一条曲线（或其某个降采样级别）还原为 ECharts 的 [日期, 数值] 点对，跳过缺失值
+PAYLOAD_DECODER_JS = """
+        function decodeSeriesPayload(payload) {
+            if (!payload.blob) {
+                return Promise.resolve({
+                    dates: payload.dates,
+                    values: payload.values.map(function(row) {
+                        return row.map(function(value) { return value === null ? NaN : value; });
+                    }),
+                    levels: payload.levels
+                });
+            }
+            var binary = atob(payload.blob);
+            var bytes = new Uint8Array(binary.length);
+            for (var i = 0; i < binary.length; i++) {
+                bytes[i] = binary.charCodeAt(i);
+            }
+            var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            // 还原差分编码的 int32 数组
+            function cumulate(array) {
+                for (var k = 1; k < array.length; k++) {
+                    array[k] += array[k - 1];
+                }
+                return array;
+            }
+            return new Response(stream).arrayBuffer().then(function(buffer) {
+                var rows = payload.shape[0], columns = payload.shape[1];
+                var offset = 0;
+                var dates = payload.dates;
+                if (!dates) {
+                    var days = cumulate(new Int32Array(buffer, 0, columns));
+                    dates = Array.prototype.map.call(days, function(day) {
+                        return new Date(day * 86400000).toISOString().slice(0, 10);
+                    });
+                    offset = columns * 4;
+                }
+                // 字节分面还原为 float32
+                var count = rows * columns;
+                var planes = new Uint8Array(buffer, offset, count * 4);
+                var bytes = new Uint8Array(count * 4);
+                for (var b = 0; b < 4; b++) {
+                    for (var i = 0; i < count; i++) {
+                        bytes[i * 4 + b] = planes[b * count + i];
+                    }
+                }
+                var floats = new Float32Array(bytes.buffer);
+                var values = [];
+                for (var r = 0; r < rows; r++) {
+                    values.push(floats.subarray(r * columns, (r + 1) * columns));
+                }
+                offset += count * 4;
+                var levels = payload.level_sizes.map(function(sizes) {
+                    return sizes.map(function(size) {
+                        var level = cumulate(new Int32Array(buffer, offset, size));
+                        offset += size * 4;
+                        return level;
+                    });
+                });
+                return {dates: dates, values: values, levels: levels};
+            });
+        }
+
+        function seriesPoints(dates, values, positions) {
+            var points = [];
+            var count = positions ? positions.length : values.length;
+            for (var k = 0; k < count; k++) {
+                var j = positions ? positions[k] : k;
+                if (!isNaN(values[j])) {
+                    points.push([dates[j], values[j]]);
+                }
+            }
+            return points;
+        }
+"""
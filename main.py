@@ -11,6 +11,14 @@
 - position_ratio_visualization: 持仓比例可视化（绘制多个回测的持仓比例曲线）
 - cumulative_returns_comparison: 累积收益曲线对比分析
 - back_test_downloader: 从聚宽下载回测数据
+- batch_back_test_downloader: 并发批量下载多个回测数据（共享连接池并限流）
+- fake_joinquant_server: 本地模拟聚宽回测接口（离线调试与性能测试）
+- benchmark_downloader: 使用模拟服务器测试下载器吞吐量
+- benchmark_archive_reads: 对比归档流式读取与解压后读取的吞吐量
+- build_columnar_store: 将持仓详情/订单转换为按年分区的列式存储、构建收盘价面板并查询
+- round_trip_analysis: 按证券先进先出匹配买卖成交，输出交易回合与未匹配卖出
+- report_server（别名 serve）: 本地报告服务，按请求计算任意日期区间的统计指标
+- install_echarts: 安装 ECharts 到 output/assets/，供所有报告离线加载
 - cleanup: 清理项目中的临时文件和测试脚本
 
 使用方法:
@@ -32,6 +40,22 @@
     python main.py cumulative_returns_comparison
     
     python main.py back_test_downloader
+    
+    python main.py batch_back_test_downloader --ids-file backtest_ids.txt --workers 4 --rps 5
+    
+    python main.py fake_joinquant_server --port 8765 --latency 0.05 --failure-rate 0.02
+    
+    python main.py benchmark_downloader --backtests 8 --pages 5 --workers 4
+    
+    python main.py benchmark_archive_reads --input_dir backtest_data/ex_tm1_top30
+    
+    python main.py build_columnar_store --input backtest_data/xxx_position_details_<id>.jsonl --date 2020-03-02
+    
+    python main.py round_trip_analysis --input backtest_data/xxx_orders_<id>.orders
+    
+    python main.py serve --input_dir backtest_data/ex_tm1_top30 --index zz500
+    
+    python main.py install_echarts
 """
 
 import os
@@ -43,6 +67,11 @@ import importlib
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
+# 命令别名：别名 -> 脚本名
+COMMAND_ALIASES = {
+    'serve': 'report_server',
+}
+
 
 def run_script(script_name, args):
     """运行指定的脚本"""
@@ -88,12 +117,20 @@ def main():
         print("  position_ratio_visualization - 持仓比例可视化（绘制多个回测的持仓比例曲线）")
         print("  cumulative_returns_comparison - 累积收益曲线对比分析")
         print("  back_test_downloader - 从聚宽下载回测数据")
+        print("  batch_back_test_downloader - 并发批量下载多个回测数据（共享连接池并限流）")
+        print("  fake_joinquant_server - 本地模拟聚宽回测接口（离线调试与性能测试）")
+        print("  benchmark_downloader - 使用模拟服务器测试下载器吞吐量")
+        print("  benchmark_archive_reads - 对比归档流式读取与解压后读取的吞吐量")
+        print("  build_columnar_store - 将持仓详情/订单转换为按年分区的列式存储、构建收盘价面板并查询")
+        print("  round_trip_analysis - 按证券先进先出匹配买卖成交，输出交易回合与未匹配卖出")
+        print("  report_server (serve) - 本地报告服务，按请求计算任意日期区间的统计指标")
+        print("  install_echarts - 安装 ECharts 到 output/assets/，供所有报告离线加载")
         print("  cleanup - 清理项目中的临时文件和测试脚本")
         print("\n使用 'python main.py <功能名称> --help' 查看具体功能的详细帮助信息")
         return
     
     # 获取命令和参数
-    command = sys.argv[1]
+    command = COMMAND_ALIASES.get(sys.argv[1], sys.argv[1])
     args = sys.argv[2:] if len(sys.argv) > 2 else []
     
     # 运行指定的脚本
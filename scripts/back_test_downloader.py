@@ -5,12 +5,16 @@ JoinQuant回测数据下载器
 基于提供的curl命令开发，用于下载指定backtestId的回测结果数据
 支持自动迭代offset获取完整数据，保存benchmark、gains、orders、overallReturn字段
 支持按日期转换数据，从config.yaml读取认证信息
+支持 --update 增量更新已有的日线文件（模拟盘每日增长的回测）
 """
 
 import requests
 import json
 import argparse
 import os
+import shutil
+import threading
+import time
 import yaml
 from datetime import datetime
 from pathlib import Path
@@ -18,15 +22,76 @@ from typing import Dict, Any, Optional, List, Tuple
 from collections import defaultdict
 import re
 from bs4 import BeautifulSoup
+from urllib.parse import urlparse
+
+
+# 需要退避重试的HTTP状态码（限流与服务端错误）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HostRateLimiter:
+    """按主机限流器：多个线程共享同一个请求速率预算"""
+    
+    def __init__(self, requests_per_second: float):
+        """
+        初始化限流器
+        
+        Args:
+            requests_per_second: 每个主机每秒允许的请求数，<=0 表示不限流
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = defaultdict(float)
+        self._lock = threading.Lock()
+    
+    def acquire(self, url: str):
+        """
+        为一次请求申请发送时间槽，必要时阻塞等待
+        
+        Args:
+            url: 请求URL（按其主机名限流）
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot[host])
+            self._next_slot[host] = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+    
+    def backoff(self, url: str, delay: float):
+        """
+        推迟该主机后续所有请求（收到429/5xx时调用），并等待退避结束
+        
+        Args:
+            url: 请求URL
+            delay: 退避秒数
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            self._next_slot[host] = max(self._next_slot[host], time.monotonic() + delay)
+        time.sleep(delay)
 
 
 class BacktestDataDownloader:
     """JoinQuant回测数据下载器"""
     
-    def __init__(self, config_path: str = "config.yaml", source_note: str = ""):
+    def __init__(self, config_path: str = "config.yaml", source_note: str = "",
+                 session: Optional[requests.Session] = None,
+                 rate_limiter: Optional['HostRateLimiter'] = None,
+                 max_retries: int = 3, retry_backoff: float = 1.0):
         self.base_url = "https://www.joinquant.com/algorithm/backtest/result"
         self.detail_url = "https://www.joinquant.com/algorithm/backtest/detail"
-        self.session = requests.Session()
+        # 批量下载时由调用方传入共享的连接池Session
+        self.session = session if session is not None else requests.Session()
+        
+        # 请求限流与重试配置
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        
+        # 请求统计（用于吞吐量汇总）
+        self.stats = {'pages': 0, 'bytes': 0, 'retries': 0}
         
         # 数据来源备注
         self.source_note = source_note
@@ -72,6 +137,9 @@ class BacktestDataDownloader:
         # 目标字段配置 - 保存所有四个字段
         self.target_fields = ['benchmark', 'gains', 'orders', 'overallReturn']
         
+        # API分页大小（每次请求offset递增的步长）
+        self.page_size = 1000
+        
         # 加载配置
         self.config = self.load_config(config_path)
         self.cookies = {}
@@ -175,6 +243,8 @@ class BacktestDataDownloader:
                     detail_cookies[key] = value
             
             # 发送GET请求获取详情页面
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(detail_url)
             response = self.session.get(
                 detail_url,
                 headers=self.detail_headers,
@@ -294,35 +364,87 @@ class BacktestDataDownloader:
             'token': self.token
         }
         
-        try:
-            # 更新Referer
-            self.headers['Referer'] = f'https://www.joinquant.com/algorithm/backtest/detail?backtestId={backtest_id}'
-            
-            # 发送请求
-            response = self.session.post(
-                self.base_url,
-                params=params,
-                data=post_data,
-                headers=self.headers,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            
-            # 解析JSON响应
-            data = response.json()
-            
-            print(f"Offset {offset}: 请求成功，状态码: {response.status_code}")
-            
-            return data
+        # 更新Referer
+        self.headers['Referer'] = f'https://www.joinquant.com/algorithm/backtest/detail?backtestId={backtest_id}'
+        
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self.base_url)
+            
+            try:
+                # 发送请求
+                response = self.session.post(
+                    self.base_url,
+                    params=params,
+                    data=post_data,
+                    headers=self.headers,
+                    timeout=30
+                )
+            except requests.exceptions.RequestException as e:
+                if attempt < self.max_retries:
+                    delay = self.retry_backoff * (2 ** attempt)
+                    print(f"Offset {offset}: 请求失败: {e}，{delay:.1f} 秒后重试 ({attempt + 1}/{self.max_retries})")
+                    self.stats['retries'] += 1
+                    self._wait_before_retry(delay)
+                    continue
+                print(f"Offset {offset}: 请求失败: {e}")
+                return None
+            
+            # 限流或服务端错误：退避后重试
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = self._get_retry_delay(response, attempt)
+                print(f"Offset {offset}: 状态码 {response.status_code}，{delay:.1f} 秒后重试 ({attempt + 1}/{self.max_retries})")
+                self.stats['retries'] += 1
+                self._wait_before_retry(delay)
+                continue
+            
+            try:
+                response.raise_for_status()
+                
+                # 解析JSON响应
+                data = response.json()
+                
+                self.stats['pages'] += 1
+                self.stats['bytes'] += len(response.content)
+                print(f"Offset {offset}: 请求成功，状态码: {response.status_code}")
+                
+                return data
+                
+            except json.JSONDecodeError as e:
+                print(f"Offset {offset}: JSON解析失败: {e}")
+                print(f"响应内容: {response.text[:500]}...")
+                return None
+            except requests.exceptions.RequestException as e:
+                print(f"Offset {offset}: 请求失败: {e}")
+                return None
+        
+        return None
+    
+    def _get_retry_delay(self, response: 'requests.Response', attempt: int) -> float:
+        """
+        计算重试等待时间，优先使用服务端返回的Retry-After
+        
+        Args:
+            response: HTTP响应
+            attempt: 当前重试次数（从0开始）
             
-        except requests.exceptions.RequestException as e:
-            print(f"Offset {offset}: 请求失败: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"Offset {offset}: JSON解析失败: {e}")
-            print(f"响应内容: {response.text[:500]}...")
-            return None
+        Returns:
+            等待秒数
+        """
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        return self.retry_backoff * (2 ** attempt)
+    
+    def _wait_before_retry(self, delay: float):
+        """等待重试；使用共享限流器时，退避会作用于同一主机的所有请求"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.backoff(self.base_url, delay)
+        else:
+            time.sleep(delay)
     
     def extract_target_data(self, data: Dict[Any, Any]) -> Dict[str, Any]:
         """
@@ -543,7 +665,7 @@ class BacktestDataDownloader:
                 break
             
             # 增加offset继续下一批
-            current_offset += 1000  # 根据API的分页大小调整
+            current_offset += self.page_size
         
         print(f"\n=== 下载完成 ===")
         print(f"总共下载了 {len(all_data)} 个批次的数据")
@@ -600,6 +722,23 @@ class BacktestDataDownloader:
             current_date = datetime.now().strftime("%Y%m%d")
             return current_date, current_date
     
+    def get_output_dir(self) -> Path:
+        """
+        获取数据输出目录（不存在时自动创建）
+        
+        Returns:
+            输出目录路径
+        """
+        if self.data_dir.startswith('/'):
+            # 绝对路径
+            output_dir = Path(self.data_dir)
+        else:
+            # 相对路径，相对于脚本目录的上级目录
+            output_dir = Path(__file__).parent.parent / self.data_dir
+        
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+    
     def save_to_jsonl(self, all_data: List[Dict[str, Any]], backtest_id: str) -> str:
         """
         将数据保存为JSONL格式（新的命名规则，包含回测名称）
@@ -612,15 +751,7 @@ class BacktestDataDownloader:
             保存的文件路径
         """
         # 确保数据目录存在
-        script_dir = Path(__file__).parent
-        if self.data_dir.startswith('/'):
-            # 绝对路径
-            output_dir = Path(self.data_dir)
-        else:
-            # 相对路径，相对于脚本目录的上级目录
-            output_dir = script_dir.parent / self.data_dir
-        
-        output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = self.get_output_dir()
         
         # 获取回测名称
         backtest_name = self.get_backtest_name(backtest_id)
@@ -664,6 +795,45 @@ class BacktestDataDownloader:
         print(f"数据已保存到: {filepath}")
         return str(filepath)
     
+    def build_daily_record(self, date_key: str, day_group: Dict[str, List[Dict[str, Any]]],
+                           backtest_id: str, backtest_name: str) -> Dict[str, Any]:
+        """
+        构建单个日期的日线数据行
+        
+        Args:
+            date_key: 日期（YYYYMMDD）
+            day_group: 该日期下各字段的数据点
+            backtest_id: 回测ID
+            backtest_name: 回测名称
+            
+        Returns:
+            日线数据行（data为空表示当日无数据）
+        """
+        daily_data = {
+            'type': 'daily_data',
+            'date': date_key,
+            'data': {}
+        }
+        
+        # 为每个字段收集当日数据
+        for field in self.target_fields:
+            if field in day_group and day_group[field]:
+                daily_data['data'][field] = {
+                    'count': len(day_group[field]),
+                    'records': day_group[field]
+                }
+        
+        # 添加元数据
+        daily_data['metadata'] = {
+            'backtest_id': backtest_id,
+            'backtest_name': backtest_name,
+            'download_time': datetime.now().isoformat(),
+            'source_note': self.source_note,
+            'data_fields': self.target_fields
+        }
+        
+        return daily_data
+    
     def save_daily_data_directly(self, all_data: List[Dict[str, Any]], backtest_id: str) -> str:
         """
         直接将数据转换为日线格式并保存，不保存原始文件
@@ -676,15 +846,7 @@ class BacktestDataDownloader:
             保存的日线文件路径
         """
         # 确保数据目录存在
-        script_dir = Path(__file__).parent
-        if self.data_dir.startswith('/'):
-            # 绝对路径
-            output_dir = Path(self.data_dir)
-        else:
-            # 相对路径，相对于脚本目录的上级目录
-            output_dir = script_dir.parent / self.data_dir
-        
-        output_dir.mkdir(parents=True, exist_ok=True)
+        output_dir = self.get_output_dir()
         
         # 提取数据时间范围
         earliest_date, latest_date = self.extract_time_range(all_data)
@@ -719,28 +881,7 @@ class BacktestDataDownloader:
         with open(filepath, 'w', encoding='utf-8') as f:
             # 直接写入每日数据，不保存元数据
             for date_key in sorted(date_groups.keys()):
-                daily_data = {
-                    'type': 'daily_data',
-                    'date': date_key,
-                    'data': {}
-                }
-                
-                # 为每个字段收集当日数据
-                for field in self.target_fields:
-                    if field in date_groups[date_key] and date_groups[date_key][field]:
-                        daily_data['data'][field] = {
-                            'count': len(date_groups[date_key][field]),
-                            'records': date_groups[date_key][field]
-                        }
-                
-                # 添加元数据
-                daily_data['metadata'] = {
-                    'backtest_id': backtest_id,
-                    'backtest_name': backtest_name,
-                    'download_time': datetime.now().isoformat(),
-                    'source_note': self.source_note,
-                    'data_fields': self.target_fields
-                }
+                daily_data = self.build_daily_record(date_key, date_groups[date_key], backtest_id, backtest_name)
                 
                 # 只写入有数据的日期
                 if daily_data['data']:
@@ -749,6 +890,167 @@ class BacktestDataDownloader:
         print(f"日线数据已保存到: {filepath}")
         return str(filepath)
 
+    def find_existing_daily_file(self, backtest_id: str) -> Optional[Path]:
+        """
+        查找数据目录中该回测已保存的日线文件
+
+        Args:
+            backtest_id: 回测ID
+
+        Returns:
+            日线文件路径，存在多个时返回结束日期最晚的一个；不存在返回None
+        """
+        output_dir = self.get_output_dir()
+        candidates = [p for p in output_dir.glob(f"*_{backtest_id}_*_daily.jsonl") if p.is_file()]
+        if not candidates:
+            return None
+
+        def _end_date(path: Path) -> str:
+            date_range = parse_daily_filename(path.name, backtest_id)
+            return date_range[2] if date_range else ''
+
+        return max(candidates, key=_end_date)
+
+    def read_daily_file_state(self, filepath: Path) -> Tuple[str, int]:
+        """
+        读取已有日线文件的最后日期和日期行数
+
+        Args:
+            filepath: 日线文件路径
+
+        Returns:
+            (last_date, line_count)，last_date 格式为 YYYYMMDD
+        """
+        last_date = ''
+        line_count = 0
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if item.get('type') == 'daily_data':
+                    line_count += 1
+                    date_key = item.get('date', '')
+                    if date_key > last_date:
+                        last_date = date_key
+        return last_date, line_count
+
+    def update_daily_data(self, backtest_id: str, user_record_offset: int = 0) -> Optional[str]:
+        """
+        增量更新已有的日线数据文件（适用于每日增长的模拟盘回测）
+
+        只下载最后一个已保存日期之后的分页，把新日期追加到文件末尾；
+        先写临时文件再重命名，保证任何时刻磁盘上都是完整的文件，
+        同时更新文件名中的日期范围。
+
+        Args:
+            backtest_id: 回测ID
+            user_record_offset: 用户记录偏移量
+
+        Returns:
+            更新后的日线文件路径；没有已有文件时返回None
+        """
+        existing_file = self.find_existing_daily_file(backtest_id)
+        if existing_file is None:
+            print(f"未找到回测 {backtest_id} 已有的日线文件，无法增量更新")
+            return None
+
+        last_date, line_count = self.read_daily_file_state(existing_file)
+        print(f"已有日线文件: {existing_file}")
+        print(f"已保存 {line_count} 个日期，最后日期: {last_date}")
+
+        # offset按交易日递增，已保存的日期数不会超过最后日期所在的位置，
+        # 因此从其所在分页开始下载即可覆盖所有新日期
+        start_offset = (line_count // self.page_size) * self.page_size
+        all_data = self.download_all_data(backtest_id, start_offset, user_record_offset)
+        if not all_data:
+            print("没有下载到新的数据，文件保持不变")
+            return str(existing_file)
+
+        converter = JSONLDateConverter()
+        date_groups = converter.group_data_by_date(all_data, self.target_fields)
+        new_dates = sorted(d for d in date_groups.keys() if d > last_date)
+        if not new_dates:
+            print(f"没有晚于 {last_date} 的新数据，文件保持不变")
+            return str(existing_file)
+
+        # 沿用已有文件名中的回测名称，避免再次请求详情页
+        date_range = parse_daily_filename(existing_file.name, backtest_id)
+        backtest_name, start_date = date_range[0], date_range[1]
+
+        new_lines = []
+        for date_key in new_dates:
+            daily_data = self.build_daily_record(date_key, date_groups[date_key], backtest_id, backtest_name)
+            if daily_data['data']:
+                new_lines.append(json.dumps(daily_data, ensure_ascii=False) + '\n')
+
+        if not new_lines:
+            print(f"没有晚于 {last_date} 的有效数据，文件保持不变")
+            return str(existing_file)
+
+        end_date = new_dates[-1]
+        time_range = start_date if start_date == end_date else f"{start_date}_{end_date}"
+        if backtest_name:
+            filename = f"{backtest_name}_{backtest_id}_{time_range}_daily.jsonl"
+        else:
+            filename = f"{backtest_id}_{time_range}_daily.jsonl"
+        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        new_filepath = existing_file.parent / filename
+
+        # 复制已有内容并追加新日期到临时文件，完成后原子替换
+        temp_filepath = existing_file.parent / f".{filename}.tmp"
+        try:
+            with open(existing_file, 'rb') as src, open(temp_filepath, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+                dst.seek(0, os.SEEK_END)
+                if dst.tell() > 0:
+                    src.seek(-1, os.SEEK_END)
+                    if src.read(1) != b'\n':
+                        dst.write(b'\n')
+                dst.write(''.join(new_lines).encode('utf-8'))
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(temp_filepath, new_filepath)
+        finally:
+            if temp_filepath.exists():
+                temp_filepath.unlink()
+
+        if new_filepath != existing_file:
+            existing_file.unlink()
+
+        print(f"新增 {len(new_lines)} 个日期 ({new_dates[0]} - {end_date})")
+        print(f"日线数据已更新: {new_filepath}")
+        return str(new_filepath)
+
+
+def parse_daily_filename(filename: str, backtest_id: str) -> Optional[Tuple[str, str, str]]:
+    """
+    解析日线文件名中的回测名称和日期范围
+
+    文件名格式：{backtest_name}_{backtest_id}_{start}[_{end}]_daily.jsonl
+
+    Args:
+        filename: 日线文件名
+        backtest_id: 回测ID
+
+    Returns:
+        (backtest_name, start_date, end_date)，无法解析时返回None
+    """
+    match = re.match(
+        rf'^(?:(.*)_)?{re.escape(backtest_id)}_(\d{{8}})(?:_(\d{{8}}))?_daily\.jsonl$',
+        filename
+    )
+    if not match:
+        return None
+    backtest_name = match.group(1) or ''
+    start_date = match.group(2)
+    end_date = match.group(3) or start_date
+    return backtest_name, start_date, end_date
+
 
 class JSONLDateConverter:
     """JSONL数据转换器 - 将数据按日期分行"""
@@ -967,6 +1269,7 @@ def main():
     parser.add_argument('--start-offset', type=int, default=0, help='起始偏移量 (默认: 0)')
     parser.add_argument('--user-record-offset', type=int, default=0, help='用户记录偏移量 (默认: 0)')
     parser.add_argument('--source-note', default='', help='数据来源备注，将包含在文件名中')
+    parser.add_argument('--update', action='store_true', help='增量更新：只下载已有日线文件最后日期之后的数据并追加')
     
     # 数据转换选项
     parser.add_argument('--convert-to-daily', action='store_true', help='将数据转换为按日期分行的格式')
@@ -983,6 +1286,15 @@ def main():
         if args.cookies or args.token:
             downloader.set_auth_info(args.cookies, args.token)
         
+        # 增量更新模式
+        if args.update:
+            daily_output_file = downloader.update_daily_data(args.backtest_id, args.user_record_offset)
+            if daily_output_file is None:
+                print("增量更新失败：请先完整下载一次该回测")
+                return 1
+            print(f"增量更新完成! 最终数据文件保存在: {daily_output_file}")
+            return 0
+        
         # 下载所有数据
         all_data = downloader.download_all_data(
             args.backtest_id, 
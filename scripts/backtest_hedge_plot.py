@@ -1,7 +1,7 @@
 """
 对冲数据计算示例脚本
 使用聚宽回测数据和指数数据计算对冲后的收益率
-使用echarts进行图表生成
+使用echarts进行图表生成（libs.chart_renderer）
 """
 
 import argparse
@@ -10,14 +10,12 @@ import sys
 import json
 import pandas as pd
 from datetime import datetime
-from pyecharts import options as opts
-from pyecharts.charts import Line, Grid
-from pyecharts.globals import ThemeType
 
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from libs.chart_renderer import ChartPage
 from libs.hedge_data_calc import calculate_hedge_data
 
 
@@ -39,157 +37,55 @@ def plot_hedge_results(hedge_data_file, output_file=None):
     df['date'] = pd.to_datetime(df['date'])
     
     # 准备数据
-    dates = [date.strftime('%Y-%m-%d') for date in df['date']]
-    backtest_returns = df['backtest_return'].tolist()
-    index_returns = df['index_return'].tolist()
-    hedge_returns = df['hedge_return'].tolist()
+    dates = df['date'].dt.strftime('%Y-%m-%d').tolist()
     
     # 计算累积收益率（以1为基准）
-    hedge_cumulative = (1 + df['hedge_return'] / 100).cumprod().tolist()
-    backtest_cumulative = (1 + df['backtest_return'] / 100).cumprod().tolist()
-    index_cumulative = (1 + df['index_return'] / 100).cumprod().tolist()
-    
-    # 创建累积收益率曲线图
-    cumulative_chart = (
-        Line(init_opts=opts.InitOpts(theme=ThemeType.LIGHT, width="1200px", height="400px"))
-        .add_xaxis(xaxis_data=dates)
-        .add_yaxis(
-            series_name="对冲组合累积收益率",
-            y_axis=hedge_cumulative,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=2),
-            itemstyle_opts=opts.ItemStyleOpts(color="#1890ff"),
-        )
-        .add_yaxis(
-            series_name="回测策略累积收益率",
-            y_axis=backtest_cumulative,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=2),
-            itemstyle_opts=opts.ItemStyleOpts(color="#ff4d4f"),
-        )
-        .add_yaxis(
-            series_name="指数累积收益率",
-            y_axis=index_cumulative,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=2),
-            itemstyle_opts=opts.ItemStyleOpts(color="#52c41a"),
-        )
-        .set_global_opts(
-            title_opts=opts.TitleOpts(title="累积收益率对比"),
-            tooltip_opts=opts.TooltipOpts(trigger="axis"),
-            legend_opts=opts.LegendOpts(pos_left="center"),
-            datazoom_opts=[
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="slider",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="inside",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-            ],
-            xaxis_opts=opts.AxisOpts(
-                type_="category",
-                boundary_gap=False,
-                axislabel_opts=opts.LabelOpts(rotate=45),
-            ),
-            yaxis_opts=opts.AxisOpts(
-                name="累积收益率",
-                type_="value",
-                splitline_opts=opts.SplitLineOpts(is_show=True),
-            ),
-        )
-    )
-    
-    # 创建收益率对比图
-    returns_chart = (
-        Line(init_opts=opts.InitOpts(theme=ThemeType.LIGHT, width="1200px", height="400px"))
-        .add_xaxis(xaxis_data=dates)
-        .add_yaxis(
-            series_name="回测策略收益率",
-            y_axis=backtest_returns,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=1.5),
-            itemstyle_opts=opts.ItemStyleOpts(color="#ff4d4f"),
-        )
-        .add_yaxis(
-            series_name="指数收益率",
-            y_axis=index_returns,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=1.5),
-            itemstyle_opts=opts.ItemStyleOpts(color="#52c41a"),
-        )
-        .add_yaxis(
-            series_name="对冲收益率",
-            y_axis=hedge_returns,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=1.5),
-            itemstyle_opts=opts.ItemStyleOpts(color="#1890ff"),
-        )
-        .set_global_opts(
-            title_opts=opts.TitleOpts(title="日收益率对比"),
-            tooltip_opts=opts.TooltipOpts(trigger="axis"),
-            legend_opts=opts.LegendOpts(pos_left="center"),
-            datazoom_opts=[
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="slider",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="inside",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-            ],
-            xaxis_opts=opts.AxisOpts(
-                type_="category",
-                boundary_gap=False,
-                axislabel_opts=opts.LabelOpts(rotate=45),
-            ),
-            yaxis_opts=opts.AxisOpts(
-                name="收益率 (%)",
-                type_="value",
-                splitline_opts=opts.SplitLineOpts(is_show=True),
-            ),
-        )
-    )
-    
-    # 组合图表
-    grid_chart = Grid(init_opts=opts.InitOpts(width="1200px", height="900px"))
-    grid_chart.add(
-        cumulative_chart,
-        grid_opts=opts.GridOpts(pos_bottom="55%", height="40%"),
+    hedge_cumulative = (1 + df['hedge_return'] / 100).cumprod()
+    backtest_cumulative = (1 + df['backtest_return'] / 100).cumprod()
+    index_cumulative = (1 + df['index_return'] / 100).cumprod()
+    
+    # 累积收益率曲线图和收益率对比图上下排列
+    page = ChartPage("对冲结果")
+    page.add_line(
+        "累积收益率对比",
+        dates,
+        {
+            "对冲组合累积收益率": hedge_cumulative.to_numpy(),
+            "回测策略累积收益率": backtest_cumulative.to_numpy(),
+            "指数累积收益率": index_cumulative.to_numpy(),
+        },
+        "累积收益率",
+        colors=["#1890ff", "#ff4d4f", "#52c41a"],
+        height="450px"
     )
-    grid_chart.add(
-        returns_chart,
-        grid_opts=opts.GridOpts(pos_top="55%", height="40%"),
+    page.add_line(
+        "日收益率对比",
+        dates,
+        {
+            "回测策略收益率": df['backtest_return'].to_numpy(),
+            "指数收益率": df['index_return'].to_numpy(),
+            "对冲收益率": df['hedge_return'].to_numpy(),
+        },
+        "收益率 (%)",
+        colors=["#ff4d4f", "#52c41a", "#1890ff"],
+        line_width=1.5,
+        height="450px"
     )
     
     # 保存图表
     if output_file:
         if output_file.endswith('.html'):
-            grid_chart.render(output_file)
+            page.render(output_file)
             print(f"图表已保存到: {output_file}")
         else:
             # 如果不是HTML文件，则生成HTML文件
             html_file = output_file.replace('.png', '.html')
-            grid_chart.render(html_file)
+            page.render(html_file)
             print(f"图表已保存到: {html_file}")
     else:
         # 默认文件名
         output_file = "hedge_results.html"
-        grid_chart.render(output_file)
+        page.render(output_file)
         print(f"图表已保存到: {output_file}")
 
 
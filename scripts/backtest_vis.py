@@ -22,14 +22,13 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from pyecharts import options as opts
-from pyecharts.charts import Line, Bar, Grid, Page
-from pyecharts.globals import ThemeType
 
 # 添加项目根目录到Python路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from libs.chart_renderer import ChartPage
+
 
 def load_backtest_data(file_path):
     """
@@ -71,34 +70,31 @@ def load_backtest_data(file_path):
     return df
 
 
-def plot_cumulative_returns(df, output_file=None, mark_drawdowns=True, top_n=10):
+def plot_cumulative_returns(df, page, mark_drawdowns=True, top_n=10):
     """
     绘制累积收益率曲线
     
     Args:
         df: 包含回测数据的DataFrame
-        output_file: 输出文件路径
+        page: 图表页面（ChartPage）
         mark_drawdowns: 是否标记回撤区间
         top_n: 标记前N大回撤区间
         
     Returns:
-        Line: 累积收益率曲线图
+        Dict: 累积收益率曲线图的 ECharts 配置
     """
     # 准备数据
-    dates = [date.strftime('%Y-%m-%d') for date in df['date']]
-    cumulative_returns = df['cumulative_return'].tolist()
+    dates = df['date'].dt.strftime('%Y-%m-%d').tolist()
     
     # 创建累积收益率曲线图
-    line_chart = (
-        Line(init_opts=opts.InitOpts(theme=ThemeType.LIGHT, width="1200px", height="600px"))
-        .add_xaxis(xaxis_data=dates)
-        .add_yaxis(
-            series_name="累积收益率",
-            y_axis=cumulative_returns,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=2),
-            itemstyle_opts=opts.ItemStyleOpts(color="#1890ff"),
-        )
+    option = page.add_line(
+        "策略累积收益率曲线（含回撤区间标记）",
+        dates,
+        {"累积收益率": df['cumulative_return'].to_numpy()},
+        "收益率 (%)",
+        colors=["#1890ff"],
+        tooltip_formatter="{b}<br/>累积收益率: {c}%",
+        legend={'show': True, 'left': 'right', 'orient': 'vertical'}
     )
     
     # 添加回撤区间标记
@@ -110,95 +106,47 @@ def plot_cumulative_returns(df, output_file=None, mark_drawdowns=True, top_n=10)
         # 获取前N大回撤区间
         drawdown_periods = identify_top_drawdown_periods(df, top_n)
         
-        # 为每个回撤区间添加标记
+        # 为每个回撤区间添加标记（只有标记点、没有数据点的系列，可在图例中单独开关）
         for i, period in enumerate(drawdown_periods):
             start_date = period['start_date'].strftime('%Y-%m-%d')
             end_date = period['end_date'].strftime('%Y-%m-%d')
             min_drawdown = period['min_drawdown']
             duration = period['duration']
             
-            # 添加标记点
-            line_chart.add_yaxis(
-                series_name=f"回撤区间{i+1}",
-                y_axis=[None] * len(dates),  # 不显示数据点
-                markpoint_opts=opts.MarkPointOpts(
-                    data=[
-                        opts.MarkPointItem(
-                            type_="min",
-                            name=f"回撤区间{i+1}: {start_date}至{end_date}, 深度{min_drawdown:.2f}%, 持续{duration}天",
-                            symbol="pin",
-                            symbol_size=50,
-                            x=period['start_idx'],
-                            y=df.iloc[period['start_idx']]['cumulative_return'],
-                            itemstyle_opts=opts.ItemStyleOpts(color="#ff4d4f"),
-                        ),
-                        opts.MarkPointItem(
-                            type_="min",
-                            name=f"回撤区间{i+1}结束",
-                            symbol="pin",
-                            symbol_size=50,
-                            x=period['end_idx'],
-                            y=df.iloc[period['end_idx']]['cumulative_return'],
-                            itemstyle_opts=opts.ItemStyleOpts(color="#ff4d4f"),
-                        ),
+            option['series'].append({
+                'name': f"回撤区间{i+1}",
+                'type': 'line',
+                'data': [],
+                'markPoint': {
+                    'symbol': 'pin',
+                    'symbolSize': 50,
+                    'itemStyle': {'color': "#ff4d4f"},
+                    'data': [
+                        {
+                            'name': f"回撤区间{i+1}: {start_date}至{end_date}, 深度{min_drawdown:.2f}%, 持续{duration}天",
+                            'coord': [start_date, float(df.iloc[period['start_idx']]['cumulative_return'])]
+                        },
+                        {
+                            'name': f"回撤区间{i+1}结束",
+                            'coord': [end_date, float(df.iloc[period['end_idx']]['cumulative_return'])]
+                        },
                     ]
-                ),
-            )
-    
-    # 设置全局选项
-    line_chart.set_global_opts(
-        title_opts=opts.TitleOpts(title="策略累积收益率曲线（含回撤区间标记）"),
-        tooltip_opts=opts.TooltipOpts(
-            trigger="axis",
-            axis_pointer_type="cross",
-            formatter="{b}<br/>累积收益率: {c}%"
-        ),
-        datazoom_opts=[
-            opts.DataZoomOpts(
-                is_show=True,
-                type_="slider",
-                xaxis_index=[0],
-                range_start=0,
-                range_end=100,
-            ),
-            opts.DataZoomOpts(
-                is_show=True,
-                type_="inside",
-                xaxis_index=[0],
-                range_start=0,
-                range_end=100,
-            ),
-        ],
-        xaxis_opts=opts.AxisOpts(
-            type_="category",
-            boundary_gap=False,
-            axislabel_opts=opts.LabelOpts(rotate=45),
-        ),
-        yaxis_opts=opts.AxisOpts(
-            name="收益率 (%)",
-            type_="value",
-            splitline_opts=opts.SplitLineOpts(is_show=True),
-        ),
-        legend_opts=opts.LegendOpts(
-            is_show=True,
-            pos_left="right",
-            orient="vertical",
-        ),
-    )
+                }
+            })
     
-    return line_chart
+    return option
 
 
-def plot_daily_returns_histogram(df, output_file=None):
+def plot_daily_returns_histogram(df, page):
     """
     绘制日收益率直方图
     
     Args:
         df: 包含回测数据的DataFrame
-        output_file: 输出文件路径
+        page: 图表页面（ChartPage）
         
     Returns:
-        Bar: 日收益率直方图
+        Dict: 日收益率直方图的 ECharts 配置
     """
     # 准备数据
     daily_returns = df['daily_return'].tolist()
@@ -216,34 +164,15 @@ def plot_daily_returns_histogram(df, output_file=None):
     bin_labels = [f"{bin_edges[i]:.2f}%~{bin_edges[i+1]:.2f}%" for i in range(len(bin_edges)-1)]
     
     # 创建直方图
-    bar_chart = (
-        Bar(init_opts=opts.InitOpts(theme=ThemeType.LIGHT, width="1200px", height="600px"))
-        .add_xaxis(bin_labels)
-        .add_yaxis(
-            "频次",
-            hist.tolist(),
-            label_opts=opts.LabelOpts(is_show=False),
-            itemstyle_opts=opts.ItemStyleOpts(color="#52c41a"),
-        )
-        .set_global_opts(
-            title_opts=opts.TitleOpts(title="日收益率分布"),
-            tooltip_opts=opts.TooltipOpts(
-                trigger="axis",
-                axis_pointer_type="shadow",
-                formatter="{b}<br/>频次: {c}"
-            ),
-            xaxis_opts=opts.AxisOpts(
-                name="收益率区间",
-                axislabel_opts=opts.LabelOpts(rotate=45),
-            ),
-            yaxis_opts=opts.AxisOpts(
-                name="频次",
-                splitline_opts=opts.SplitLineOpts(is_show=True),
-            ),
-        )
+    return page.add_bar(
+        "日收益率分布",
+        bin_labels,
+        {"频次": hist},
+        "收益率区间",
+        "频次",
+        colors=["#52c41a"],
+        tooltip_formatter="{b}<br/>频次: {c}"
     )
-    
-    return bar_chart
 
 
 def calculate_max_drawdown(df):
@@ -336,73 +265,30 @@ def identify_top_drawdown_periods(df, top_n=10):
     return drawdown_periods[:top_n]
 
 
-def plot_max_drawdown(df, output_file=None):
+def plot_max_drawdown(df, page):
     """
     绘制最大回撤曲线
     
     Args:
         df: 包含回测数据的DataFrame
-        output_file: 输出文件路径
+        page: 图表页面（ChartPage）
         
     Returns:
-        Line: 最大回撤曲线图
+        Dict: 最大回撤曲线图的 ECharts 配置
     """
     # 计算最大回撤
     df = calculate_max_drawdown(df)
     
-    # 准备数据
-    dates = [date.strftime('%Y-%m-%d') for date in df['date']]
-    drawdowns = df['drawdown'].tolist()
-    
     # 创建回撤曲线图
-    line_chart = (
-        Line(init_opts=opts.InitOpts(theme=ThemeType.LIGHT, width="1200px", height="600px"))
-        .add_xaxis(xaxis_data=dates)
-        .add_yaxis(
-            series_name="回撤",
-            y_axis=drawdowns,
-            label_opts=opts.LabelOpts(is_show=False),
-            linestyle_opts=opts.LineStyleOpts(width=2),
-            itemstyle_opts=opts.ItemStyleOpts(color="#ff4d4f"),
-            areastyle_opts=opts.AreaStyleOpts(opacity=0.5),
-        )
-        .set_global_opts(
-            title_opts=opts.TitleOpts(title="策略回撤曲线"),
-            tooltip_opts=opts.TooltipOpts(
-                trigger="axis",
-                axis_pointer_type="cross",
-                formatter="{b}<br/>回撤: {c:.2f}%"
-            ),
-            datazoom_opts=[
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="slider",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-                opts.DataZoomOpts(
-                    is_show=True,
-                    type_="inside",
-                    xaxis_index=[0],
-                    range_start=0,
-                    range_end=100,
-                ),
-            ],
-            xaxis_opts=opts.AxisOpts(
-                type_="category",
-                boundary_gap=False,
-                axislabel_opts=opts.LabelOpts(rotate=45),
-            ),
-            yaxis_opts=opts.AxisOpts(
-                name="回撤 (%)",
-                type_="value",
-                splitline_opts=opts.SplitLineOpts(is_show=True),
-            ),
-        )
+    return page.add_line(
+        "策略回撤曲线",
+        df['date'].dt.strftime('%Y-%m-%d').tolist(),
+        {"回撤": df['drawdown'].to_numpy()},
+        "回撤 (%)",
+        colors=["#ff4d4f"],
+        area=True,
+        tooltip_formatter="{b}<br/>回撤: {c}%"
     )
-    
-    return line_chart
 
 
 def analyze_performance(df):
@@ -475,16 +361,11 @@ def generate_visualization(df, output_file=None, include_analysis=True, mark_dra
         mark_drawdowns: 是否标记最大回撤区间
         top_n: 标记前N个最大回撤区间
     """
-    # 创建图表
-    cumulative_chart = plot_cumulative_returns(df, mark_drawdowns=mark_drawdowns, top_n=top_n)
-    daily_returns_chart = plot_daily_returns_histogram(df)
-    max_drawdown_chart = plot_max_drawdown(df)
-    
-    # 创建页面
-    page = Page(page_title="回测结果可视化")
-    page.add(cumulative_chart)
-    page.add(daily_returns_chart)
-    page.add(max_drawdown_chart)
+    # 创建页面和图表
+    page = ChartPage("回测结果可视化")
+    plot_cumulative_returns(df, page, mark_drawdowns=mark_drawdowns, top_n=top_n)
+    plot_daily_returns_histogram(df, page)
+    plot_max_drawdown(df, page)
     
     # 保存图表
     if output_file:
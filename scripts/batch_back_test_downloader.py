@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JoinQuant回测数据批量下载器
+
+从文件中读取回测ID或回测详情页URL，并发下载多个回测的日线数据：
+- 所有下载线程共享一个带连接池的 requests.Session
+- 按主机限制全局请求速率，遇到 429/5xx 时退避重试
+- 下载结束后输出吞吐量汇总（pages/s、MB/s、每个回测的耗时）
+
+使用方法:
+    python main.py batch_back_test_downloader --ids-file backtest_ids.txt --workers 4 --rps 5
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from joinquant_lib.backtest_downloader import extract_backtest_ids
+from scripts.back_test_downloader import BacktestDataDownloader, HostRateLimiter
+
+
+def create_pooled_session(pool_size: int) -> requests.Session:
+    """
+    创建带连接池的Session，供所有下载线程共享
+
+    Args:
+        pool_size: 连接池大小（通常等于并发数）
+
+    Returns:
+        requests.Session: 共享Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def download_one_backtest(backtest_id: str, config_path: str, source_note: str,
+                          session: requests.Session, rate_limiter: HostRateLimiter,
+                          max_retries: int) -> Dict[str, Any]:
+    """
+    下载单个回测并保存为日线文件
+
+    Args:
+        backtest_id: 回测ID
+        config_path: 配置文件路径
+        source_note: 数据来源备注
+        session: 共享Session
+        rate_limiter: 共享限流器
+        max_retries: 单个请求的最大重试次数
+
+    Returns:
+        Dict: 下载结果，包含文件路径、请求页数、字节数、重试次数和耗时
+    """
+    start_time = time.perf_counter()
+    result = {
+        'backtest_id': backtest_id,
+        'file': None,
+        'pages': 0,
+        'bytes': 0,
+        'retries': 0,
+        'elapsed': 0.0,
+        'error': None
+    }
+
+    try:
+        downloader = BacktestDataDownloader(
+            config_path,
+            source_note,
+            session=session,
+            rate_limiter=rate_limiter,
+            max_retries=max_retries
+        )
+        all_data = downloader.download_all_data(backtest_id)
+        if all_data:
+            result['file'] = downloader.save_daily_data_directly(all_data, backtest_id)
+        else:
+            result['error'] = '没有获取到数据'
+        result.update(downloader.stats)
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['elapsed'] = time.perf_counter() - start_time
+    return result
+
+
+def print_throughput_summary(results: List[Dict[str, Any]], total_elapsed: float):
+    """
+    输出批量下载的吞吐量汇总
+
+    Args:
+        results: 每个回测的下载结果
+        total_elapsed: 总耗时（秒）
+    """
+    total_pages = sum(r['pages'] for r in results)
+    total_bytes = sum(r['bytes'] for r in results)
+    total_retries = sum(r['retries'] for r in results)
+    succeeded = [r for r in results if r['file']]
+
+    print("\n" + "=" * 80)
+    print("批量下载汇总")
+    print("=" * 80)
+    print(f"回测数量: {len(results)}，成功: {len(succeeded)}，失败: {len(results) - len(succeeded)}")
+    print(f"总耗时: {total_elapsed:.2f} 秒")
+    print(f"请求页数: {total_pages}，重试次数: {total_retries}")
+    print(f"下载数据量: {total_bytes / 1024 / 1024:.2f} MB")
+    if total_elapsed > 0:
+        print(f"吞吐量: {total_pages / total_elapsed:.2f} pages/s, "
+              f"{total_bytes / 1024 / 1024 / total_elapsed:.2f} MB/s")
+
+    print("\n各回测耗时:")
+    for r in sorted(results, key=lambda x: x['elapsed'], reverse=True):
+        status = "成功" if r['file'] else f"失败 ({r['error']})"
+        print(f"  {r['backtest_id']}: {r['elapsed']:.2f} 秒, {r['pages']} 页, "
+              f"{r['bytes'] / 1024:.1f} KB - {status}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='JoinQuant回测数据批量下载器 - 并发下载并限流')
+    parser.add_argument('--ids-file', required=True, help='包含回测ID或回测详情页URL的文本文件')
+    parser.add_argument('--config', default='config.yaml', help='配置文件路径 (默认: config.yaml)')
+    parser.add_argument('--workers', type=int, default=4, help='并发下载的回测数量 (默认: 4)')
+    parser.add_argument('--rps', type=float, default=5.0, help='每个主机每秒最多请求数，<=0 表示不限流 (默认: 5)')
+    parser.add_argument('--max-retries', type=int, default=3, help='遇到429/5xx时单个请求的最大重试次数 (默认: 3)')
+    parser.add_argument('--source-note', default='', help='数据来源备注')
+
+    args = parser.parse_args()
+
+    ids_file = Path(args.ids_file)
+    if not ids_file.exists():
+        print(f"错误: 文件不存在: {ids_file}")
+        return 1
+
+    backtest_ids = extract_backtest_ids(ids_file.read_text(encoding='utf-8'))
+    if not backtest_ids:
+        print(f"错误: 未能从 {ids_file} 中提取到任何回测ID")
+        return 1
+
+    workers = max(1, args.workers)
+    print(f"提取到 {len(backtest_ids)} 个回测ID，并发数: {workers}，限流: {args.rps} 请求/秒")
+
+    session = create_pooled_session(workers)
+    rate_limiter = HostRateLimiter(args.rps)
+
+    results = []
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                download_one_backtest,
+                backtest_id,
+                args.config,
+                args.source_note,
+                session,
+                rate_limiter,
+                args.max_retries
+            ): backtest_id
+            for backtest_id in backtest_ids
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "完成" if result['file'] else "失败"
+            print(f"[{len(results)}/{len(backtest_ids)}] {result['backtest_id']} {status}，耗时 {result['elapsed']:.2f} 秒")
+    total_elapsed = time.perf_counter() - start_time
+
+    print_throughput_summary(results, total_elapsed)
+
+    return 0 if all(r['file'] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+归档读取吞吐量基准测试
+
+对比三种读取回测数据的方式：
+- archive: 直接从 tar.gz/zip 归档中流式解压读取成员
+- extracted: 读取事先解压到磁盘的文件
+- cached: 开启成员缓存后的重复读取（首次读取会解压到缓存目录）
+
+每种方式都通过 libs.archive_reader.open_text 逐行读取完整成员，输出耗时与 MB/s。
+
+使用方法:
+    python main.py benchmark_archive_reads --input_dir backtest_data/ex_tm1_top30 --repeat 3
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.archive_reader import (
+    extract_member,
+    is_archive,
+    list_archive_members,
+    make_member_path,
+    open_text,
+    set_member_cache_dir
+)
+
+
+def time_read(path: str, repeat: int) -> float:
+    """
+    逐行读取文件 repeat 次，返回单次读取的最短耗时（秒）
+
+    Args:
+        path: 普通文件路径或归档成员路径
+        repeat: 重复次数
+
+    Returns:
+        float: 最短耗时
+    """
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        with open_text(path) as f:
+            for _line in f:
+                pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_archive(archive_path: Path, work_dir: Path, repeat: int) -> List[Dict[str, Any]]:
+    """
+    对单个归档中的每个成员测试三种读取方式
+
+    Args:
+        archive_path: 归档文件路径
+        work_dir: 解压与缓存使用的临时目录
+        repeat: 每种方式的重复次数
+
+    Returns:
+        List[Dict]: 每个成员的测试结果
+    """
+    results = []
+    extract_dir = work_dir / 'extracted' / archive_path.name
+    cache_dir = work_dir / 'cache'
+
+    for member in list_archive_members(str(archive_path)):
+        member_path = make_member_path(str(archive_path), member)
+        extracted_file = extract_dir / Path(member).name
+        extract_member(member_path, str(extracted_file))
+        size_mb = extracted_file.stat().st_size / 1024 / 1024
+
+        set_member_cache_dir(None)
+        archive_seconds = time_read(member_path, repeat)
+        extracted_seconds = time_read(str(extracted_file), repeat)
+
+        set_member_cache_dir(str(cache_dir))
+        cold_start = time.perf_counter()
+        with open_text(member_path) as f:
+            for _line in f:
+                pass
+        cached_cold_seconds = time.perf_counter() - cold_start
+        cached_seconds = time_read(member_path, repeat)
+        set_member_cache_dir(None)
+
+        results.append({
+            'archive': archive_path.name,
+            'member': Path(member).name,
+            'size_mb': size_mb,
+            'archive_seconds': archive_seconds,
+            'extracted_seconds': extracted_seconds,
+            'cached_cold_seconds': cached_cold_seconds,
+            'cached_seconds': cached_seconds
+        })
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    """输出测试结果表格与汇总"""
+    def mbps(size_mb: float, seconds: float) -> float:
+        return size_mb / seconds if seconds > 0 else 0.0
+
+    print("=" * 100)
+    print(f"{'成员':<60} {'大小MB':>8} {'归档MB/s':>10} {'解压MB/s':>10} {'缓存MB/s':>10}")
+    print("-" * 100)
+    for r in results:
+        print(f"{r['member'][:60]:<60} {r['size_mb']:>8.2f} "
+              f"{mbps(r['size_mb'], r['archive_seconds']):>10.1f} "
+              f"{mbps(r['size_mb'], r['extracted_seconds']):>10.1f} "
+              f"{mbps(r['size_mb'], r['cached_seconds']):>10.1f}")
+
+    total_mb = sum(r['size_mb'] for r in results)
+    archive_total = sum(r['archive_seconds'] for r in results)
+    extracted_total = sum(r['extracted_seconds'] for r in results)
+    cold_total = sum(r['cached_cold_seconds'] for r in results)
+    cached_total = sum(r['cached_seconds'] for r in results)
+    print("-" * 100)
+    print(f"合计 {len(results)} 个成员, {total_mb:.2f} MB")
+    print(f"  归档流式读取: {archive_total:.3f} 秒, {mbps(total_mb, archive_total):.1f} MB/s")
+    print(f"  解压后读取:   {extracted_total:.3f} 秒, {mbps(total_mb, extracted_total):.1f} MB/s")
+    print(f"  缓存首次读取: {cold_total:.3f} 秒, {mbps(total_mb, cold_total):.1f} MB/s（含解压到缓存）")
+    print(f"  缓存重复读取: {cached_total:.3f} 秒, {mbps(total_mb, cached_total):.1f} MB/s")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='归档读取吞吐量基准测试（归档流式读取 vs 解压后读取）')
+    parser.add_argument('--input_dir', required=True, help='包含 tar.gz/zip 回测归档的目录')
+    parser.add_argument('--repeat', type=int, default=3, help='每种读取方式的重复次数，取最短耗时 (默认: 3)')
+    parser.add_argument('--json-output', help='将结果保存为JSON文件')
+
+    args = parser.parse_args()
+
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_absolute():
+        input_dir = project_root / input_dir
+    if not input_dir.exists():
+        print(f"错误: 目录不存在: {input_dir}")
+        return 1
+
+    archives = sorted(p for p in input_dir.iterdir() if p.is_file() and is_archive(p.name))
+    if not archives:
+        print(f"错误: 目录 {input_dir} 中没有找到归档文件")
+        return 1
+
+    print(f"找到 {len(archives)} 个归档文件")
+    results = []
+    with tempfile.TemporaryDirectory(prefix='archive_bench_') as tmp:
+        for archive_path in archives:
+            print(f"测试: {archive_path.name}")
+            results.extend(benchmark_archive(archive_path, Path(tmp), args.repeat))
+
+    print_results(results)
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
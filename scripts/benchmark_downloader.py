@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测下载器吞吐量基准测试
+
+在本地启动模拟聚宽接口服务器（fake_joinquant_server），用真实的 BacktestDataDownloader
+完成"下载 + 转换为日线文件"的完整流程，分别统计下载和转换阶段的耗时与吞吐量。
+不需要聚宽账号和 config.yaml，可离线复现，用于调整并发、重试和限流参数。
+
+使用方法:
+    python main.py benchmark_downloader --backtests 8 --pages 5 --workers 4 --latency 0.05 --failure-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.back_test_downloader import BacktestDataDownloader, HostRateLimiter
+from scripts.batch_back_test_downloader import create_pooled_session
+from scripts.fake_joinquant_server import DETAIL_PATH, RESULT_PATH, FakeJoinQuantServer
+
+
+def make_backtest_ids(count: int) -> List[str]:
+    """生成可复现的32位十六进制回测ID"""
+    return [hashlib.md5(f"benchmark-{i}".encode("utf-8")).hexdigest() for i in range(count)]
+
+
+def write_benchmark_config(work_dir: Path) -> Path:
+    """
+    写入基准测试使用的临时配置文件
+
+    Args:
+        work_dir: 临时工作目录
+
+    Returns:
+        Path: 配置文件路径（绝对路径）
+    """
+    config_path = work_dir / "config.yaml"
+    data_dir = work_dir / "backtest_data"
+    config_path.write_text(
+        "joinquant:\n"
+        "  cookies: 'uid=benchmark; token=benchmark'\n"
+        "  token: benchmark\n"
+        f"  data_dir: {json.dumps(str(data_dir))}\n",
+        encoding="utf-8"
+    )
+    return config_path
+
+
+def run_one(backtest_id: str, config_path: Path, base_url: str, session, rate_limiter,
+            max_retries: int) -> Dict[str, Any]:
+    """
+    下载并转换单个回测，分别计时
+
+    Returns:
+        Dict: 包含下载耗时、转换耗时、页数、字节数、重试次数和输出文件大小
+    """
+    downloader = BacktestDataDownloader(
+        str(config_path),
+        session=session,
+        rate_limiter=rate_limiter,
+        max_retries=max_retries,
+        retry_backoff=0.0
+    )
+    downloader.base_url = f"{base_url}{RESULT_PATH}"
+    downloader.detail_url = f"{base_url}{DETAIL_PATH}"
+
+    t0 = time.perf_counter()
+    all_data = downloader.download_all_data(backtest_id)
+    t1 = time.perf_counter()
+    output_file = downloader.save_daily_data_directly(all_data, backtest_id) if all_data else None
+    t2 = time.perf_counter()
+
+    return {
+        "backtest_id": backtest_id,
+        "download_seconds": t1 - t0,
+        "convert_seconds": t2 - t1,
+        "pages": downloader.stats["pages"],
+        "bytes": downloader.stats["bytes"],
+        "retries": downloader.stats["retries"],
+        "output_bytes": os.path.getsize(output_file) if output_file else 0,
+        "ok": output_file is not None
+    }
+
+
+def run_benchmark(backtests: int, pages: int, workers: int, latency: float, failure_rate: float,
+                  rps: float, max_retries: int, seed: int) -> Dict[str, Any]:
+    """
+    运行一次基准测试
+
+    Returns:
+        Dict: 基准测试结果汇总
+    """
+    server = FakeJoinQuantServer(pages=pages, latency=latency, failure_rate=failure_rate, seed=seed)
+    server.start_background()
+    # 下载器在当前目录写入 backtest_detail.html，因此在临时目录中运行
+    original_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="jq_benchmark_") as tmp:
+            work_dir = Path(tmp)
+            os.chdir(work_dir)
+            config_path = write_benchmark_config(work_dir)
+            session = create_pooled_session(workers)
+            rate_limiter = HostRateLimiter(rps)
+            backtest_ids = make_backtest_ids(backtests)
+
+            # 下载器本身输出较多进度信息，基准测试期间统一屏蔽（sys.stdout为全局对象，只能在线程池外重定向）
+            start = time.perf_counter()
+            with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(
+                        lambda bid: run_one(bid, config_path, server.base_url, session, rate_limiter, max_retries),
+                        backtest_ids
+                    ))
+            wall_seconds = time.perf_counter() - start
+    finally:
+        os.chdir(original_cwd)
+        server.stop()
+
+    total_pages = sum(r["pages"] for r in results)
+    total_bytes = sum(r["bytes"] for r in results)
+    total_convert = sum(r["convert_seconds"] for r in results)
+    total_output = sum(r["output_bytes"] for r in results)
+    download_latencies = sorted(r["download_seconds"] for r in results)
+
+    return {
+        "backtests": backtests,
+        "pages_per_backtest": pages,
+        "workers": workers,
+        "latency": latency,
+        "failure_rate": failure_rate,
+        "rps": rps,
+        "succeeded": sum(1 for r in results if r["ok"]),
+        "wall_seconds": wall_seconds,
+        "server_requests": server.request_count,
+        "server_failures": server.failure_count,
+        "retries": sum(r["retries"] for r in results),
+        "pages": total_pages,
+        "download_mb": total_bytes / 1024 / 1024,
+        "pages_per_second": total_pages / wall_seconds if wall_seconds > 0 else 0.0,
+        "mb_per_second": total_bytes / 1024 / 1024 / wall_seconds if wall_seconds > 0 else 0.0,
+        "convert_seconds": total_convert,
+        "convert_mb_per_second": total_output / 1024 / 1024 / total_convert if total_convert > 0 else 0.0,
+        "download_latency_p50": download_latencies[len(download_latencies) // 2] if download_latencies else 0.0,
+        "download_latency_max": download_latencies[-1] if download_latencies else 0.0,
+        "per_backtest": results
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """输出基准测试结果"""
+    print("=" * 80)
+    print("下载器吞吐量基准测试")
+    print("=" * 80)
+    print(f"回测数量: {report['backtests']}，每个回测 {report['pages_per_backtest']} 页，并发数: {report['workers']}")
+    print(f"模拟延迟: {report['latency']} 秒，失败率: {report['failure_rate']:.1%}，限流: {report['rps']} 请求/秒")
+    print(f"成功: {report['succeeded']}/{report['backtests']}")
+    print(f"总耗时: {report['wall_seconds']:.2f} 秒")
+    print(f"服务端请求: {report['server_requests']}，其中失败 {report['server_failures']}，客户端重试 {report['retries']}")
+    print(f"下载: {report['pages']} 页, {report['download_mb']:.2f} MB -> "
+          f"{report['pages_per_second']:.2f} pages/s, {report['mb_per_second']:.2f} MB/s")
+    print(f"转换: 累计 {report['convert_seconds']:.2f} 秒, {report['convert_mb_per_second']:.2f} MB/s（输出）")
+    print(f"单个回测下载耗时: p50 {report['download_latency_p50']:.2f} 秒, max {report['download_latency_max']:.2f} 秒")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='回测下载器吞吐量基准测试（使用本地模拟服务器）')
+    parser.add_argument('--backtests', type=int, default=8, help='模拟回测数量 (默认: 8)')
+    parser.add_argument('--pages', type=int, default=5, help='每个回测的数据分页数 (默认: 5)')
+    parser.add_argument('--workers', type=int, default=4, help='并发下载数 (默认: 4)')
+    parser.add_argument('--latency', type=float, default=0.05, help='每次请求的模拟延迟秒数 (默认: 0.05)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='模拟服务端随机失败率 (默认: 0)')
+    parser.add_argument('--rps', type=float, default=0.0, help='每秒最多请求数，<=0 表示不限流 (默认: 0)')
+    parser.add_argument('--max-retries', type=int, default=3, help='单个请求的最大重试次数 (默认: 3)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    parser.add_argument('--json-output', help='将结果保存为JSON文件')
+
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        backtests=args.backtests,
+        pages=args.pages,
+        workers=max(1, args.workers),
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        rps=args.rps,
+        max_retries=args.max_retries,
+        seed=args.seed
+    )
+    print_report(report)
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.json_output}")
+
+    return 0 if report["succeeded"] == report["backtests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
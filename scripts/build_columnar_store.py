@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建与查询持仓/订单列式存储
+
+将 save_backtest_positions 生成的持仓详情JSONL（每天每只持仓一行）或 save_backtest_orders 生成的订单JSONL
+转换为按年分区的列式存储（见 libs.columnar_store）。持仓存储支持查询某一天的全部持仓或单个证券的持仓历史；
+订单存储只保存已成交订单并按时间排序，可直接作为 position_value_visualization 的输入。
+
+输入可以是JSONL文件、归档成员路径（<归档>::<成员名>），或直接给出回测归档，
+此时按 --kind 自动查找其中的 *_position_details_*.jsonl 或 *_orders_*.jsonl 成员。
+
+使用方法:
+    # 转换（默认输出到输入文件同目录下的 <文件名>.positions 目录）
+    python main.py build_columnar_store --input backtest_data/xxx_position_details_<id>.jsonl
+
+    # 查询某一天的持仓
+    python main.py build_columnar_store --store backtest_data/xxx_position_details_<id>.positions --date 2020-03-02
+
+    # 查询单个证券的持仓历史
+    python main.py build_columnar_store --store backtest_data/xxx_position_details_<id>.positions \\
+        --security 000001.XSHE --start_date 2020-01-01 --end_date 2020-12-31
+
+    # 转换订单（默认输出到 <文件名>.orders 目录），再用于持仓金额回放
+    python main.py build_columnar_store --input backtest_data/xxx_orders_<id>.jsonl
+    python main.py position_value_visualization --input backtest_data/xxx_orders_<id>.orders
+
+    # 构建收盘价面板（输入为持仓存储目录或 日期,证券,收盘价 长表CSV），用于按市价估值
+    python main.py build_columnar_store --kind prices --input backtest_data/xxx_position_details_<id>.positions
+    python main.py build_columnar_store --kind prices --input data/daily_close.csv --store data/daily_close.prices
+    python main.py position_value_visualization --input backtest_data/xxx_orders_<id>.orders \\
+        --price_panel backtest_data/xxx_position_details_<id>.prices
+"""
+
+import argparse
+import fnmatch
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.archive_reader import is_archive, list_archive_members, make_member_path, split_member_path
+from libs.columnar_store import (
+    ORDER_STORE_FORMAT,
+    POSITION_STORE_FORMAT,
+    PRICE_PANEL_FORMAT,
+    OrderStore,
+    PositionStore,
+    PricePanel,
+    build_price_panel_from_csv,
+    build_price_panel_from_positions,
+    convert_orders,
+    convert_position_details,
+    is_columnar_store,
+    ordinal_to_date
+)
+
+# 各类数据的文件名模式、默认存储目录后缀与说明
+STORE_KINDS = {
+    "positions": {"pattern": "*_position_details_*.jsonl", "suffix": ".positions", "label": "持仓详情"},
+    "orders": {"pattern": "*_orders_*.jsonl", "suffix": ".orders", "label": "订单"},
+    "prices": {"pattern": "*.csv", "suffix": ".prices", "label": "收盘价"},
+}
+
+
+def detect_kind(path: str) -> str:
+    """根据文件名或存储元数据判断数据类型，无法判断时按持仓详情处理"""
+    if is_columnar_store(path, ORDER_STORE_FORMAT):
+        return "orders"
+    if is_columnar_store(path, PRICE_PANEL_FORMAT):
+        return "prices"
+    name = Path(split_member_path(path)[1] or path).name
+    if fnmatch.fnmatch(name, STORE_KINDS["orders"]["pattern"]) or fnmatch.fnmatch(name, "*.orders"):
+        return "orders"
+    if fnmatch.fnmatch(name, "*.csv") or fnmatch.fnmatch(name, "*.prices"):
+        return "prices"
+    return "positions"
+
+
+def resolve_input(input_path: str, kind: str) -> Optional[str]:
+    """
+    解析输入路径：归档文件自动定位其中的持仓详情或订单成员
+
+    Args:
+        input_path: JSONL文件、归档成员路径或归档文件
+        kind: 数据类型（positions 或 orders）
+
+    Returns:
+        Optional[str]: 可直接读取的JSONL路径；归档中找不到时返回None
+    """
+    archive_path, member_name = split_member_path(input_path)
+    if member_name is not None or not is_archive(archive_path):
+        return input_path
+    for name in list_archive_members(archive_path):
+        if fnmatch.fnmatch(Path(name).name, STORE_KINDS[kind]["pattern"]):
+            return make_member_path(archive_path, name)
+    return None
+
+
+def convert_prices(input_path: str, store_dir: str) -> Dict[str, Any]:
+    """由持仓存储目录或长表CSV构建收盘价面板"""
+    if is_columnar_store(input_path, POSITION_STORE_FORMAT):
+        return build_price_panel_from_positions(input_path, store_dir)
+    return build_price_panel_from_csv(input_path, store_dir)
+
+
+def default_store_dir(input_path: str, kind: str) -> str:
+    """根据输入路径生成默认的存储目录：与输入（或其所在归档）同目录，名为 <成员文件名>.positions/.orders/.prices"""
+    archive_path, member_name = split_member_path(input_path)
+    name = Path(member_name or archive_path).name
+    for extension in (".jsonl", ".csv", ".positions"):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return str(Path(archive_path).parent / f"{name}{STORE_KINDS[kind]['suffix']}")
+
+
+def print_records(title: str, records: List[Dict[str, Any]], limit: int):
+    """输出查询结果"""
+    print(f"\n{title}: 共 {len(records)} 条")
+    if not records:
+        return
+    print(f"{'日期':<12} {'证券代码':<14} {'名称':<10} {'数量':>14} {'价格':>10} {'市值':>18}")
+    shown = records if limit <= 0 else records[:limit]
+    for r in shown:
+        print(f"{r['date']:<12} {r['security']:<14} {r['security_name'][:8]:<10} "
+              f"{r['amount']:>14,.0f} {r['price']:>10.2f} {r['value']:>18,.2f}")
+    if len(shown) < len(records):
+        print(f"... 省略 {len(records) - len(shown)} 条（使用 --limit 0 显示全部）")
+
+
+def print_orders(title: str, records: List[Dict[str, Any]], limit: int):
+    """输出订单查询结果"""
+    print(f"\n{title}: 共 {len(records)} 笔")
+    if not records:
+        return
+    print(f"{'时间':<20} {'证券代码':<14} {'名称':<10} {'动作':<6} {'成交数量':>12} {'价格':>10} {'手续费':>12}")
+    shown = records if limit <= 0 else records[:limit]
+    for r in shown:
+        print(f"{r['time']:<20} {r['security']:<14} {r['security_name'][:8]:<10} {r['action']:<6} "
+              f"{r['filled']:>12,.0f} {r['price']:>10.2f} {r['commission']:>12,.2f}")
+    if len(shown) < len(records):
+        print(f"... 省略 {len(records) - len(shown)} 笔（使用 --limit 0 显示全部）")
+
+
+def query_orders(store: OrderStore, args):
+    """查询订单存储：某一天的订单，或单个证券在日期范围内的订单"""
+    if args.date:
+        print_orders(f"{args.date} 的成交订单", store.to_records(store.orders_on(args.date)), args.limit)
+
+    if args.security:
+        security_id = store.security_id(args.security)
+        if security_id is None:
+            print(f"\n警告: 存储中没有证券 {args.security}")
+            return
+        columns = store.load_columns(args.start_date, args.end_date)
+        mask = columns["security"] == security_id
+        selected = {name: values[mask] for name, values in columns.items()}
+        print_orders(f"{args.security} 的成交订单", store.to_records(selected), args.limit)
+
+
+def query_prices(panel: PricePanel, args):
+    """查询收盘价面板：某一天全部证券的收盘价，或单个证券在日期范围内的收盘价序列"""
+    limit = args.limit
+    if args.date:
+        columns = np.arange(len(panel.securities))
+        prices = panel.prices_on(args.date, columns)
+        valid = np.flatnonzero(~np.isnan(prices))
+        print(f"\n{args.date} 的收盘价: 共 {len(valid)} 只证券")
+        shown = valid if limit <= 0 else valid[:limit]
+        for i in shown.tolist():
+            print(f"{panel.securities[i]:<14} {prices[i]:>10.2f}")
+        if len(shown) < len(valid):
+            print(f"... 省略 {len(valid) - len(shown)} 条（使用 --limit 0 显示全部）")
+
+    if args.security:
+        column = int(panel.security_columns([args.security])[0])
+        if column < 0:
+            print(f"\n警告: 面板中没有证券 {args.security}")
+            return
+        ordinals = panel.date_ordinals(args.start_date, args.end_date)
+        lo = int(np.searchsorted(panel.dates, ordinals[0])) if len(ordinals) else 0
+        series = panel.close[lo:lo + len(ordinals), column]
+        print(f"\n{args.security} 的收盘价: 共 {len(ordinals)} 天")
+        count = len(ordinals) if limit <= 0 else min(limit, len(ordinals))
+        for ordinal, price in zip(ordinals[:count].tolist(), series[:count].tolist()):
+            print(f"{ordinal_to_date(ordinal):<12} {price:>10.2f}")
+        if count < len(ordinals):
+            print(f"... 省略 {len(ordinals) - count} 条（使用 --limit 0 显示全部）")
+
+
+def query_positions(store: PositionStore, args):
+    """查询持仓存储：某一天的全部持仓，或单个证券的持仓历史"""
+    if args.date:
+        print_records(f"{args.date} 的持仓", store.to_records(store.holdings_on(args.date)), args.limit)
+
+    if args.security:
+        if store.security_id(args.security) is None:
+            print(f"\n警告: 存储中没有证券 {args.security}")
+        else:
+            history = store.security_history(args.security, args.start_date, args.end_date)
+            print_records(f"{args.security} 的持仓历史", store.to_records(history), args.limit)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='构建与查询持仓/订单列式存储（按年分区，证券字典编码）及收盘价面板')
+    parser.add_argument('--input', help='持仓详情或订单JSONL文件、归档成员路径或回测归档；'
+                                        '收盘价面板的输入为持仓存储目录或CSV（指定时执行转换）')
+    parser.add_argument('--store', help='列式存储目录（默认: 输入文件同目录下的 <文件名>.positions、.orders 或 .prices）')
+    parser.add_argument('--kind', choices=['auto', 'positions', 'orders', 'prices'], default='auto',
+                        help='数据类型，auto 表示根据文件名或存储元数据判断 (默认: auto)')
+    parser.add_argument('--date', help='查询某一天的全部持仓、成交订单或收盘价 (YYYY-MM-DD)')
+    parser.add_argument('--security', help='查询单个证券的持仓历史、成交订单或收盘价序列，如 000001.XSHE')
+    parser.add_argument('--start_date', help='开始日期 (YYYY-MM-DD)，用于限制转换范围和按证券查询的范围')
+    parser.add_argument('--end_date', help='结束日期 (YYYY-MM-DD)，用于限制转换范围和按证券查询的范围')
+    parser.add_argument('--limit', type=int, default=20, help='查询结果最多显示的条数，0表示全部 (默认: 20)')
+
+    args = parser.parse_args()
+
+    if not args.input and not args.store:
+        print("错误: 请指定 --input（转换）或 --store（查询）")
+        return 1
+
+    kind = args.kind
+    if kind == 'auto':
+        kind = detect_kind(args.input or args.store)
+
+    store_dir = args.store
+    if args.input and kind == 'prices':
+        store_dir = store_dir or default_store_dir(args.input, kind)
+        print(f"构建收盘价面板: {args.input}")
+        start = time.perf_counter()
+        try:
+            meta = convert_prices(args.input, store_dir)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"错误: {e}")
+            return 1
+        elapsed = time.perf_counter() - start
+        print(f"已写入收盘价面板: {store_dir}")
+        print(f"  交易日数: {meta['rows']:,}，证券数: {len(meta['securities']):,}，"
+              f"日期范围: {meta['start_date']} ~ {meta['end_date']}，耗时 {elapsed:.2f} 秒")
+    elif args.input:
+        input_path = resolve_input(args.input, kind)
+        if input_path is None:
+            print(f"错误: 归档 {args.input} 中没有找到{STORE_KINDS[kind]['label']}文件")
+            return 1
+        store_dir = store_dir or default_store_dir(input_path, kind)
+
+        print(f"转换{STORE_KINDS[kind]['label']}: {input_path}")
+        convert = convert_orders if kind == 'orders' else convert_position_details
+        start = time.perf_counter()
+        try:
+            meta = convert(input_path, store_dir, args.start_date, args.end_date)
+        except FileNotFoundError as e:
+            print(f"错误: {e}")
+            return 1
+        elapsed = time.perf_counter() - start
+        print(f"已写入列式存储: {store_dir}")
+        print(f"  记录数: {meta['rows']:,}，证券数: {len(meta['securities']):,}，"
+              f"年份分区: {len(meta['years'])}，耗时 {elapsed:.2f} 秒")
+
+    if kind == 'prices':
+        try:
+            panel = PricePanel(store_dir)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"错误: {e}")
+            return 1
+        if not args.input:
+            print(f"收盘价面板: {store_dir}")
+            print(f"  交易日数: {panel.meta['rows']:,}，证券数: {len(panel.securities):,}，"
+                  f"日期范围: {panel.meta['start_date']} ~ {panel.meta['end_date']}")
+        query_prices(panel, args)
+        return 0
+
+    try:
+        store = OrderStore(store_dir) if kind == 'orders' else PositionStore(store_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+
+    if not args.input:
+        start_date, end_date = store.date_range()
+        print(f"列式存储: {store_dir}")
+        print(f"  记录数: {store.meta['rows']:,}，证券数: {len(store.securities):,}，日期范围: {start_date} ~ {end_date}")
+
+    if kind == 'orders':
+        query_orders(store, args)
+    else:
+        query_positions(store, args)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地聚宽回测接口模拟服务器（仅依赖标准库）
+
+模拟 BacktestDataDownloader 访问的两个接口，用于离线调试与性能测试：
+- POST /algorithm/backtest/result  返回合成的分页回测数据（benchmark、gains、orders、overallReturn）
+- GET  /algorithm/backtest/detail  返回包含回测名称（title-box）的详情页HTML
+
+可配置每次请求的延迟、每个回测的分页数以及随机失败率（返回503），
+结果由随机种子决定，保证多次运行可复现。
+
+使用方法:
+    python main.py fake_joinquant_server --port 8765 --pages 5 --latency 0.05 --failure-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+RESULT_PATH = "/algorithm/backtest/result"
+DETAIL_PATH = "/algorithm/backtest/detail"
+
+
+class SyntheticBacktestData:
+    """合成回测数据生成器：同一回测ID总是生成相同的数据"""
+
+    def __init__(self, pages: int = 5, page_size: int = 1000, start_date: str = "2009-01-05"):
+        """
+        初始化数据生成器
+
+        Args:
+            pages: 每个回测的数据分页数
+            page_size: 每页包含的交易日数量
+            start_date: 第一个交易日（YYYY-MM-DD）
+        """
+        self.pages = pages
+        self.page_size = page_size
+        self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        self.total_days = pages * page_size
+        self._timestamps = self._build_trading_timestamps()
+
+    def _build_trading_timestamps(self) -> List[int]:
+        """生成跳过周末的交易日时间戳（毫秒，当日16:00）"""
+        timestamps = []
+        current = self.start_date.replace(hour=16)
+        while len(timestamps) < self.total_days:
+            if current.weekday() < 5:
+                timestamps.append(int(current.timestamp() * 1000))
+            current += timedelta(days=1)
+        return timestamps
+
+    def get_page(self, backtest_id: str, offset: int) -> Dict[str, Any]:
+        """
+        获取指定offset开始的一页接口响应
+
+        Args:
+            backtest_id: 回测ID
+            offset: 偏移量（交易日序号）
+
+        Returns:
+            Dict: 与聚宽接口结构一致的响应
+        """
+        return json.loads(self._get_page_json(backtest_id, offset))
+
+    def get_page_bytes(self, backtest_id: str, offset: int) -> bytes:
+        """获取一页接口响应的JSON字节串（带缓存，避免服务端成为瓶颈）"""
+        return self._get_page_json(backtest_id, offset).encode("utf-8")
+
+    @lru_cache(maxsize=256)
+    def _get_page_json(self, backtest_id: str, offset: int) -> str:
+        start = max(offset, 0)
+        end = min(start + self.page_size, self.total_days)
+        times = self._timestamps[start:end] if start < self.total_days else []
+
+        seed = int(hashlib.md5(f"{backtest_id}:{start}".encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        overall, benchmark = self._cumulative_series(backtest_id, end)
+        overall = overall[start:end]
+        benchmark = benchmark[start:end]
+
+        earn = [round(rng.uniform(0, 2_000_000), 2) for _ in times]
+        lose = [round(-rng.uniform(0, 2_000_000), 2) for _ in times]
+        buy = [rng.randint(0, 100_000_000) for _ in times]
+        sell = [-rng.randint(0, 100_000_000) for _ in times]
+
+        result = {
+            "benchmark": {"time": times, "value": benchmark},
+            "gains": {
+                "earn": {"time": times, "value": earn},
+                "lose": {"time": times, "value": lose}
+            },
+            "orders": {
+                "buy": {"time": times, "value": buy},
+                "sell": {"time": times, "value": sell}
+            },
+            "overallReturn": {"time": times, "value": overall},
+            "offset": start,
+            "count": len(times)
+        }
+        return json.dumps({"status": "0", "code": "00000", "data": {"result": result}})
+
+    @lru_cache(maxsize=64)
+    def _cumulative_series(self, backtest_id: str, length: int):
+        """生成截至length的累积收益率序列（百分比）"""
+        seed = int(hashlib.md5(backtest_id.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        overall, benchmark = [], []
+        value, bench_value = 1.0, 1.0
+        for _ in range(length):
+            value *= 1 + rng.gauss(0.0005, 0.015)
+            bench_value *= 1 + rng.gauss(0.0002, 0.013)
+            overall.append(round((value - 1) * 100, 2))
+            benchmark.append(round((bench_value - 1) * 100, 2))
+        return overall, benchmark
+
+    def get_detail_html(self, backtest_id: str) -> str:
+        """生成回测详情页HTML"""
+        return (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>合成回测-{backtest_id[:8]} 回测详情</title></head>"
+            f"<body><span id=\"title-box\">合成回测-{backtest_id[:8]}</span></body></html>"
+        )
+
+
+class FakeJoinQuantHandler(BaseHTTPRequestHandler):
+    """模拟接口的请求处理器，配置由所属服务器提供"""
+
+    server_version = "FakeJoinQuant/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _simulate_network(self) -> bool:
+        """模拟延迟与随机失败，返回False表示本次请求已按失败处理"""
+        self.server.record_request()
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if self.server.should_fail():
+            self.server.record_failure()
+            self._send(503, b"Service Unavailable", "text/plain")
+            return False
+        return True
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record_bytes(len(body))
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        if parsed.path != RESULT_PATH:
+            self._send(404, b"Not Found", "text/plain")
+            return
+        if not self._simulate_network():
+            return
+
+        query = parse_qs(parsed.query)
+        backtest_id = query.get("backtestId", [""])[0]
+        try:
+            offset = int(query.get("offset", ["0"])[0])
+        except ValueError:
+            offset = 0
+        body = self.server.data.get_page_bytes(backtest_id, offset)
+        self._send(200, body, "application/json; charset=utf-8")
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != DETAIL_PATH:
+            self._send(404, b"Not Found", "text/plain")
+            return
+        if not self._simulate_network():
+            return
+
+        backtest_id = parse_qs(parsed.query).get("backtestId", [""])[0]
+        body = self.server.data.get_detail_html(backtest_id).encode("utf-8")
+        self._send(200, body, "text/html; charset=utf-8")
+
+
+class FakeJoinQuantServer(ThreadingHTTPServer):
+    """模拟聚宽接口的多线程HTTP服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, pages: int = 5, page_size: int = 1000,
+                 latency: float = 0.0, failure_rate: float = 0.0, seed: int = 42, verbose: bool = False):
+        """
+        初始化服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            pages: 每个回测的数据分页数
+            page_size: 每页交易日数量（与下载器的分页大小保持一致）
+            latency: 每次请求的固定延迟（秒）
+            failure_rate: 随机返回503的概率（0-1）
+            seed: 随机失败的种子
+            verbose: 是否输出访问日志
+        """
+        super().__init__((host, port), FakeJoinQuantHandler)
+        self.data = SyntheticBacktestData(pages=pages, page_size=page_size)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.failure_count = 0
+        self.bytes_sent = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """服务器根地址，如 http://127.0.0.1:8765"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    def record_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+
+    def record_bytes(self, size: int):
+        with self._lock:
+            self.bytes_sent += size
+
+    def start_background(self) -> "FakeJoinQuantServer":
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务器并释放端口"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地聚宽回测接口模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--pages', type=int, default=5, help='每个回测的数据分页数 (默认: 5)')
+    parser.add_argument('--page-size', type=int, default=1000, help='每页交易日数量 (默认: 1000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='每次请求的延迟秒数 (默认: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='随机返回503的概率 (默认: 0)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+
+    args = parser.parse_args()
+
+    server = FakeJoinQuantServer(
+        host=args.host,
+        port=args.port,
+        pages=args.pages,
+        page_size=args.page_size,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        verbose=args.verbose
+    )
+    print(f"模拟服务器已启动: {server.base_url}")
+    print(f"回测接口: {server.base_url}{RESULT_PATH}")
+    print(f"详情页面: {server.base_url}{DETAIL_PATH}")
+    print("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n共处理 {server.request_count} 个请求，其中失败 {server.failure_count} 个")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
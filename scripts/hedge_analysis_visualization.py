@@ -3,25 +3,48 @@
 对冲分析可视化脚本
 
 该脚本用于：
-1. 自动识别指定文件夹中的回测数据文件和仓位比例数据文件
+1. 自动识别指定文件夹中的回测数据文件和仓位比例数据文件（支持直接读取 tar.gz/zip 归档，无需解压）
 2. 计算与指定指数的对冲收益
 3. 绘制累积收益曲线，包括：
    - 所有回测数据的累积收益率
    - 每个回测数据与指定指数的对冲累积收益
    - 所有指数的累积收益
 
+计算按阶段组织：加载 → 日收益 → 对冲 → 累积收益 → 统计/区间统计 → 导出/渲染，每个中间结果只计算一次并复用
+（指数数据只加载一次，每个回测的数据和日收益率供所有指数的对冲共用），结束时输出各阶段耗时。
+每个回测的处理互不依赖，可用 --workers 分发到进程池并行计算，子进程只返回绘图和汇总所需的紧凑数据。
+每个回测和指数的计算结果缓存在 output/<输入目录名>/cache/ 下，清单记录输入文件的内容哈希；再次运行时只重新计算
+输入有变化的曲线，其余直接复用缓存，再汇总生成HTML和统计指标CSV（--no_cache 可强制全部重新计算）。
+点数超过 --max_points 的曲线用 LTTB 降采样后绘制，缩放时按可见范围切换到预生成的加密级别直至完整数据。
+报告中所有曲线共用一条日期轴，每条曲线只嵌入数值数组，可用 --compress_data 进一步压缩。
+报告图表下方的区间统计表在缩放后按可见日期范围在浏览器中重新计算（算法见 libs.range_statistics，调试模式下与
+returns_calculator 的结果逐项核对）。
+--debug 导出的中间数据由后台线程写出，不阻塞计算；--debug_format npz 改为 numpy 列式二进制格式，写出更快。
+报告通过相对路径引用共享的 output/assets/echarts.min.js，离线可用；本地文件不可用时回退到CDN。该文件只需准备一次：
+运行 python main.py install_echarts 下载，或用 --echarts_js 指定已有文件；--inline_echarts 将其嵌入HTML生成单文件报告。
+
 使用方法:
+    python main.py install_echarts  # 只需运行一次，之后报告可离线查看
     python hedge_analysis_visualization.py --input_dir /path/to/backtest/data --index zz500
+    python hedge_analysis_visualization.py --input_dir /path/to/backtest/data --index zz500,hs300 --workers 8
+    python hedge_analysis_visualization.py --input_dir /path/to/backtest/data --index zz500 --inline_echarts
 """
 
 import argparse
+import fnmatch
 import json
 import os
+import queue
 import re
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import Dict, List, Tuple, Optional
 import csv
 
@@ -32,17 +55,40 @@ import pandas as pd
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from libs.hedge_data_calc import calculate_hedge_data
-from libs.data_loader import load_backtest_data, load_index_data
+from libs.hedge_data_calc import calculate_hedge_records, prepare_backtest_daily_returns, prepare_position_frame
+from libs.archive_reader import is_archive, list_archive_members, make_member_path, set_member_cache_dir
+from libs.data_loader import load_backtest_data, load_index_data, load_position_data
+from libs.downsampling import lttb_zoom_levels
+from libs.echarts_asset import echarts_script_tag, install_echarts_asset
+from libs.range_statistics import (
+    RANGE_STATISTICS_JS,
+    STATISTICS_COLUMNS,
+    RangeSeries,
+    irregular_returns,
+    statistics_mismatches
+)
+from libs.report_cache import ReportCache
+from libs.report_encoding import PAYLOAD_DECODER_JS, align_series, encode_series_payload, legacy_payload_size
 from libs.returns_calculator import (
     calculate_daily_returns, 
     calculate_cumulative_returns,
     calculate_annualized_return,
     calculate_sharpe_ratio,
     calculate_max_drawdown,
-    calculate_longest_drawdown_recovery_period
+    calculate_longest_drawdown_recovery_period,
+    TIME_INTERVALS
 )
 
+# 每条曲线默认的目标绘制点数
+DEFAULT_MAX_POINTS = 1000
+
+# 调试数据导出格式，以及后台写出队列的长度（队列满时导出方法等待，限制尚未写出的数据占用的内存）
+DEBUG_FORMATS = ['csv', 'npz']
+DEBUG_EXPORT_QUEUE_SIZE = 16
+
+# 增量缓存中计算结果的版本，计算逻辑或结果格式变化时递增，使旧的缓存失效
+REPORT_CACHE_VERSION = 2
+
 
 class BacktestFileIdentifier:
     """回测文件识别器"""
@@ -62,6 +108,9 @@ class BacktestFileIdentifier:
         """
         识别目录中的回测数据文件和对应的持仓比例文件
         
+        目录中的回测归档（*.tar.gz、*.zip 等）会被当作子目录处理，归档内的文件
+        以 "<归档路径>::<成员名>" 形式返回，可直接传给 data_loader 读取，无需解压。
+        
         Returns:
             List[Dict]: 包含文件信息的列表，每个字典包含：
                 - backtest_file: 回测数据文件路径
@@ -70,45 +119,71 @@ class BacktestFileIdentifier:
                 - backtest_name: 回测名称
         """
         files_info = []
+        candidates = self._list_candidate_files()
         
         # 查找所有.jsonl文件（旧格式）与 *_daily_return_*.json（新格式）
-        backtest_files = list(self.input_dir.glob("*.jsonl"))
-        backtest_files += list(self.input_dir.glob("*_daily_return_*.json"))
+        backtest_files = [
+            (name, path) for name, path in candidates
+            if name.endswith('.jsonl') or fnmatch.fnmatch(name, "*_daily_return_*.json")
+        ]
 
         # 去重：同一回测ID只保留一个文件，优先使用新JSON格式
         files_by_id = {}
-        for bf in sorted(backtest_files, key=lambda p: p.name):
-            backtest_id = self._extract_backtest_id(bf.name)
+        for name, path in sorted(backtest_files):
+            backtest_id = self._extract_backtest_id(name)
             if not backtest_id:
                 continue
             # 如果已有该ID的文件且当前是jsonl，而已有的是json，则跳过
             prev = files_by_id.get(backtest_id)
             if prev:
                 # 优先保留.json（新结果文件）
-                if prev.suffix == '.json':
+                if prev[0].endswith('.json'):
                     continue
-                if bf.suffix == '.json':
-                    files_by_id[backtest_id] = bf
+                if name.endswith('.json'):
+                    files_by_id[backtest_id] = (name, path)
             else:
-                files_by_id[backtest_id] = bf
+                files_by_id[backtest_id] = (name, path)
         
-        for backtest_file in files_by_id.values():
+        for name, path in files_by_id.values():
             # 从文件名中提取回测ID
-            backtest_id = self._extract_backtest_id(backtest_file.name)
-            backtest_name = self._extract_backtest_name(backtest_file.name)
+            backtest_id = self._extract_backtest_id(name)
+            backtest_name = self._extract_backtest_name(name)
             
             # 查找对应的持仓比例文件
-            position_file = self._find_position_file(backtest_id)
+            position_file = self._find_position_file(backtest_id, candidates)
             
             files_info.append({
-                'backtest_file': str(backtest_file),
-                'position_file': str(position_file) if position_file else None,
+                'backtest_file': path,
+                'position_file': position_file,
                 'backtest_id': backtest_id,
                 'backtest_name': backtest_name
             })
         
         return files_info
     
+    def _list_candidate_files(self) -> List[Tuple[str, str]]:
+        """
+        列出目录中的普通文件和归档成员
+        
+        Returns:
+            List[Tuple[str, str]]: (文件名, 可读取的路径) 列表，归档成员的路径为 "<归档路径>::<成员名>"
+        """
+        candidates = []
+        for entry in sorted(self.input_dir.iterdir()):
+            if not entry.is_file():
+                continue
+            if is_archive(entry.name):
+                try:
+                    members = list_archive_members(str(entry))
+                except Exception as e:
+                    print(f"警告: 无法读取归档 {entry.name}: {e}")
+                    continue
+                for member in members:
+                    candidates.append((Path(member).name, make_member_path(str(entry), member)))
+            else:
+                candidates.append((entry.name, str(entry)))
+        return candidates
+    
     def _extract_backtest_id(self, filename: str) -> str:
         """
         从文件名中提取回测ID
@@ -157,28 +232,26 @@ class BacktestFileIdentifier:
         parts = base.split('_')
         return parts[0] if parts else base
     
-    def _find_position_file(self, backtest_id: str) -> Optional[Path]:
+    def _find_position_file(self, backtest_id: str, candidates: List[Tuple[str, str]]) -> Optional[str]:
         """
         查找对应的持仓比例文件
         
         Args:
             backtest_id: 回测ID
+            candidates: _list_candidate_files 返回的 (文件名, 路径) 列表
             
         Returns:
-            Optional[Path]: 持仓比例文件路径，如果不存在则返回None
+            Optional[str]: 持仓比例文件路径，如果不存在则返回None
         """
         # 支持带前缀的文件名，例如：<prefix>position_ratio_<id>.json
+        # 兼容旧格式：无前缀文件名 position_ratio_<id>.json 同样能被匹配
         pattern = f"*position_ratio_{backtest_id}.json"
-        matches = sorted(self.input_dir.glob(pattern))
+        matches = sorted(path for name, path in candidates if fnmatch.fnmatch(name, pattern))
         if matches:
             # 返回匹配到的第一个文件（按文件名排序）
             print(matches[0])
             return matches[0]
-
-        # 兼容旧格式：无前缀文件名
-        position_file = self.input_dir / f"position_ratio_{backtest_id}.json"
-        print(position_file)
-        return position_file if position_file.exists() else None
+        return None
 
 
 class IndexDataManager:
@@ -621,8 +694,8 @@ class StatisticsCalculator:
             # 计算夏普比率
             sharpe_ratio = calculate_sharpe_ratio(filtered_daily_returns, start_date=start_date, end_date=end_date)
             
-            # 计算最大回撤
-            max_drawdown = calculate_max_drawdown(filtered_cumulative_returns)
+            # 计算最大回撤（需要累积值，不是累积收益率）
+            max_drawdown = calculate_max_drawdown([100 + ret for ret in filtered_cumulative_returns])
             
             # 计算最大回撤的开始和结束日期
             try:
@@ -685,61 +758,114 @@ class StatisticsCalculator:
 
 
 class DebugDataExporter:
-    """调试数据导出器"""
+    """
+    调试数据导出器
+    
+    每条曲线的中间数据由后台线程写出：导出方法只把整理好的数据列放入有界队列（队列满时等待），
+    主流程继续计算，close() 等待全部写完。支持两种格式：
+    - csv: 每条曲线一个CSV文件（默认）
+    - npz: 每条曲线一个 numpy .npz 文件，每列一个数组（日期为字符串数组），读写都不经过逐行循环
+    统计指标汇总总是同步写出为CSV。
+    """
     
-    def __init__(self, debug_dir: Path):
+    def __init__(self, debug_dir: Path, debug_format: str = 'csv'):
         """
         初始化调试数据导出器
         
         Args:
             debug_dir: 调试数据输出目录
+            debug_format: 曲线数据的导出格式（csv 或 npz）
         """
+        if debug_format not in DEBUG_FORMATS:
+            raise ValueError(f"不支持的调试数据格式: {debug_format}，可选: {', '.join(DEBUG_FORMATS)}")
         self.debug_dir = debug_dir
+        self.debug_format = debug_format
         self.debug_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = None
+        self._writer = None
+    
+    def _submit(self, stem: str, columns: Dict[str, List], message: str):
+        """
+        将一个文件的写出任务放入队列（首次调用时启动后台写出线程）
         
+        Args:
+            stem: 输出文件名（不含扩展名）
+            columns: 列名到数据列的映射（按列顺序，各列等长）
+            message: 写出成功后打印的说明
+        """
+        if self._writer is None:
+            self._queue = queue.Queue(maxsize=DEBUG_EXPORT_QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._write_loop, name='debug-exporter', daemon=True)
+            self._writer.start()
+        self._queue.put((self.debug_dir / f"{stem}.{self.debug_format}", columns, message))
+    
+    def _write_loop(self):
+        """后台写出线程：依次写出队列中的文件，收到 None 时退出"""
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            filepath, columns, message = task
+            try:
+                if self.debug_format == 'npz':
+                    np.savez(filepath, **{name: np.asarray(column) for name, column in columns.items()})
+                else:
+                    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
+                        writer = csv.writer(csvfile)
+                        writer.writerow(list(columns))
+                        writer.writerows(zip(*columns.values()))
+                print(f"{message}: {filepath}")
+            except Exception as e:
+                print(f"警告: 导出调试数据失败 {filepath}: {e}")
+    
+    def close(self):
+        """等待后台线程写完所有已提交的文件"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+    
     def export_hedge_data(self, backtest_name: str, hedge_data: Dict, index_name: str):
         """
-        导出对冲数据到CSV文件
+        导出对冲数据
         
         Args:
             backtest_name: 回测名称
             hedge_data: 对冲数据
             index_name: 指数名称
         """
-        # 创建文件名
-        filename = f"{backtest_name}_{index_name}_hedge_debug.csv"
-        filepath = self.debug_dir / filename
-        
-        # 准备数据
-        export_data = []
-        for item in hedge_data['data']:
-            export_data.append({
-                'date': item['date'],
-                'backtest_return': item.get('return_backtest', 0),
-                'index_return': item.get('return_index', 0),
-                'hedge_return': item.get('hedge_return', 0),
-                'position_ratio': item.get('position_ratio', 0),
-                'cash': item.get('cash', 0),
-                'total_value': item.get('total_value', 0),
-                'net_value': item.get('net_value', 1)
-            })
-        
-        # 写入CSV文件
-        if export_data:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['date', 'backtest_return', 'index_return', 'hedge_return', 
-                             'position_ratio', 'cash', 'total_value', 'net_value']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(export_data)
-            
-            print(f"调试数据已导出: {filepath}")
+        records = hedge_data['data']
+        if not records:
+            return
+        columns = {
+            'date': [item['date'] for item in records],
+            'backtest_return': [item.get('return_backtest', 0) for item in records],
+            'index_return': [item.get('return_index', 0) for item in records],
+            'hedge_return': [item.get('hedge_return', 0) for item in records],
+            'position_ratio': [item.get('position_ratio', 0) for item in records],
+            'cash': [item.get('cash', 0) for item in records],
+            'total_value': [item.get('total_value', 0) for item in records],
+            'net_value': [item.get('net_value', 1) for item in records]
+        }
+        self._submit(f"{backtest_name}_{index_name}_hedge_debug", columns, "调试数据已导出")
+    
+    def _return_columns(self, dates: List[str], daily_returns: List[float],
+                        cumulative_returns: List[float]) -> Dict[str, List]:
+        """日期、日收益率、累积收益率三列，收益率不足日期长度时以0补齐"""
+        n = len(dates)
+        daily = list(daily_returns[:n])
+        cumulative = list(cumulative_returns[:n])
+        return {
+            'date': list(dates),
+            'daily_return': daily + [0] * (n - len(daily)),
+            'cumulative_return': cumulative + [0] * (n - len(cumulative))
+        }
     
     def export_cumulative_returns(self, backtest_name: str, dates: List[str], 
                                  daily_returns: List[float], cumulative_returns: List[float], 
                                  data_type: str):
         """
-        导出累积收益率数据到CSV文件
+        导出累积收益率数据
         
         Args:
             backtest_name: 回测名称
@@ -748,33 +874,15 @@ class DebugDataExporter:
             cumulative_returns: 累积收益率列表
             data_type: 数据类型（如：hedge, backtest, index）
         """
-        # 创建文件名
-        filename = f"{backtest_name}_{data_type}_cumulative_returns.csv"
-        filepath = self.debug_dir / filename
-        
-        # 准备数据
-        export_data = []
-        for i, date in enumerate(dates):
-            export_data.append({
-                'date': date,
-                'daily_return': daily_returns[i] if i < len(daily_returns) else 0,
-                'cumulative_return': cumulative_returns[i] if i < len(cumulative_returns) else 0
-            })
-        
-        # 写入CSV文件
-        if export_data:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['date', 'daily_return', 'cumulative_return']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(export_data)
-            
-            print(f"累积收益率数据已导出: {filepath}")
+        if not dates:
+            return
+        self._submit(f"{backtest_name}_{data_type}_cumulative_returns",
+                     self._return_columns(dates, daily_returns, cumulative_returns), "累积收益率数据已导出")
     
     def export_index_data(self, index_name: str, dates: List[str], 
                          daily_returns: List[float], cumulative_returns: List[float]):
         """
-        导出指数数据到CSV文件
+        导出指数数据
         
         Args:
             index_name: 指数名称
@@ -782,28 +890,10 @@ class DebugDataExporter:
             daily_returns: 日收益率列表
             cumulative_returns: 累积收益率列表
         """
-        # 创建文件名
-        filename = f"{index_name}_index_data.csv"
-        filepath = self.debug_dir / filename
-        
-        # 准备数据
-        export_data = []
-        for i, date in enumerate(dates):
-            export_data.append({
-                'date': date,
-                'daily_return': daily_returns[i] if i < len(daily_returns) else 0,
-                'cumulative_return': cumulative_returns[i] if i < len(cumulative_returns) else 0
-            })
-        
-        # 写入CSV文件
-        if export_data:
-            with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['date', 'daily_return', 'cumulative_return']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(export_data)
-            
-            print(f"指数数据已导出: {filepath}")
+        if not dates:
+            return
+        self._submit(f"{index_name}_index_data",
+                     self._return_columns(dates, daily_returns, cumulative_returns), "指数数据已导出")
     
     def export_statistics_summary(self, statistics_list: List[Dict]):
         """
@@ -835,15 +925,26 @@ class DebugDataExporter:
 class EChartsVisualizer:
     """ECharts可视化器"""
     
-    def __init__(self):
-        """初始化可视化器"""
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS, compress: bool = False, inline_echarts: bool = False):
+        """
+        初始化可视化器
+        
+        Args:
+            max_points: 每条曲线的目标绘制点数，超过时用 LTTB 降采样并按缩放级别预生成加密数据（0表示不降采样）
+            compress: 是否以 gzip+base64 压缩编码嵌入曲线数据（见 libs.report_encoding）
+            inline_echarts: 是否将本地 ECharts 文件嵌入HTML（见 libs.echarts_asset）
+        """
+        self.max_points = max_points
+        self.compress = compress
+        self.inline_echarts = inline_echarts
         self.chart_data = {
             'backtest_series': [],
             'hedge_series': [],
             'index_series': []
         }
     
-    def add_backtest_series(self, name: str, dates: List[str], returns: List[float]):
+    def add_backtest_series(self, name: str, dates: List[str], returns: List[float],
+                          daily_returns: Optional[List[float]] = None):
         """
         添加回测数据系列
         
@@ -851,28 +952,22 @@ class EChartsVisualizer:
             name: 系列名称
             dates: 日期列表（YYYYMMDD格式）
             returns: 累积收益率列表（百分比形式，如10.0表示10%的收益率）
+            daily_returns: 日收益率列表（百分比形式，可选，提供时报告中显示该曲线的区间统计指标）
         """
-        # 过滤掉无效数据并转换日期格式
-        valid_data = []
-        for date, ret in zip(dates, returns):
-            if ret is not None and not np.isnan(ret):
-                # 将YYYYMMDD格式转换为YYYY-MM-DD格式
-                if len(date) == 8 and date.isdigit():
-                    formatted_date = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
-                else:
-                    formatted_date = date  # 如果已经是正确格式，保持不变
-                valid_data.append([formatted_date, ret])
-        
+        # 日期在生成HTML时统一转换为YYYY-MM-DD格式并对齐到共享日期轴，无效数据在浏览器端跳过
         self.chart_data['backtest_series'].append({
             'name': f"回测-{name}",
             'type': 'line',
-            'data': valid_data,
+            'dates': dates,
+            'values': returns,
+            'daily_returns': daily_returns,
             'smooth': True,
             'symbol': 'none',  # 移除数据点
             'lineStyle': {'width': 1}
         })
     
-    def add_hedge_series(self, name: str, dates: List[str], returns: List[float]):
+    def add_hedge_series(self, name: str, dates: List[str], returns: List[float],
+                          daily_returns: Optional[List[float]] = None):
         """
         添加对冲数据系列
         
@@ -880,23 +975,21 @@ class EChartsVisualizer:
             name: 系列名称
             dates: 日期列表
             returns: 累积收益率列表（百分比形式，如10.0表示10%的收益率）
+            daily_returns: 日收益率列表（百分比形式，可选，提供时报告中显示该曲线的区间统计指标）
         """
-        # 过滤掉无效数据
-        valid_data = []
-        for date, ret in zip(dates, returns):
-            if ret is not None and not np.isnan(ret):
-                valid_data.append([date, ret])
-        
         self.chart_data['hedge_series'].append({
             'name': f"对冲-{name}",
             'type': 'line',
-            'data': valid_data,
+            'dates': dates,
+            'values': returns,
+            'daily_returns': daily_returns,
             'smooth': True,
             'symbol': 'none',  # 移除数据点
             'lineStyle': {'width': 1, 'type': 'dashed'}
         })
     
-    def add_index_series(self, name: str, dates: List[str], returns: List[float]):
+    def add_index_series(self, name: str, dates: List[str], returns: List[float],
+                          daily_returns: Optional[List[float]] = None):
         """
         添加指数数据系列
         
@@ -904,17 +997,14 @@ class EChartsVisualizer:
             name: 系列名称
             dates: 日期列表
             returns: 累积收益率列表（百分比形式，如10.0表示10%的收益率）
+            daily_returns: 日收益率列表（百分比形式，可选，提供时报告中显示该曲线的区间统计指标）
         """
-        # 过滤掉无效数据
-        valid_data = []
-        for date, ret in zip(dates, returns):
-            if ret is not None and not np.isnan(ret):
-                valid_data.append([date, ret])
-        
         self.chart_data['index_series'].append({
             'name': f"指数-{name}",
             'type': 'line',
-            'data': valid_data,
+            'dates': dates,
+            'values': returns,
+            'daily_returns': daily_returns,
             'smooth': True,
             'symbol': 'none',  # 移除数据点
             'lineStyle': {'width': 1}
@@ -933,13 +1023,38 @@ class EChartsVisualizer:
                      self.chart_data['hedge_series'] + 
                      self.chart_data['index_series'])
         
+        # 所有曲线对齐到共享日期轴，只嵌入一次日期和每条曲线的数值数组
+        dates, values = align_series([series['dates'] for series in all_series],
+                                     [series['values'] for series in all_series])
+        series_options = [{key: value for key, value in series.items()
+                           if key not in ('dates', 'values', 'daily_returns')}
+                          for series in all_series]
+        series_types = (['backtest'] * len(self.chart_data['backtest_series']) +
+                        ['hedge'] * len(self.chart_data['hedge_series']) +
+                        ['index'] * len(self.chart_data['index_series']))
+        
+        # 降采样：对每条曲线的有效点计算各缩放级别，记录为日期轴上的下标，初始显示最粗的级别
+        # 区间统计：浏览器由累积收益率还原日收益率，只嵌入无法还原的日收益率；日期重复等导致无法对齐的曲线不显示区间统计
+        zoom_levels = []
+        range_series = []
+        for series, series_type, row in zip(all_series, series_types, values):
+            valid = np.flatnonzero(~np.isnan(row))
+            zoom_levels.append([valid[level] for level in lttb_zoom_levels(row[valid], self.max_points)])
+            daily_returns = series['daily_returns']
+            if daily_returns is not None and len(daily_returns) == len(valid):
+                range_series.append({'type': series_type, 'irregular_returns': irregular_returns(row[valid], daily_returns)})
+            else:
+                range_series.append(None)
+        payload = encode_series_payload(dates, values, zoom_levels, self.compress)
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        
         html_template = f"""
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
     <title>{title}</title>
-    <script src="https://cdn.jsdelivr.net/npm/echarts@5.0.0/dist/echarts.min.js"></script>
+    {echarts_script_tag(output_file, inline=self.inline_echarts)}
     <style>
         body {{
             font-family: Arial, sans-serif;
@@ -955,6 +1070,21 @@ class EChartsVisualizer:
             background-color: #f5f5f5;
             border-radius: 5px;
         }}
+        table {{
+            border-collapse: collapse;
+            font-size: 13px;
+        }}
+        th, td {{
+            border: 1px solid #ddd;
+            padding: 4px 8px;
+            text-align: right;
+        }}
+        th {{
+            background-color: #f5f5f5;
+        }}
+        td:first-child, td:nth-child(2) {{
+            text-align: left;
+        }}
     </style>
 </head>
 <body>
@@ -964,6 +1094,11 @@ class EChartsVisualizer:
         <p>包含 {len(self.chart_data['backtest_series'])} 个回测策略, {len(self.chart_data['hedge_series'])} 个对冲策略, {len(self.chart_data['index_series'])} 个指数</p>
     </div>
     <div id="chart"></div>
+    <h2>区间统计 <span id="statistics-range"></span></h2>
+    <table>
+        <thead><tr>{''.join(f'<th>{label}</th>' for _, label in STATISTICS_COLUMNS)}</tr></thead>
+        <tbody id="statistics"></tbody>
+    </table>
     
     <script>
         var chartDom = document.getElementById('chart');
@@ -1029,10 +1164,84 @@ class EChartsVisualizer:
                     formatter: '{{value}}%'
                 }}
             }},
-            series: {json.dumps(all_series, ensure_ascii=False)}
+            series: []
         }};
         
-        myChart.setOption(option);
+        var targetPoints = {self.max_points};
+        var seriesOptions = {json.dumps(series_options, ensure_ascii=False)};
+        var payload = {payload_json};
+        var rangeSeriesOptions = {json.dumps(range_series, ensure_ascii=False)};
+        var statisticsColumns = {json.dumps([key for key, _ in STATISTICS_COLUMNS])};
+        {PAYLOAD_DECODER_JS.strip()}
+        {RANGE_STATISTICS_JS.strip()}
+        
+        decodeSeriesPayload(payload).then(function(data) {{
+            // 有降采样级别的曲线初始显示最粗的级别
+            var currentLevels = data.levels.map(function() {{ return 0; }});
+            option.series = seriesOptions.map(function(series, i) {{
+                var levels = data.levels[i];
+                return Object.assign({{}}, series, {{
+                    data: seriesPoints(data.dates, data.values[i], levels.length ? levels[0] : null)
+                }});
+            }});
+            myChart.setOption(option);
+            
+            // 区间统计：前缀数组在加载时计算一次，缩放停止后按可见日期范围重新计算
+            var rangeSeries = rangeSeriesOptions.map(function(options, i) {{
+                return options ? buildRangeSeries(data.dates, data.values[i], options.irregular_returns) : null;
+            }});
+            var firstDay = data.dates.length ? dayNumber(data.dates[0]) : 0;
+            var lastDay = data.dates.length ? dayNumber(data.dates[data.dates.length - 1]) : 0;
+            function updateStatistics(startDay, endDay) {{
+                var rows = [];
+                rangeSeries.forEach(function(series, i) {{
+                    if (!series) {{
+                        return;
+                    }}
+                    var item = rangeStatistics(series, startDay, endDay);
+                    item.name = seriesOptions[i].name;
+                    item.type = rangeSeriesOptions[i].type;
+                    rows.push('<tr>' + statisticsColumns.map(function(key) {{ return '<td>' + item[key] + '</td>'; }}).join('') + '</tr>');
+                }});
+                document.getElementById('statistics').innerHTML = rows.join('');
+                document.getElementById('statistics-range').textContent = data.dates.length ?
+                    new Date(startDay * 86400000).toISOString().slice(0, 10) + ' 至 ' +
+                    new Date(endDay * 86400000).toISOString().slice(0, 10) : '';
+            }}
+            updateStatistics(firstDay, lastDay);
+            var statisticsTimer = null;
+            
+            // 缩放时按可见范围占比切换降采样级别，保证可见点数不少于目标点数，放大到足够小的范围时显示完整数据
+            myChart.on('datazoom', function() {{
+                var zoom = myChart.getOption().dataZoom[0];
+                clearTimeout(statisticsTimer);
+                statisticsTimer = setTimeout(function() {{
+                    var span = lastDay - firstDay;
+                    updateStatistics(Math.ceil(firstDay + span * zoom.start / 100 - 1e-6),
+                                     Math.floor(firstDay + span * zoom.end / 100 + 1e-6));
+                }}, 200);
+                var fraction = Math.max((zoom.end - zoom.start) / 100, 1e-6);
+                var changed = false;
+                var updates = data.levels.map(function(levels, i) {{
+                    var level = levels.length;
+                    for (var k = 0; k < levels.length; k++) {{
+                        if (levels[k].length * fraction >= targetPoints) {{
+                            level = k;
+                            break;
+                        }}
+                    }}
+                    if (level === currentLevels[i]) {{
+                        return {{}};
+                    }}
+                    currentLevels[i] = level;
+                    changed = true;
+                    return {{data: seriesPoints(data.dates, data.values[i], level < levels.length ? levels[level] : null)}};
+                }});
+                if (changed) {{
+                    myChart.setOption({{series: updates}});
+                }}
+            }});
+        }});
         
         // 响应式调整
         window.addEventListener('resize', function() {{
@@ -1047,6 +1256,461 @@ class EChartsVisualizer:
             f.write(html_template)
         
         print(f"可视化文件已生成: {output_file}")
+        print(f"  文件大小: {os.path.getsize(output_file) / 1024:.1f} KB，曲线数据: {len(payload_json.encode('utf-8')) / 1024:.1f} KB"
+              f"（逐点嵌入约 {legacy_payload_size(dates, values) / 1024:.1f} KB）")
+
+
+# 执行计划的阶段，按依赖顺序：缓存 → 加载 → 日收益 → 对冲 → 累积收益 → 统计/区间统计 → 导出/渲染
+PIPELINE_STAGES = ['缓存', '加载', '日收益', '对冲', '累积收益', '统计', '区间统计', '导出', '渲染']
+
+
+class StageTimer:
+    """按执行阶段累计耗时与执行次数"""
+    
+    def __init__(self):
+        """初始化计时器"""
+        self.timings: Dict[str, List[float]] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """
+        统计一次阶段执行的耗时
+        
+        Args:
+            name: 阶段名称（见 PIPELINE_STAGES）
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.timings.setdefault(name, [0.0, 0])
+            entry[0] += time.perf_counter() - start
+            entry[1] += 1
+    
+    def merge(self, timings: Dict[str, List[float]]):
+        """
+        合并其他计时器（例如子进程返回）的耗时
+        
+        Args:
+            timings: 其他 StageTimer 的 timings
+        """
+        for name, (seconds, count) in timings.items():
+            entry = self.timings.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += count
+    
+    def report(self, elapsed: float, workers: int):
+        """
+        输出各阶段耗时汇总
+        
+        Args:
+            elapsed: 总耗时（秒）
+            workers: 处理回测的进程数
+        """
+        note = f"（{workers} 个进程并行，回测相关阶段为各进程累计）" if workers > 1 else ""
+        print(f"\n各阶段耗时{note}:")
+        names = [name for name in PIPELINE_STAGES if name in self.timings]
+        names += [name for name in self.timings if name not in PIPELINE_STAGES]
+        for name in names:
+            seconds, count = self.timings[name]
+            print(f"  {name}: {seconds:.2f} 秒（{count} 次）")
+        print(f"  总耗时: {elapsed:.2f} 秒")
+
+
+def check_range_statistics(series_list: List[Tuple[str, str, List[str], np.ndarray, np.ndarray, List[Dict]]]) -> int:
+    """
+    核对前缀数组区间统计（报告页面和本地报告服务使用）与 returns_calculator 计算的总体和时间区间统计指标
+    
+    Args:
+        series_list: 每条曲线的 (名称, 类型, 日期, 日收益率, 累积收益率, 统计记录)，统计记录为计算该曲线时
+            calculate_statistics 和 calculate_time_interval_statistics 的结果（不同回测可能同名，不能按名称跨曲线查找）
+        
+    Returns:
+        int: 不一致的统计记录数
+    """
+    checked = failed = 0
+    for name, data_type, dates, daily_returns, cumulative_returns, records in series_list:
+        if not len(dates):
+            continue
+        expected_by_name = {item['name']: item for item in records}
+        range_series = RangeSeries(name, data_type, dates, daily_returns, cumulative_returns)
+        ranges = [(name, None, None)]
+        # 由多个日期段组成的时间区间不是连续区间，不参与核对
+        ranges.extend((f"{name}_{interval_name}", periods[0][0], periods[0][1])
+                      for interval_name, periods in TIME_INTERVALS.items() if len(periods) == 1)
+        for record_name, start, end in ranges:
+            expected = expected_by_name.get(record_name)
+            if not expected or not expected['trading_days']:
+                continue
+            checked += 1
+            mismatches = statistics_mismatches(expected, range_series.statistics(start, end))
+            if mismatches:
+                failed += 1
+                print(f"警告: 区间统计不一致 {record_name}: {'; '.join(mismatches)}")
+    print(f"区间统计核对: {checked} 条统计记录，{failed} 条不一致")
+    return failed
+
+
+def calculate_hedge_cumulative_returns(hedge_returns: List[float]) -> np.ndarray:
+    """
+    由对冲日收益率计算累积收益率
+    
+    Args:
+        hedge_returns: 对冲日收益率列表（百分比形式）
+        
+    Returns:
+        np.ndarray: 累积收益率数组（百分比形式），与逐日连乘 100 * (1 + r / 100) 的结果一致
+    """
+    growth = np.concatenate([[100.0], 1.0 + np.asarray(hedge_returns, dtype=np.float64) / 100.0])
+    return np.cumprod(growth)[1:] - 100.0
+
+
+def restore_backtest_result(artifact: Dict) -> Dict:
+    """
+    将缓存中的回测产物还原为 process_backtest 的返回格式
+    
+    Args:
+        artifact: ReportCache.load 读取的产物
+        
+    Returns:
+        Dict: 收益率还原为 float64 数组，耗时 timings 为空（缓存命中不计入各计算阶段）
+    """
+    for series in [artifact] + artifact['hedges']:
+        series['daily_returns'] = np.asarray(series['daily_returns'], dtype=np.float64)
+        series['cumulative_returns'] = np.asarray(series['cumulative_returns'], dtype=np.float64)
+    artifact['timings'] = {}
+    return artifact
+
+
+def init_worker(archive_cache_dir: Optional[str]):
+    """进程池子进程初始化：沿用主进程的归档成员缓存设置"""
+    if archive_cache_dir:
+        set_member_cache_dir(archive_cache_dir)
+
+
+def process_backtest(file_info: Dict[str, str], hedge_indices: Dict[str, List[Dict]],
+                     debug_dir: Optional[str] = None, debug_format: str = 'csv') -> Dict:
+    """
+    处理单个回测：加载数据、计算日收益、与各指数的对冲收益，以及总体和时间区间统计指标
+    
+    回测数据、持仓数据和回测日收益率各只计算一次，供所有指数的对冲复用。
+    可在进程池的子进程中运行，只返回绘图和汇总所需的数据，累积收益以 float64 数组返回。
+    
+    Args:
+        file_info: BacktestFileIdentifier.identify_files 返回的文件信息
+        hedge_indices: 指数名称到指数数据（主进程已加载，只含 date 和 pctChg）的映射
+        debug_dir: 调试数据输出目录（可选，指定时导出中间数据）
+        debug_format: 调试数据导出格式（csv 或 npz）
+        
+    Returns:
+        Dict: 包含 backtest_name、dates、daily_returns、cumulative_returns、start_date（YYYY-MM-DD）、
+              hedges（每个指数的 name、dates、daily_returns、cumulative_returns）、statistics、interval_statistics
+              以及各阶段耗时 timings
+    """
+    backtest_name = file_info['backtest_name']
+    print(f"处理: {backtest_name}, {file_info['position_file']}")
+    timer = StageTimer()
+    stats_calculator = StatisticsCalculator()
+    debug_exporter = DebugDataExporter(Path(debug_dir), debug_format) if debug_dir else None
+    
+    # 加载回测数据并计算日收益率
+    with timer.stage('加载'):
+        backtest_data = load_backtest_data(file_info['backtest_file'])
+    with timer.stage('日收益'):
+        backtest_viz_data = prepare_backtest_data_for_visualization(backtest_data)
+    dates = backtest_viz_data['dates']
+    
+    # 调试输出：导出回测数据
+    if debug_exporter:
+        with timer.stage('导出'):
+            debug_exporter.export_cumulative_returns(
+                backtest_name,
+                dates,
+                backtest_viz_data['daily_returns'],
+                backtest_viz_data['cumulative_returns'],
+                "backtest"
+            )
+    
+    # 计算回测数据的总体和时间区间统计指标
+    with timer.stage('统计'):
+        statistics = [stats_calculator.calculate_statistics(
+            backtest_viz_data['daily_returns'],
+            backtest_viz_data['cumulative_returns'],
+            backtest_name,
+            'backtest',
+            dates
+        )]
+    with timer.stage('区间统计'):
+        interval_statistics = stats_calculator.calculate_time_interval_statistics(
+            backtest_viz_data['daily_returns'],
+            backtest_viz_data['cumulative_returns'],
+            backtest_name,
+            'backtest',
+            dates
+        )
+    
+    # 回测起始日期(YYYY-MM-DD)
+    formatted_dates = [f"{d[:4]}-{d[4:6]}-{d[6:8]}" if len(d) == 8 and d.isdigit() else d for d in dates if d]
+    start_date = min(formatted_dates) if formatted_dates else None
+    
+    # 对冲输入（持仓数据、按日期排序的回测日收益率）对所有指数只准备一次
+    hedges = []
+    backtest_returns = position_frame = None
+    if hedge_indices:
+        try:
+            with timer.stage('加载'):
+                position_file = file_info['position_file']
+                position_data = load_position_data(position_file) if position_file else None
+            with timer.stage('日收益'):
+                backtest_returns = prepare_backtest_daily_returns(backtest_data)
+                position_frame = prepare_position_frame(position_data)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"警告: 准备对冲数据失败 {backtest_name}: {e}")
+    
+    for index_name, index_data in hedge_indices.items():
+        if backtest_returns is None:
+            break
+        hedge_name = f"{backtest_name}-{index_name}"
+        try:
+            with timer.stage('对冲'):
+                hedge_records = calculate_hedge_records(backtest_returns, index_data, position_frame)
+            
+            # hedge_return已经是百分比形式，不需要再乘以100
+            hedge_returns = [item['hedge_return'] for item in hedge_records]
+            hedge_dates = [item['date'] for item in hedge_records]
+            with timer.stage('累积收益'):
+                hedge_cumulative = calculate_hedge_cumulative_returns(hedge_returns)
+                hedge_cumulative_list = hedge_cumulative.tolist()
+            
+            # 调试输出：导出对冲数据
+            if debug_exporter:
+                with timer.stage('导出'):
+                    debug_exporter.export_hedge_data(backtest_name, {'data': hedge_records}, index_name)
+                    debug_exporter.export_cumulative_returns(
+                        backtest_name,
+                        hedge_dates,
+                        hedge_returns,
+                        hedge_cumulative_list,
+                        f"hedge_{index_name}"
+                    )
+            
+            # 计算对冲数据的总体和时间区间统计指标
+            with timer.stage('统计'):
+                statistics.append(stats_calculator.calculate_statistics(
+                    hedge_returns,
+                    hedge_cumulative_list,
+                    hedge_name,
+                    'hedge',
+                    hedge_dates
+                ))
+            with timer.stage('区间统计'):
+                interval_statistics.extend(stats_calculator.calculate_time_interval_statistics(
+                    hedge_returns,
+                    hedge_cumulative_list,
+                    hedge_name,
+                    'hedge',
+                    hedge_dates
+                ))
+            hedges.append({'name': hedge_name, 'dates': hedge_dates,
+                           'daily_returns': np.asarray(hedge_returns, dtype=np.float64),
+                           'cumulative_returns': hedge_cumulative})
+            
+        except Exception as e:
+            traceback.print_exc()
+            print(f"警告: 计算对冲数据失败 {hedge_name}: {e}")
+    
+    # 返回前等待调试数据写完
+    if debug_exporter:
+        with timer.stage('导出'):
+            debug_exporter.close()
+    
+    return {
+        'backtest_name': backtest_name,
+        'dates': dates,
+        'daily_returns': np.asarray(backtest_viz_data['daily_returns'], dtype=np.float64),
+        'cumulative_returns': np.asarray(backtest_viz_data['cumulative_returns'], dtype=np.float64),
+        'start_date': start_date,
+        'hedges': hedges,
+        'statistics': statistics,
+        'interval_statistics': interval_statistics,
+        'timings': timer.timings
+    }
+
+
+class ReportSeriesCollector:
+    """
+    按增量缓存收集报告中的各条曲线：回测（含各指数对冲）和指数
+    
+    输入文件内容哈希与缓存签名一致的曲线直接复用缓存，其余重新计算后写入缓存；
+    指数数据只在需要计算时加载一次。对冲分析报告和本地报告服务共用。
+    """
+    
+    def __init__(self, index_manager: IndexDataManager, cache: ReportCache, timer: StageTimer):
+        """
+        初始化收集器
+        
+        Args:
+            index_manager: 指数数据管理器
+            cache: 增量缓存
+            timer: 阶段计时器
+        """
+        self.index_manager = index_manager
+        self.cache = cache
+        self.timer = timer
+        self.all_indices_data: Optional[Dict[str, List[Dict]]] = None
+        # 最近一次 collect_backtests 实际使用的进程数
+        self.workers = 1
+        
+        # 指数文件的内容哈希（按可用指数顺序）
+        self.index_digests = {}
+        with timer.stage('缓存'):
+            for index_name in index_manager.get_available_indices():
+                index_file = index_manager.get_index_file(index_name)
+                if index_file:
+                    self.index_digests[index_name] = cache.file_digest(index_file)
+    
+    def load_indices_data(self) -> Dict[str, List[Dict]]:
+        """加载所有指数数据（只加载一次）"""
+        if self.all_indices_data is None:
+            print("正在加载指数数据...")
+            with self.timer.stage('加载'):
+                self.all_indices_data = self.index_manager.load_all_indices_data()
+        return self.all_indices_data
+    
+    def collect_backtests(self, files_info: List[Dict[str, str]], specified_indices: List[str], workers: int = 1,
+                          debug_dir: Optional[str] = None, archive_cache_dir: Optional[str] = None,
+                          debug_format: str = 'csv') -> List[Dict]:
+        """
+        收集所有回测的计算结果（加载、日收益、各指数对冲、累积收益、总体和时间区间统计）
+        
+        Args:
+            files_info: BacktestFileIdentifier.identify_files 返回的文件信息
+            specified_indices: 对冲指数名称列表
+            workers: 计算回测的进程数
+            debug_dir: 调试数据输出目录（可选）
+            archive_cache_dir: 归档成员缓存目录（可选，传给子进程）
+            debug_format: 调试数据导出格式（csv 或 npz）
+            
+        Returns:
+            List[Dict]: 按 files_info 顺序的 process_backtest 结果（缓存命中的结果 timings 为空）
+        """
+        cache = self.cache
+        with self.timer.stage('缓存'):
+            hedge_digests = {index_name: self.index_digests.get(index_name) for index_name in specified_indices}
+            signatures = []
+            results = []
+            for file_info in files_info:
+                signature = {
+                    'version': REPORT_CACHE_VERSION,
+                    'backtest_file': cache.file_digest(file_info['backtest_file']),
+                    'position_file': cache.file_digest(file_info['position_file']),
+                    'hedge_indices': hedge_digests
+                }
+                signatures.append(signature)
+                artifact = cache.load('backtests', file_info['backtest_file'], signature)
+                results.append(restore_backtest_result(artifact) if artifact else None)
+        pending = [i for i, result in enumerate(results) if result is None]
+        print(f"增量缓存: 复用 {len(files_info) - len(pending)} 个回测的计算结果，需要计算 {len(pending)} 个")
+        
+        # 只在有回测需要计算时加载指数数据，对冲计算只需要日期和涨跌幅
+        hedge_indices = {}
+        if pending:
+            all_indices_data = self.load_indices_data()
+            hedge_indices = {
+                index_name: [{'date': item.get('date', ''), 'pctChg': item.get('pctChg', 0)}
+                             for item in all_indices_data[index_name]]
+                for index_name in specified_indices if index_name in all_indices_data
+            }
+        
+        pending_files = [files_info[i] for i in pending]
+        workers = self.workers = max(1, min(workers, len(pending_files)))
+        if workers > 1:
+            print(f"正在并行处理回测数据（{workers} 个进程）...")
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(archive_cache_dir,)) as executor:
+                computed = list(executor.map(process_backtest, pending_files, repeat(hedge_indices), repeat(debug_dir),
+                                             repeat(debug_format)))
+        elif pending_files:
+            print("正在处理回测数据...")
+            computed = [process_backtest(file_info, hedge_indices, debug_dir, debug_format) for file_info in pending_files]
+        else:
+            computed = []
+        
+        with self.timer.stage('缓存'):
+            for i, result in zip(pending, computed):
+                results[i] = result
+                cache.store('backtests', files_info[i]['backtest_file'], signatures[i],
+                            {key: value for key, value in result.items() if key != 'timings'})
+            cache.prune('backtests', [file_info['backtest_file'] for file_info in files_info])
+        return results
+    
+    def collect_indices(self, start_date: Optional[str], stats_calculator: StatisticsCalculator,
+                        debug_exporter: Optional[DebugDataExporter] = None) -> List[Tuple[str, Dict]]:
+        """
+        收集所有指数的日收益、累积收益、总体和时间区间统计指标（指数文件和起始日期未变时复用缓存）
+        
+        Args:
+            start_date: 报告起始日期（最早的回测起始日期，YYYY-MM-DD）
+            stats_calculator: 统计指标计算器
+            debug_exporter: 调试数据导出器（可选）
+            
+        Returns:
+            List[Tuple[str, Dict]]: (指数名称, 产物) 列表，产物包含 dates、daily_returns、cumulative_returns、
+                                    statistics、interval_statistics
+        """
+        cache = self.cache
+        timer = self.timer
+        index_results = []
+        for index_name, index_digest in self.index_digests.items():
+            index_signature = {'version': REPORT_CACHE_VERSION, 'index_file': index_digest, 'start_date': start_date}
+            with timer.stage('缓存'):
+                index_artifact = cache.load('indices', index_name, index_signature)
+            
+            if index_artifact is None:
+                all_indices_data = self.load_indices_data()
+                if index_name not in all_indices_data:
+                    continue
+                index_data = all_indices_data[index_name]
+                with timer.stage('日收益'):
+                    index_viz_data = prepare_index_data_for_visualization(index_data, start_date=start_date)
+                
+                # 调试输出：导出指数数据
+                if debug_exporter:
+                    with timer.stage('导出'):
+                        debug_exporter.export_index_data(
+                            index_name,
+                            index_viz_data['dates'],
+                            index_viz_data['daily_returns'],
+                            index_viz_data['cumulative_returns']
+                        )
+                
+                # 计算指数数据统计指标
+                with timer.stage('统计'):
+                    index_stats = stats_calculator.calculate_statistics(
+                        index_viz_data['daily_returns'],
+                        index_viz_data['cumulative_returns'],
+                        index_name,
+                        'index',
+                        index_viz_data['dates']
+                    )
+                
+                with timer.stage('区间统计'):
+                    index_intervals = stats_calculator.calculate_time_interval_statistics(
+                        index_viz_data['daily_returns'],
+                        index_viz_data['cumulative_returns'],
+                        index_name,
+                        'index',
+                        index_viz_data['dates']
+                    )
+                index_artifact = dict(index_viz_data, statistics=index_stats, interval_statistics=index_intervals)
+                with timer.stage('缓存'):
+                    cache.store('indices', index_name, index_signature, index_artifact)
+            
+            index_results.append((index_name, index_artifact))
+        with timer.stage('缓存'):
+            cache.prune('indices', self.index_digests)
+        return index_results
 
 
 def main():
@@ -1056,8 +1720,25 @@ def main():
     parser.add_argument('--index', required=True, help='指定的对冲指数名称，支持多个指数用逗号分隔（如：zz500 或 zz500,hs300）')
     parser.add_argument('--output', default=None, help='输出HTML文件路径（默认在输出目录下生成 <输入目录名>_hedge_analysis_visualization.html）')
     parser.add_argument('--index_data_dir', default='index_data', help='指数数据目录路径')
-    parser.add_argument('--debug', action='store_true', help='启用调试模式，输出中间数据到CSV文件')
+    parser.add_argument('--debug', action='store_true', help='启用调试模式，输出中间数据到 debug_data/ 目录')
+    parser.add_argument('--debug_format', choices=DEBUG_FORMATS, default='csv',
+                        help='调试模式中间数据的格式：csv（默认）或 npz（numpy 列式二进制，写出更快）')
     parser.add_argument('--no_hedge', action='store_true', help='不绘制对冲曲线')
+    parser.add_argument('--archive_cache_dir', default=None,
+                        help='归档成员解压缓存目录（input_dir 中包含 tar.gz/zip 归档时使用，默认不缓存，每次流式解压）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'并行处理回测的进程数（默认: 1，即在主进程中依次处理；本机CPU核数: {os.cpu_count()}）')
+    parser.add_argument('--max_points', type=int, default=DEFAULT_MAX_POINTS,
+                        help=f'每条曲线的目标绘制点数，超过时降采样并在缩放时逐级加密（默认: {DEFAULT_MAX_POINTS}，0表示不降采样）')
+    parser.add_argument('--compress_data', action='store_true',
+                        help='以 gzip+base64 压缩编码嵌入曲线数据，由浏览器解压（需要支持 DecompressionStream 的浏览器）')
+    parser.add_argument('--no_cache', action='store_true',
+                        help='不复用 output/<输入目录名>/cache/ 中的计算结果，全部重新计算（仍会更新缓存；--debug 时同样不复用）')
+    parser.add_argument('--echarts_js', default=None,
+                        help='本地 echarts.min.js 文件路径，复制到 output/assets/ 供所有报告共用（只需指定一次）')
+    parser.add_argument('--inline_echarts', action='store_true',
+                        help='将本地 ECharts 文件嵌入HTML，生成可单独拷贝、离线打开的单文件报告'
+                             '（需先运行 python main.py install_echarts 或指定 --echarts_js）')
     
     args = parser.parse_args()
     
@@ -1093,18 +1774,34 @@ def main():
     # 确保输出目录存在
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
+    # 开启归档成员缓存，重复读取同一成员时不再解压
+    if args.archive_cache_dir:
+        archive_cache_dir = Path(args.archive_cache_dir)
+        if not archive_cache_dir.is_absolute():
+            archive_cache_dir = project_root / archive_cache_dir
+        set_member_cache_dir(str(archive_cache_dir))
+        print(f"归档成员缓存目录: {archive_cache_dir}")
+    
     # 初始化调试数据导出器（如果启用调试模式）
     debug_exporter = None
     if args.debug:
         debug_dir = output_dir / 'debug_data'
-        debug_exporter = DebugDataExporter(debug_dir)
-        print(f"调试模式已启用，调试数据将输出到: {debug_dir}")
+        debug_exporter = DebugDataExporter(debug_dir, args.debug_format)
+        print(f"调试模式已启用，调试数据将输出到: {debug_dir}（{args.debug_format} 格式）")
+    
+    # 增量缓存（调试模式需要重新导出中间数据，不读取缓存）
+    cache = ReportCache(output_dir / 'cache', read=not (args.no_cache or args.debug))
     
-    # 初始化统计计算器和结果列表
+    # 初始化统计计算器、阶段计时器和结果列表
     stats_calculator = StatisticsCalculator()
+    timer = StageTimer()
+    pipeline_start = time.perf_counter()
     all_statistics = []
     
     try:
+        # 0. 准备共享的本地 ECharts 文件（output/assets/echarts.min.js）
+        install_echarts_asset(args.echarts_js, required=args.inline_echarts)
+        
         # 1. 识别回测文件
         print("正在识别回测文件...")
         identifier = BacktestFileIdentifier(str(input_dir))
@@ -1128,266 +1825,122 @@ def main():
                 print(f"可用指数: {', '.join(available_indices)}")
                 return
         
-        # 3. 初始化可视化器
-        visualizer = EChartsVisualizer()
+        # 3-5. 回测数据：输入文件内容哈希与上次一致的回测直接复用缓存，其余计算后写入缓存
+        collector = ReportSeriesCollector(index_manager, cache, timer)
+        results = collector.collect_backtests(
+            files_info, specified_indices, args.workers,
+            str(debug_exporter.debug_dir) if debug_exporter else None,
+            str(archive_cache_dir) if args.archive_cache_dir else None,
+            args.debug_format
+        )
         
-        # 4. 处理每个回测文件
-        print("正在处理回测数据...")
+        # 按回测文件顺序汇总结果
         earliest_backtest_start = None
-        for file_info in files_info:
-            print(f"处理: {file_info['backtest_name']}, {file_info['position_file']}")
-            
-            # 加载回测数据
-            backtest_data = load_backtest_data(file_info['backtest_file'])
-            backtest_viz_data = prepare_backtest_data_for_visualization(backtest_data)
-            
-            # 调试输出：导出回测数据
-            if debug_exporter:
-                debug_exporter.export_cumulative_returns(
-                    file_info['backtest_name'],
-                    backtest_viz_data['dates'],
-                    backtest_viz_data['daily_returns'],
-                    backtest_viz_data['cumulative_returns'],
-                    "backtest"
-                )
-            
-            # 计算回测数据统计指标
-            backtest_stats = stats_calculator.calculate_statistics(
-                backtest_viz_data['daily_returns'],
-                backtest_viz_data['cumulative_returns'],
-                file_info['backtest_name'],
-                'backtest',
-                backtest_viz_data['dates']
-            )
-            all_statistics.append(backtest_stats)
+        all_interval_statistics = []
+        for result in results:
+            timer.merge(result['timings'])
+            all_statistics.extend(result['statistics'])
+            all_interval_statistics.extend(result['interval_statistics'])
             
-            # 添加回测数据到可视化
-            visualizer.add_backtest_series(
-                file_info['backtest_name'],
-                backtest_viz_data['dates'],
-                backtest_viz_data['cumulative_returns']
-            )
-
             # 记录最早的回测起始日期(YYYY-MM-DD)
-            try:
-                bt_dates_fmt = []
-                for d in backtest_viz_data['dates']:
-                    if d and len(d) == 8 and d.isdigit():
-                        bt_dates_fmt.append(f"{d[:4]}-{d[4:6]}-{d[6:8]}")
-                    elif d:
-                        bt_dates_fmt.append(d)
-                if bt_dates_fmt:
-                    candidate = min(bt_dates_fmt)
-                    if earliest_backtest_start is None or candidate < earliest_backtest_start:
-                        earliest_backtest_start = candidate
-            except Exception:
-                pass
+            if result['start_date'] and (earliest_backtest_start is None or result['start_date'] < earliest_backtest_start):
+                earliest_backtest_start = result['start_date']
+        
+        # 6. 指数数据：日收益与累积收益、总体和时间区间统计指标（每个指数只准备一次，指数文件和起始日期未变时复用缓存）
+        print("正在计算指数统计指标...")
+        index_viz_list = collector.collect_indices(earliest_backtest_start, stats_calculator, debug_exporter)
+        for index_name, index_artifact in index_viz_list:
+            all_statistics.append(index_artifact['statistics'])
+            all_interval_statistics.extend(index_artifact['interval_statistics'])
+        with timer.stage('缓存'):
+            cache.save()
+        
+        # 7. 导出统计指标汇总
+        print("正在导出统计指标...")
+        with timer.stage('导出'):
+            # 创建统计结果导出器（无论是否启用调试模式都导出统计结果）
+            if not debug_exporter:
+                debug_dir = output_dir / 'debug_data'
+                stats_exporter = DebugDataExporter(debug_dir)
+            else:
+                stats_exporter = debug_exporter
             
-            # 对每个指定的指数计算对冲数据
-            for index_name in specified_indices:
-                index_file = index_manager.get_index_file(index_name)
-                if index_file:
-                    try:
-                        hedge_data = calculate_hedge_data(
-                            backtest_file=file_info['backtest_file'],
-                            position_file=file_info['position_file'],
-                            index_file=index_file
-                        )
-                        
-                        # 计算对冲累积收益率
-                        # hedge_return已经是百分比形式，不需要再乘以100
-                        hedge_returns = [item['hedge_return'] for item in hedge_data['data']]
-                        hedge_dates = [item['date'] for item in hedge_data['data']]
-                        
-                        # 直接计算累积收益率（百分比形式）
-                        hedge_cumulative = []
-                        cumulative_value = 100.0  # 初始值
-                        
-                        for daily_return in hedge_returns:
-                            # 将百分比转换为小数进行计算
-                            return_rate = daily_return / 100.0
-                            cumulative_value = cumulative_value * (1 + return_rate)
-                            # 计算相对于初始值的收益率百分比
-                            cumulative_return_percent = (cumulative_value - 100.0)
-                            hedge_cumulative.append(cumulative_return_percent)
-
-                        # 调试输出：导出对冲数据
-                        if debug_exporter:
-                            debug_exporter.export_hedge_data(
-                                file_info['backtest_name'], 
-                                hedge_data, 
-                                index_name
-                            )
-                            debug_exporter.export_cumulative_returns(
-                                file_info['backtest_name'],
-                                hedge_dates,
-                                hedge_returns,
-                                hedge_cumulative,
-                                f"hedge_{index_name}"
-                            )
-                        
-                        # 计算对冲数据统计指标
-                        hedge_stats = stats_calculator.calculate_statistics(
-                            hedge_returns,
-                            hedge_cumulative,
-                            f"{file_info['backtest_name']}-{index_name}",
-                            'hedge',
-                            hedge_dates
-                        )
-                        all_statistics.append(hedge_stats)
-                        
-                        if not args.no_hedge:
-                            visualizer.add_hedge_series(
-                                f"{file_info['backtest_name']}-{index_name}",
-                                hedge_dates,
-                                hedge_cumulative
-                            )
-                        
-                    except Exception as e:
-                        traceback.print_exc()
-                        print(f"警告: 计算对冲数据失败 {file_info['backtest_name']}-{index_name}: {e}")
-        
-        # 5. 加载所有指数数据
-        print("正在加载指数数据...")
-        all_indices_data = index_manager.load_all_indices_data()
-        
-        for index_name, index_data in all_indices_data.items():
-            index_viz_data = prepare_index_data_for_visualization(index_data, start_date=earliest_backtest_start)
+            stats_exporter.export_statistics_summary(all_statistics)
+            
+            # 导出时间区间统计指标
+            if all_interval_statistics:
+                interval_stats_file = debug_dir / 'interval_statistics_summary.csv'
+                with open(interval_stats_file, 'w', newline='', encoding='utf-8') as csvfile:
+                    fieldnames = ['name', 'type', 'interval', 'total_return', 'annualized_return', 
+                                 'max_drawdown', 'max_drawdown_start_date', 'max_drawdown_end_date',
+                                 'sharpe_ratio', 'trading_days', 'longest_recovery_days',
+                                 'recovery_max_drawdown', 'recovery_start_date', 'recovery_end_date']
+                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(all_interval_statistics)
+                print(f"时间区间统计指标已导出: {interval_stats_file}")
             
-            # 调试输出：导出指数数据
+            # 等待后台线程写完指数等调试数据
             if debug_exporter:
-                debug_exporter.export_index_data(
+                debug_exporter.close()
+        
+        # 调试模式：核对报告中区间统计的算法与 returns_calculator 的结果是否一致
+        if debug_exporter:
+            series_list = []
+            for result in results:
+                # 每条曲线只与同一回测的统计记录比较
+                records = result['statistics'] + result['interval_statistics']
+                series_list.append((result['backtest_name'], 'backtest', result['dates'],
+                                    result['daily_returns'], result['cumulative_returns'], records))
+                series_list.extend((hedge['name'], 'hedge', hedge['dates'], hedge['daily_returns'],
+                                    hedge['cumulative_returns'], records) for hedge in result['hedges'])
+            for index_name, index_artifact in index_viz_list:
+                series_list.append((index_name, 'index', index_artifact['dates'], index_artifact['daily_returns'],
+                                    index_artifact['cumulative_returns'],
+                                    [index_artifact['statistics']] + index_artifact['interval_statistics']))
+            check_range_statistics(series_list)
+        
+        # 8. 生成可视化文件
+        print("正在生成可视化文件...")
+        with timer.stage('渲染'):
+            visualizer = EChartsVisualizer(args.max_points, args.compress_data, args.inline_echarts)
+            for result in results:
+                visualizer.add_backtest_series(
+                    result['backtest_name'],
+                    result['dates'],
+                    result['cumulative_returns'].tolist(),
+                    result['daily_returns']
+                )
+                if not args.no_hedge:
+                    for hedge in result['hedges']:
+                        visualizer.add_hedge_series(hedge['name'], hedge['dates'], hedge['cumulative_returns'].tolist(),
+                                                    hedge['daily_returns'])
+            for index_name, index_viz_data in index_viz_list:
+                visualizer.add_index_series(
                     index_name,
                     index_viz_data['dates'],
-                    index_viz_data['daily_returns'],
-                    index_viz_data['cumulative_returns']
+                    index_viz_data['cumulative_returns'],
+                    index_viz_data['daily_returns']
                 )
             
-            # 计算指数数据统计指标
-            index_stats = stats_calculator.calculate_statistics(
-                index_viz_data['daily_returns'],
-                index_viz_data['cumulative_returns'],
-                index_name,
-                'index',
-                index_viz_data['dates']
-            )
-            all_statistics.append(index_stats)
-            
-            visualizer.add_index_series(
-                index_name,
-                index_viz_data['dates'],
-                index_viz_data['cumulative_returns']
+            index_title = ','.join(specified_indices)
+            visualizer.generate_html(
+                str(output_file),
+                f"对冲分析可视化 - {index_title}"
             )
         
-        # 6. 计算时间区间统计指标
-        print("正在计算时间区间统计指标...")
-        all_interval_statistics = []
-        
-        # 为每个回测数据计算时间区间统计指标
-        for file_info in files_info:
-            backtest_data = load_backtest_data(file_info['backtest_file'])
-            backtest_viz_data = prepare_backtest_data_for_visualization(backtest_data)
-            
-            # 计算回测数据的时间区间统计指标
-            interval_stats = stats_calculator.calculate_time_interval_statistics(
-                backtest_viz_data['daily_returns'],
-                backtest_viz_data['cumulative_returns'],
-                file_info['backtest_name'],
-                'backtest',
-                backtest_viz_data['dates']
-            )
-            all_interval_statistics.extend(interval_stats)
-            
-            # 对每个指定的指数计算对冲数据的时间区间统计指标
-            for index_name in specified_indices:
-                index_file = index_manager.get_index_file(index_name)
-                if index_file:
-                    try:
-                        hedge_data = calculate_hedge_data(
-                            backtest_file=file_info['backtest_file'],
-                            position_file=file_info['position_file'],
-                            index_file=index_file
-                        )
-                        
-                        hedge_returns = [item['hedge_return'] for item in hedge_data['data']]
-                        hedge_dates = [item['date'] for item in hedge_data['data']]
-                        
-                        # 计算对冲累积收益率
-                        hedge_cumulative = []
-                        cumulative_value = 100.0
-                        
-                        for daily_return in hedge_returns:
-                            return_rate = daily_return / 100.0
-                            cumulative_value = cumulative_value * (1 + return_rate)
-                            cumulative_return_percent = (cumulative_value - 100.0)
-                            hedge_cumulative.append(cumulative_return_percent)
-                        
-                        # 计算对冲数据的时间区间统计指标
-                        hedge_interval_stats = stats_calculator.calculate_time_interval_statistics(
-                            hedge_returns,
-                            hedge_cumulative,
-                            f"{file_info['backtest_name']}-{index_name}",
-                            'hedge',
-                            hedge_dates
-                        )
-                        all_interval_statistics.extend(hedge_interval_stats)
-                        
-                    except Exception as e:
-                        print(f"警告: 计算对冲时间区间统计指标失败 {file_info['backtest_name']}-{index_name}: {e}")
-        
-        # 为指数数据计算时间区间统计指标
-        for index_name, index_data in all_indices_data.items():
-            index_viz_data = prepare_index_data_for_visualization(index_data, start_date=earliest_backtest_start)
-            
-            index_interval_stats = stats_calculator.calculate_time_interval_statistics(
-                index_viz_data['daily_returns'],
-                index_viz_data['cumulative_returns'],
-                index_name,
-                'index',
-                index_viz_data['dates']
-            )
-            all_interval_statistics.extend(index_interval_stats)
-        
-        # 7. 导出统计指标汇总
-        print("正在导出统计指标...")
-        # 创建统计结果导出器（无论是否启用调试模式都导出统计结果）
-        if not debug_exporter:
-            debug_dir = output_dir / 'debug_data'
-            stats_exporter = DebugDataExporter(debug_dir)
-        else:
-            stats_exporter = debug_exporter
-        
-        stats_exporter.export_statistics_summary(all_statistics)
-        
-        # 导出时间区间统计指标
-        if all_interval_statistics:
-            interval_stats_file = debug_dir / 'interval_statistics_summary.csv'
-            with open(interval_stats_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['name', 'type', 'interval', 'total_return', 'annualized_return', 
-                             'max_drawdown', 'max_drawdown_start_date', 'max_drawdown_end_date',
-                             'sharpe_ratio', 'trading_days', 'longest_recovery_days',
-                             'recovery_max_drawdown', 'recovery_start_date', 'recovery_end_date']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(all_interval_statistics)
-            print(f"时间区间统计指标已导出: {interval_stats_file}")
-        
-        # 8. 生成可视化文件
-        print("正在生成可视化文件...")
-        index_title = ','.join(specified_indices)
-        visualizer.generate_html(
-            str(output_file),
-            f"对冲分析可视化 - {index_title}"
-        )
-        
+        timer.report(time.perf_counter() - pipeline_start, collector.workers)
         print("分析完成!")
         
     except Exception as e:
         print(f"错误: {e}")
         return 1
+    finally:
+        # 出错时同样等待后台线程写完已提交的调试数据（写出线程为守护线程，进程退出时会被直接终止）
+        if debug_exporter:
+            debug_exporter.close()
     
     return 0
 
-
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
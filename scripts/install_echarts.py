@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ECharts 本地资源安装脚本
+
+将固定版本的 echarts.min.js 安装到 output/assets/，供所有报告（hedge_analysis_visualization、
+position_ratio_visualization、position_value_visualization、backtest_vis、backtest_hedge_plot、report_server）
+通过相对路径离线加载，或用 --inline_echarts 嵌入单文件报告。只需运行一次。
+
+离线机器可在联网机器上运行本脚本后拷贝 output/assets/echarts.min.js，或用 --source 指定已有文件。
+
+使用方法:
+    python main.py install_echarts
+    python main.py install_echarts --source /path/to/echarts.min.js
+    python main.py install_echarts --url https://mirror.example.com/echarts@5.0.0/dist/echarts.min.js --force
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.echarts_asset import (
+    ECHARTS_ASSET_FILE,
+    ECHARTS_CDN,
+    ECHARTS_VERSION,
+    download_echarts_asset,
+    install_echarts_asset
+)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description=f'安装 ECharts {ECHARTS_VERSION} 到 output/assets/，供所有报告离线使用')
+    parser.add_argument('--source', default=None, help='已有的 echarts.min.js 文件路径（指定时直接复制，不下载）')
+    parser.add_argument('--url', default=ECHARTS_CDN, help=f'下载地址（默认: {ECHARTS_CDN}）')
+    parser.add_argument('--force', action='store_true', help='本地文件已存在时仍重新下载')
+
+    args = parser.parse_args()
+
+    try:
+        if args.source:
+            install_echarts_asset(args.source, required=True)
+        elif ECHARTS_ASSET_FILE.is_file() and not args.force:
+            print(f"本地 ECharts 文件已存在: {ECHARTS_ASSET_FILE}（使用 --force 重新下载）")
+        else:
+            print(f"正在下载: {args.url}")
+            download_echarts_asset(args.url)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
+        print(f"离线环境可在联网机器上运行后拷贝 {ECHARTS_ASSET_FILE}，或使用 --source 指定已有文件")
+        return 1
+
+    print(f"报告将通过相对路径加载 {ECHARTS_ASSET_FILE}（--inline_echarts 可嵌入HTML）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
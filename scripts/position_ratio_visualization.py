@@ -6,8 +6,15 @@
 1. 自动识别指定文件夹中的持仓比例数据文件
 2. 绘制多个回测的持仓比例曲线
 
+报告中所有曲线共用一条日期轴，每条曲线只嵌入数值数组，可用 --compress_data 进一步压缩。
+报告通过相对路径引用共享的 output/assets/echarts.min.js，离线可用；本地文件不可用时回退到CDN。该文件只需准备一次：
+运行 python main.py install_echarts 下载，或用 --echarts_js 指定已有文件；--inline_echarts 将其嵌入HTML生成单文件报告。
+
 使用方法:
+    python main.py install_echarts  # 只需运行一次，之后报告可离线查看
     python position_ratio_visualization.py --input_dir /path/to/backtest/data
+    python position_ratio_visualization.py --input_dir /path/to/backtest/data --compress_data
+    python position_ratio_visualization.py --input_dir /path/to/backtest/data --echarts_js /path/to/echarts.min.js
 """
 
 import argparse
@@ -19,12 +26,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import numpy as np
-
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from libs.echarts_asset import echarts_script_tag, install_echarts_asset
+from libs.report_encoding import PAYLOAD_DECODER_JS, align_series, encode_series_payload, legacy_payload_size
+
 
 class PositionRatioFileIdentifier:
     """持仓比例文件识别器"""
@@ -165,8 +173,16 @@ class PositionRatioDataLoader:
 class EChartsVisualizer:
     """ECharts可视化器"""
     
-    def __init__(self):
-        """初始化可视化器"""
+    def __init__(self, compress: bool = False, inline_echarts: bool = False):
+        """
+        初始化可视化器
+        
+        Args:
+            compress: 是否以 gzip+base64 压缩编码嵌入曲线数据（见 libs.report_encoding）
+            inline_echarts: 是否将本地 ECharts 文件嵌入HTML（见 libs.echarts_asset）
+        """
+        self.compress = compress
+        self.inline_echarts = inline_echarts
         self.chart_data = {
             'series': []
         }
@@ -180,16 +196,12 @@ class EChartsVisualizer:
             dates: 日期列表（YYYY-MM-DD格式）
             ratios: 持仓比例列表（百分比形式，如10.0表示10%）
         """
-        # 过滤掉无效数据
-        valid_data = []
-        for date, ratio in zip(dates, ratios):
-            if ratio is not None and not np.isnan(ratio):
-                valid_data.append([date, ratio])
-        
+        # 生成HTML时对齐到共享日期轴，无效数据在浏览器端跳过
         self.chart_data['series'].append({
             'name': name,
             'type': 'line',
-            'data': valid_data,
+            'dates': dates,
+            'values': ratios,
             'smooth': True,
             'symbol': 'none',  # 移除数据点
             'lineStyle': {'width': 1.5}
@@ -205,13 +217,20 @@ class EChartsVisualizer:
         """
         all_series = self.chart_data['series']
         
+        # 所有曲线对齐到共享日期轴，只嵌入一次日期和每条曲线的数值数组
+        dates, values = align_series([series['dates'] for series in all_series],
+                                     [series['values'] for series in all_series])
+        series_options = [{key: value for key, value in series.items() if key not in ('dates', 'values')}
+                          for series in all_series]
+        payload_json = json.dumps(encode_series_payload(dates, values, compress=self.compress), ensure_ascii=False)
+        
         html_template = f"""
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
     <title>{title}</title>
-    <script src="https://cdn.jsdelivr.net/npm/echarts@5.0.0/dist/echarts.min.js"></script>
+    {echarts_script_tag(output_file, inline=self.inline_echarts)}
     <style>
         body {{
             font-family: Arial, sans-serif;
@@ -297,10 +316,19 @@ class EChartsVisualizer:
                 min: 0,
                 max: 100
             }},
-            series: {json.dumps(all_series, ensure_ascii=False)}
+            series: []
         }};
         
-        myChart.setOption(option);
+        var seriesOptions = {json.dumps(series_options, ensure_ascii=False)};
+        var payload = {payload_json};
+        {PAYLOAD_DECODER_JS.strip()}
+        
+        decodeSeriesPayload(payload).then(function(data) {{
+            option.series = seriesOptions.map(function(series, i) {{
+                return Object.assign({{}}, series, {{data: seriesPoints(data.dates, data.values[i], null)}});
+            }});
+            myChart.setOption(option);
+        }});
         
         // 响应式调整
         window.addEventListener('resize', function() {{
@@ -315,6 +343,8 @@ class EChartsVisualizer:
             f.write(html_template)
         
         print(f"可视化文件已生成: {output_file}")
+        print(f"  文件大小: {os.path.getsize(output_file) / 1024:.1f} KB，曲线数据: {len(payload_json.encode('utf-8')) / 1024:.1f} KB"
+              f"（逐点嵌入约 {legacy_payload_size(dates, values) / 1024:.1f} KB）")
 
 
 def main():
@@ -322,6 +352,13 @@ def main():
     parser = argparse.ArgumentParser(description='持仓比例可视化脚本')
     parser.add_argument('--input_dir', required=True, help='回测数据目录路径')
     parser.add_argument('--output', default=None, help='输出HTML文件路径（默认在输出目录下生成 <输入目录名>_position_ratio_visualization.html）')
+    parser.add_argument('--compress_data', action='store_true',
+                        help='以 gzip+base64 压缩编码嵌入曲线数据，由浏览器解压（需要支持 DecompressionStream 的浏览器）')
+    parser.add_argument('--echarts_js', default=None,
+                        help='本地 echarts.min.js 文件路径，复制到 output/assets/ 供所有报告共用（只需指定一次）')
+    parser.add_argument('--inline_echarts', action='store_true',
+                        help='将本地 ECharts 文件嵌入HTML，生成可单独拷贝、离线打开的单文件报告'
+                             '（需先运行 python main.py install_echarts 或指定 --echarts_js）')
     
     args = parser.parse_args()
     
@@ -354,6 +391,9 @@ def main():
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
     try:
+        # 0. 准备共享的本地 ECharts 文件（output/assets/echarts.min.js）
+        install_echarts_asset(args.echarts_js, required=args.inline_echarts)
+        
         # 1. 识别持仓比例文件
         print("正在识别持仓比例文件...")
         identifier = PositionRatioFileIdentifier(str(input_dir))
@@ -365,7 +405,7 @@ def main():
             return 1
         
         # 2. 初始化可视化器
-        visualizer = EChartsVisualizer()
+        visualizer = EChartsVisualizer(args.compress_data, args.inline_echarts)
         
         # 3. 加载数据加载器
         data_loader = PositionRatioDataLoader()
@@ -3,14 +3,24 @@
 持仓金额可视化脚本
 
 该脚本用于：
-1. 读取交易记录（orders.jsonl格式）
+1. 读取交易记录（orders.jsonl格式，或 build_columnar_store 生成的订单列式存储目录）
 2. 还原每天的持仓金额、现金、资产总额
 3. 计算每天的买入金额、卖出金额、持仓比例
-4. 导出每日交易和资产汇总到CSV文件
-5. 绘制持仓比例、资产分布、资产总额曲线到HTML文件
+4. 导出每日交易和资产汇总、每日持仓变动到CSV文件
+5. 绘制持仓比例、资产分布、资产总额曲线到HTML文件；指定 --embed_holdings 时嵌入每日持仓明细，可按日期查看
+
+默认按当日最后一笔成交价（无成交时按平均成本）估值；指定 --price_panel 时按收盘价面板逐日盯市，
+没有订单的交易日也会计算持仓金额。
+报告通过相对路径引用共享的 output/assets/echarts.min.js，离线可用；本地文件不可用时回退到CDN。该文件只需准备一次：
+运行 python main.py install_echarts 下载，或用 --echarts_js 指定已有文件；--inline_echarts 将其嵌入HTML生成单文件报告。
 
 使用方法:
+    python main.py install_echarts  # 只需运行一次，之后报告可离线查看
     python position_value_visualization.py --input data/orders_samples.jsonl --output output/position_value.html --initial_cash 10000000000
+    python position_value_visualization.py --input data/orders_samples.orders --output output/position_value.html
+    python position_value_visualization.py --input data/orders_samples.orders --embed_holdings
+    python position_value_visualization.py --input data/orders_samples.orders --inline_echarts
+    python position_value_visualization.py --input data/orders_samples.orders --price_panel data/daily_close.prices --end_date 2021-12-31
 """
 
 import argparse
@@ -20,27 +30,271 @@ import sys
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.columnar_store import (
+    ORDER_ACTIONS,
+    ORDER_COLUMNS,
+    ORDER_STORE_FORMAT,
+    OrderStore,
+    PricePanel,
+    date_to_ordinal,
+    is_columnar_store,
+    ordinal_to_date
+)
+from libs.echarts_asset import echarts_script_tag, install_echarts_asset
+
+
+class PositionHistory:
+    """
+    每日持仓明细的快照+增量存储
+    
+    每隔 snapshot_interval 个交易日保存一次完整持仓快照，其余交易日只保存与前一交易日相比发生变化的持仓
+    （数量或估值价格变化、新建仓、清仓；清仓以数量0表示）。任意日期的持仓通过最近的快照加上之后的增量还原，
+    耗时与快照之后的增量条数成正比。快照和增量均为按槽位排序的 (槽位, 数量, 价格) 数组。
+    
+    指定 market_prices（收盘价查询）时，当天有收盘价的持仓只在数量变化时记录增量，价格在还原时从收盘价查询，
+    否则逐日盯市会使每天的增量都包含全部持仓。
+    """
+    
+    def __init__(self, securities: List[str], snapshot_interval: int = 20,
+                 market_prices: Optional[Callable[[str, np.ndarray], np.ndarray]] = None):
+        """
+        初始化持仓历史
+        
+        Args:
+            securities: 槽位 -> 证券代码（与 PositionTracker.securities 共享，随新证券增加）
+            snapshot_interval: 完整快照的间隔交易日数
+            market_prices: 收盘价查询函数 (日期, 槽位数组) -> 收盘价数组（NaN表示没有收盘价），可选
+        """
+        self.securities = securities
+        self.snapshot_interval = max(1, int(snapshot_interval))
+        self.market_prices = market_prices
+        # 日期列表及其下标
+        self.dates: List[str] = []
+        self.date_index: Dict[str, int] = {}
+        # 完整快照: 第 k 个快照对应第 k * snapshot_interval 个交易日
+        self.snapshots: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        # 每日增量: 快照日为空数组
+        self.deltas: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        # 前一交易日的完整持仓，用于计算增量
+        self._last = self._empty()
+        # 每天保存完整持仓时需要的条目数（用于统计压缩效果）
+        self.full_entries = 0
+    
+    @staticmethod
+    def _empty() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    
+    def record(self, date: str, slots: np.ndarray, quantities: np.ndarray, prices: np.ndarray,
+               quoted: Optional[np.ndarray] = None):
+        """
+        记录一个交易日的完整持仓（按日期顺序调用）
+        
+        Args:
+            date: 日期
+            slots: 持仓证券槽位（升序）
+            quantities: 持仓数量
+            prices: 估值价格
+            quoted: 各持仓当天是否按收盘价估值（可选）；为True的持仓价格变化不计入增量
+        """
+        index = len(self.dates)
+        self.dates.append(date)
+        self.date_index[date] = index
+        current = (np.asarray(slots, dtype=np.int64), np.asarray(quantities, dtype=np.float64),
+                   np.asarray(prices, dtype=np.float64))
+        self.full_entries += len(current[0])
+        
+        if index % self.snapshot_interval == 0:
+            self.snapshots.append(current)
+            self.deltas.append(self._empty())
+        else:
+            self.deltas.append(self._diff(self._last, current, quoted))
+        self._last = current
+    
+    @staticmethod
+    def _diff(previous: Tuple[np.ndarray, np.ndarray, np.ndarray],
+              current: Tuple[np.ndarray, np.ndarray, np.ndarray],
+              quoted: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """计算两个交易日持仓之间的增量（quoted 为True的持仓只比较数量）"""
+        prev_slots, prev_qty, prev_price = previous
+        cur_slots, cur_qty, cur_price = current
+        
+        if len(prev_slots):
+            pos = np.minimum(np.searchsorted(prev_slots, cur_slots), len(prev_slots) - 1)
+            found = prev_slots[pos] == cur_slots
+            repriced = prev_price[pos] != cur_price
+            if quoted is not None:
+                repriced &= ~quoted
+            changed = ~found | (prev_qty[pos] != cur_qty) | repriced
+            removed = prev_slots[~np.isin(prev_slots, cur_slots, assume_unique=True)]
+        else:
+            changed = np.ones(len(cur_slots), dtype=bool)
+            removed = np.zeros(0, dtype=np.int64)
+        
+        slots = np.concatenate([cur_slots[changed], removed])
+        order = np.argsort(slots, kind='stable')
+        quantities = np.concatenate([cur_qty[changed], np.zeros(len(removed))])
+        prices = np.concatenate([cur_price[changed], np.zeros(len(removed))])
+        return slots[order], quantities[order], prices[order]
+    
+    def holdings(self, date: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        还原指定日期的完整持仓
+        
+        Args:
+            date: 日期（必须是已记录的交易日）
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (槽位, 数量, 价格)，按槽位排序
+            
+        Raises:
+            KeyError: 日期未记录
+        """
+        index = self.date_index[date]
+        base = index - index % self.snapshot_interval
+        slots, quantities, prices = self.snapshots[base // self.snapshot_interval]
+        state = dict(zip(slots.tolist(), zip(quantities.tolist(), prices.tolist())))
+        for i in range(base + 1, index + 1):
+            self._apply(state, self.deltas[i])
+        return self._reprice(date, self._from_state(state))
+    
+    def iter_holdings(self):
+        """
+        按日期顺序依次还原每个交易日的完整持仓
+        
+        Yields:
+            Tuple[str, np.ndarray, np.ndarray, np.ndarray]: (日期, 槽位, 数量, 价格)
+        """
+        state = {}
+        for index, date in enumerate(self.dates):
+            if index % self.snapshot_interval == 0:
+                slots, quantities, prices = self.snapshots[index // self.snapshot_interval]
+                state = dict(zip(slots.tolist(), zip(quantities.tolist(), prices.tolist())))
+            else:
+                self._apply(state, self.deltas[index])
+            yield (date,) + self._reprice(date, self._from_state(state))
+    
+    def iter_changes(self):
+        """
+        按日期顺序输出每个交易日的持仓变化（首个交易日输出全部持仓）
+        
+        Yields:
+            Tuple[str, np.ndarray, np.ndarray, np.ndarray]: (日期, 槽位, 数量, 价格)；清仓的证券数量为0
+        """
+        state = {}
+        for index, date in enumerate(self.dates):
+            if index % self.snapshot_interval == 0:
+                # 快照日没有保存增量，与前一交易日的持仓比较得到
+                snapshot = self.snapshots[index // self.snapshot_interval]
+                delta = self._diff(self._from_state(state), snapshot, self._quoted(date, snapshot[0]))
+                state = dict(zip(snapshot[0].tolist(), zip(snapshot[1].tolist(), snapshot[2].tolist())))
+            else:
+                delta = self.deltas[index]
+                self._apply(state, delta)
+            yield (date,) + delta
+    
+    def _quoted(self, date: str, slots: np.ndarray) -> Optional[np.ndarray]:
+        """各持仓当天是否有收盘价（没有收盘价查询时返回None）"""
+        if self.market_prices is None:
+            return None
+        return ~np.isnan(self.market_prices(date, slots))
+    
+    def _reprice(self, date: str, holdings: Tuple[np.ndarray, np.ndarray, np.ndarray]
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """把还原出的持仓价格替换为当天的收盘价（没有收盘价的持仓保留记录的估值价格）"""
+        if self.market_prices is None or not len(holdings[0]):
+            return holdings
+        slots, quantities, prices = holdings
+        market = self.market_prices(date, slots)
+        return slots, quantities, np.where(np.isnan(market), prices, market)
+    
+    @staticmethod
+    def _apply(state: Dict[int, Tuple[float, float]], delta: Tuple[np.ndarray, np.ndarray, np.ndarray]):
+        """把一天的增量应用到持仓状态上"""
+        for slot, quantity, price in zip(delta[0].tolist(), delta[1].tolist(), delta[2].tolist()):
+            if quantity > 0:
+                state[slot] = (quantity, price)
+            else:
+                state.pop(slot, None)
+    
+    @staticmethod
+    def _from_state(state: Dict[int, Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        slots = sorted(state)
+        return (np.array(slots, dtype=np.int64),
+                np.array([state[slot][0] for slot in slots], dtype=np.float64),
+                np.array([state[slot][1] for slot in slots], dtype=np.float64))
+    
+    def stored_entries(self) -> Tuple[int, int]:
+        """
+        返回实际存储的持仓条目数，以及每天保存完整持仓时需要的条目数
+        
+        Returns:
+            Tuple[int, int]: (快照条目数+增量条目数, 完整存储条目数)
+        """
+        stored = sum(len(s[0]) for s in self.snapshots) + sum(len(d[0]) for d in self.deltas)
+        return stored, self.full_entries
+    
+    def to_compact_json(self) -> Dict:
+        """
+        导出为可嵌入HTML的紧凑结构
+        
+        Returns:
+            Dict: {"securities": [...], "interval": 快照间隔, "dates": [...],
+                   "snapshots": [[[槽位, 数量, 价格], ...], ...], "deltas": [[[槽位, 数量, 价格], ...], ...]}；
+                  指定收盘价查询时另含 "prices": 每天按槽位排序的全部持仓估值价格
+        """
+        def rows(entry):
+            return [[slot, quantity, round(price, 4)]
+                    for slot, quantity, price in zip(entry[0].tolist(), entry[1].tolist(), entry[2].tolist())]
+        
+        data = {
+            'securities': list(self.securities),
+            'interval': self.snapshot_interval,
+            'dates': self.dates,
+            'snapshots': [rows(snapshot) for snapshot in self.snapshots],
+            'deltas': [rows(delta) for delta in self.deltas]
+        }
+        if self.market_prices is not None:
+            # 增量中不含逐日变化的收盘价，页面还原持仓后按槽位顺序取当天价格
+            data['prices'] = [np.round(prices, 4).tolist() for _, _, _, prices in self.iter_holdings()]
+        return data
+
 
 class PositionTracker:
-    """持仓跟踪器"""
+    """
+    持仓跟踪器
+    
+    证券映射为整数槽位，数量和平均成本保存在 NumPy 数组中；每天的成交按数组批量更新（np.add.at），
+    持仓金额通过数量与价格数组的点积计算，回放耗时与订单数量成正比，而不是交易日数×历史持仓证券数。
+    """
     
-    def __init__(self, initial_cash: float = 10000000.0):
+    def __init__(self, initial_cash: float = 10000000.0, capacity: int = 256, snapshot_interval: int = 20):
         """
         初始化持仓跟踪器
         
         Args:
             initial_cash: 初始资金（默认1000万）
+            capacity: 证券槽位的初始容量，不足时自动翻倍扩容
+            snapshot_interval: 每日持仓明细的完整快照间隔交易日数
         """
-        # 持仓数据: {security: {'quantity': int, 'cost': float}}
-        self.positions = defaultdict(lambda: {'quantity': 0, 'cost': 0.0})
+        # 证券 -> 槽位
+        self.security_slots: Dict[str, int] = {}
+        # 槽位 -> 证券
+        self.securities: List[str] = []
+        # 各槽位的持仓数量与平均成本
+        self.quantities = np.zeros(capacity, dtype=np.float64)
+        self.costs = np.zeros(capacity, dtype=np.float64)
         # 每日持仓金额: {date: float}
         self.daily_position_value = {}
-        # 每日持仓明细: {date: {security: {'quantity': int, 'price': float, 'value': float}}}
-        self.daily_position_detail = defaultdict(dict)
+        # 每日持仓明细（快照+增量存储）
+        self.position_history = PositionHistory(self.securities, snapshot_interval)
         # 累计手续费
         self.total_commission = 0.0
         # 现金
@@ -56,11 +310,94 @@ class PositionTracker:
         self.daily_buy_amount = {}
         # 每日卖出金额: {date: float}
         self.daily_sell_amount = {}
-        # 当前日期（用于累计当日买卖金额）
-        self.current_date = None
-        self.current_buy_amount = 0.0
-        self.current_sell_amount = 0.0
+    
+    def security_slot(self, security: str) -> int:
+        """
+        返回证券对应的槽位，新证券分配新槽位
+        
+        Args:
+            security: 证券代码
+            
+        Returns:
+            int: 槽位
+        """
+        slot = self.security_slots.get(security)
+        if slot is None:
+            slot = len(self.securities)
+            if slot >= len(self.quantities):
+                capacity = max(1, len(self.quantities)) * 2
+                self.quantities = np.concatenate([self.quantities, np.zeros(capacity - len(self.quantities))])
+                self.costs = np.concatenate([self.costs, np.zeros(capacity - len(self.costs))])
+            self.security_slots[security] = slot
+            self.securities.append(security)
+        return slot
+    
+    def _apply_order(self, slot: int, action: int, filled: float, price: float, commission: float):
+        """逐笔更新单个证券的数量与平均成本（用于同一天既有买入又有卖出的证券，结果依赖成交顺序）"""
+        current_qty = self.quantities[slot]
+        if action == ORDER_ACTIONS['open']:
+            # 开仓（买入）：计算新的平均成本（含手续费）
+            total_cost = self.costs[slot] * current_qty + price * filled + commission
+            new_qty = current_qty + filled
+            self.quantities[slot] = new_qty
+            self.costs[slot] = total_cost / new_qty if new_qty > 0 else 0.0
+        elif action == ORDER_ACTIONS['close']:
+            # 平仓（卖出）：成本保持不变，只减少数量
+            self.quantities[slot] = max(0.0, current_qty - filled)
+    
+    def apply_fills(self, date: str, slots: np.ndarray, actions: np.ndarray, filled: np.ndarray,
+                    prices: np.ndarray, commissions: np.ndarray):
+        """
+        批量处理同一天的成交订单
+        
+        Args:
+            date: 交易日期
+            slots: 证券槽位数组（按成交时间排序）
+            actions: 动作编码数组（见 ORDER_ACTIONS）
+            filled: 成交数量数组
+            prices: 成交价格数组
+            commissions: 手续费数组
+        """
+        is_open = actions == ORDER_ACTIONS['open']
+        is_close = actions == ORDER_ACTIONS['close']
+        
+        # 买入金额含手续费，卖出金额扣除手续费（记录实际到账金额）
+        buy_amount = float(np.sum(prices[is_open] * filled[is_open] + commissions[is_open]))
+        sell_amount = float(np.sum(prices[is_close] * filled[is_close] - commissions[is_close]))
+        self.total_commission += float(np.sum(commissions))
+        self.cash += sell_amount - buy_amount
+        self.daily_buy_amount[date] = self.daily_buy_amount.get(date, 0.0) + buy_amount
+        self.daily_sell_amount[date] = self.daily_sell_amount.get(date, 0.0) + sell_amount
+        
+        # 同一天既买又卖的证券，以及有零成交买入的证券（空仓时会把平均成本清零），平均成本依赖成交顺序，逐笔处理
+        mixed = np.union1d(np.intersect1d(slots[is_open], slots[is_close]), slots[is_open & (filled <= 0)])
+        sequential = np.isin(slots, mixed) if len(mixed) else np.zeros(len(slots), dtype=bool)
+        
+        # 只有买入：数量累加，总成本累加后重新计算平均成本
+        batch = is_open & ~sequential
+        if batch.any():
+            unique_slots, inverse = np.unique(slots[batch], return_inverse=True)
+            added_qty = np.zeros(len(unique_slots))
+            added_cost = np.zeros(len(unique_slots))
+            np.add.at(added_qty, inverse, filled[batch])
+            np.add.at(added_cost, inverse, prices[batch] * filled[batch] + commissions[batch])
+            current_qty = self.quantities[unique_slots]
+            new_qty = current_qty + added_qty
+            total_cost = self.costs[unique_slots] * current_qty + added_cost
+            self.costs[unique_slots] = np.divide(total_cost, new_qty, out=np.zeros(len(new_qty)), where=new_qty > 0)
+            self.quantities[unique_slots] = new_qty
+        
+        # 只有卖出：数量扣减（不低于0），成本保持不变
+        batch = is_close & ~sequential
+        if batch.any():
+            unique_slots, inverse = np.unique(slots[batch], return_inverse=True)
+            sold_qty = np.zeros(len(unique_slots))
+            np.add.at(sold_qty, inverse, filled[batch])
+            self.quantities[unique_slots] = np.maximum(0.0, self.quantities[unique_slots] - sold_qty)
         
+        for i in np.flatnonzero(sequential):
+            self._apply_order(int(slots[i]), int(actions[i]), float(filled[i]), float(prices[i]), float(commissions[i]))
+    
     def process_order(self, order: Dict, date: str):
         """
         处理一笔交易订单
@@ -69,91 +406,42 @@ class PositionTracker:
             order: 订单信息字典
             date: 交易日期
         """
-        # 如果是新的一天，保存上一天的累计买卖金额
-        if self.current_date != date:
-            if self.current_date is not None:
-                self.daily_buy_amount[self.current_date] = self.current_buy_amount
-                self.daily_sell_amount[self.current_date] = self.current_sell_amount
-            # 重置当日累计
-            self.current_date = date
-            self.current_buy_amount = 0.0
-            self.current_sell_amount = 0.0
-        
-        security = order['security']
-        action = order['action']
-        filled = order['filled']
-        price = order['price']
-        commission = order.get('commission', 0.0)
-        
-        # 累计手续费
-        self.total_commission += commission
-        
-        if action == 'open':
-            # 开仓（买入）：增加持仓，减少现金
-            current_qty = self.positions[security]['quantity']
-            current_cost = self.positions[security]['cost']
-            
-            # 计算买入金额（含手续费）
-            buy_amount = price * filled + commission
-            self.cash -= buy_amount
-            
-            # 累计当日买入金额
-            self.current_buy_amount += buy_amount
-            
-            # 计算新的平均成本
-            total_cost = current_cost * current_qty + price * filled + commission
-            new_qty = current_qty + filled
-            
-            self.positions[security]['quantity'] = new_qty
-            self.positions[security]['cost'] = total_cost / new_qty if new_qty > 0 else 0.0
-            
-        elif action == 'close':
-            # 平仓（卖出）：减少持仓，增加现金
-            current_qty = self.positions[security]['quantity']
-            new_qty = max(0, current_qty - filled)
-            
-            # 计算卖出金额（扣除手续费）
-            sell_amount = price * filled - commission
-            self.cash += sell_amount
-            
-            # 累计当日卖出金额（记录实际到账金额）
-            self.current_sell_amount += sell_amount
-            
-            self.positions[security]['quantity'] = new_qty
-            # 成本保持不变，只减少数量
-            
-    def calculate_daily_value(self, date: str, prices: Dict[str, float]):
+        self.apply_fills(
+            date,
+            np.array([self.security_slot(order['security'])]),
+            np.array([ORDER_ACTIONS.get(order['action'], 0)]),
+            np.array([float(order['filled'])]),
+            np.array([float(order['price'])]),
+            np.array([float(order.get('commission', 0.0))])
+        )
+    
+    def value_day(self, date: str, slots: np.ndarray, prices: np.ndarray,
+                  market_prices: Optional[np.ndarray] = None) -> Tuple[float, float, float]:
         """
         计算指定日期的持仓总金额、资产总额和持仓比例
         
+        优先使用收盘价，其次使用当日最后一笔成交价，其余持仓使用平均成本。
+        
         Args:
             date: 日期（YYYY-MM-DD格式）
-            prices: 当日各证券的价格 {security: price}
+            slots: 当日成交的证券槽位数组
+            prices: 对应的成交价格数组
+            market_prices: 按槽位排列的当日收盘价（可选），NaN表示没有收盘价
         
         Returns:
             Tuple[float, float, float]: (持仓总金额, 资产总额, 持仓比例)
         """
-        # 保存当天的买卖金额（如果是当前正在处理的日期）
-        if self.current_date == date:
-            self.daily_buy_amount[date] = self.current_buy_amount
-            self.daily_sell_amount[date] = self.current_sell_amount
-        
-        total_value = 0.0
-        position_detail = {}
-        
-        for security, pos in self.positions.items():
-            quantity = pos['quantity']
-            if quantity > 0:
-                # 使用当日价格（如果有），否则使用成本价
-                current_price = prices.get(security, pos['cost'])
-                value = quantity * current_price
-                total_value += value
-                
-                position_detail[security] = {
-                    'quantity': quantity,
-                    'price': current_price,
-                    'value': value
-                }
+        count = len(self.securities)
+        quantities = self.quantities[:count]
+        valuation = self.costs[:count].copy()
+        if len(slots):
+            # 反向取首次出现的位置，即每个证券当日最后一笔成交
+            traded, last_index = np.unique(slots[::-1], return_index=True)
+            valuation[traded] = prices[::-1][last_index]
+        if market_prices is not None:
+            quoted = ~np.isnan(market_prices)
+            valuation[quoted] = market_prices[quoted]
+        total_value = float(np.dot(quantities, valuation))
         
         # 计算资产总额（现金 + 持仓金额）
         total_assets = self.cash + total_value
@@ -161,23 +449,75 @@ class PositionTracker:
         # 计算持仓比例
         position_ratio = (total_value / total_assets * 100.0) if total_assets > 0 else 0.0
         
-        # 记录数据
+        # 记录数据（按收盘价估值的持仓只在数量变化时记入增量）
+        held = np.flatnonzero(quantities > 0)
+        self.position_history.record(date, held, quantities[held], valuation[held],
+                                     None if market_prices is None else quoted[held])
         self.daily_position_value[date] = total_value
-        self.daily_position_detail[date] = position_detail
         self.daily_cash[date] = self.cash
         self.daily_total_assets[date] = total_assets
         self.daily_position_ratio[date] = position_ratio
+        self.daily_buy_amount.setdefault(date, 0.0)
+        self.daily_sell_amount.setdefault(date, 0.0)
         
         return total_value, total_assets, position_ratio
     
+    def calculate_daily_value(self, date: str, prices: Dict[str, float]):
+        """
+        计算指定日期的持仓总金额、资产总额和持仓比例
+        
+        Args:
+            date: 日期（YYYY-MM-DD格式）
+            prices: 当日各证券的价格 {security: price}
+        
+        Returns:
+            Tuple[float, float, float]: (持仓总金额, 资产总额, 持仓比例)
+        """
+        slots = np.array([self.security_slot(security) for security in prices], dtype=np.int64)
+        return self.value_day(date, slots, np.array(list(prices.values()), dtype=np.float64))
+    
     def get_current_positions(self) -> Dict:
         """
         获取当前持仓
         
         Returns:
-            Dict: 持仓信息
+            Dict: 持仓信息 {security: {'quantity': float, 'cost': float}}
         """
-        return {k: v for k, v in self.positions.items() if v['quantity'] > 0}
+        held = np.flatnonzero(self.quantities[:len(self.securities)] > 0)
+        return {
+            self.securities[slot]: {'quantity': float(self.quantities[slot]), 'cost': float(self.costs[slot])}
+            for slot in held
+        }
+
+
+def orders_to_columns(orders: List[Dict]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """
+    将订单字典列表转换为列数组（格式同 OrderStore.load_columns）
+    
+    Args:
+        orders: 订单列表（已按时间排序）
+        
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[str]]: (订单列数组, 证券字典)
+    """
+    security_ids: Dict[str, int] = {}
+    day_ordinals: Dict[str, int] = {}
+    columns = {name: np.zeros(len(orders), dtype=dtype) for name, dtype in ORDER_COLUMNS.items()}
+    
+    for i, order in enumerate(orders):
+        time_str = order['time']
+        date = time_str.split()[0]
+        ordinal = day_ordinals.get(date)
+        if ordinal is None:
+            ordinal = day_ordinals[date] = date_to_ordinal(date)
+        columns['time'][i] = ordinal * 86400
+        columns['security'][i] = security_ids.setdefault(order['security'], len(security_ids))
+        columns['action'][i] = ORDER_ACTIONS.get(order['action'], 0)
+        columns['filled'][i] = order['filled']
+        columns['price'][i] = order['price']
+        columns['commission'][i] = order.get('commission', 0.0)
+    
+    return columns, list(security_ids)
 
 
 class OrdersDataLoader:
@@ -188,11 +528,12 @@ class OrdersDataLoader:
         初始化数据加载器
         
         Args:
-            orders_file: 交易记录文件路径
+            orders_file: 交易记录文件路径，或订单列式存储目录
         """
         self.orders_file = Path(orders_file)
         if not self.orders_file.exists():
             raise FileNotFoundError(f"交易记录文件不存在: {orders_file}")
+        self.is_columnar_store = is_columnar_store(str(self.orders_file), ORDER_STORE_FORMAT)
     
     def load_orders(self) -> List[Dict]:
         """
@@ -201,6 +542,9 @@ class OrdersDataLoader:
         Returns:
             List[Dict]: 交易记录列表，按时间排序
         """
+        if self.is_columnar_store:
+            return self.load_orders_from_store()
+        
         orders = []
         
         print(f"正在加载交易记录: {self.orders_file}")
@@ -226,6 +570,39 @@ class OrdersDataLoader:
         print(f"加载完成，共 {len(orders)} 笔成交订单")
         return orders
     
+    def load_orders_from_store(self) -> List[Dict]:
+        """
+        从订单列式存储加载交易记录
+        
+        存储中只有已成交订单且已按时间排序，列文件以内存映射方式读取，不需要解析JSON和排序。
+        
+        Returns:
+            List[Dict]: 交易记录列表，按时间排序
+        """
+        print(f"正在从列式存储加载交易记录: {self.orders_file}")
+        store = OrderStore(str(self.orders_file))
+        orders = store.to_records(store.load_columns())
+        print(f"加载完成，共 {len(orders)} 笔成交订单")
+        return orders
+    
+    def load_order_columns(self) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """
+        以列数组形式加载交易记录
+        
+        订单列式存储直接返回内存映射的列数组；JSONL文件先解析再转换为列数组。
+        
+        Returns:
+            Tuple[Dict[str, np.ndarray], List[str]]: (按时间排序的订单列数组, 证券字典)
+        """
+        if not self.is_columnar_store:
+            return orders_to_columns(self.load_orders())
+        
+        print(f"正在从列式存储加载交易记录: {self.orders_file}")
+        store = OrderStore(str(self.orders_file))
+        columns = store.load_columns()
+        print(f"加载完成，共 {len(columns['time'])} 笔成交订单")
+        return columns, store.securities
+    
     def group_orders_by_date(self, orders: List[Dict]) -> Dict[str, List[Dict]]:
         """
         按日期分组订单
@@ -250,14 +627,15 @@ class OrdersDataLoader:
 class PositionValueCalculator:
     """持仓金额计算器"""
     
-    def __init__(self, initial_cash: float = 10000000.0):
+    def __init__(self, initial_cash: float = 10000000.0, snapshot_interval: int = 20):
         """
         初始化计算器
         
         Args:
             initial_cash: 初始资金（默认1000万）
+            snapshot_interval: 每日持仓明细的完整快照间隔交易日数
         """
-        self.tracker = PositionTracker(initial_cash)
+        self.tracker = PositionTracker(initial_cash, snapshot_interval=snapshot_interval)
     
     def calculate(self, orders: List[Dict]) -> Tuple[List[str], List[float], List[float], List[float], List[float], Dict]:
         """
@@ -269,16 +647,56 @@ class PositionValueCalculator:
         Returns:
             Tuple: (日期列表, 持仓金额列表, 现金列表, 资产总额列表, 持仓比例列表, 统计信息)
         """
-        loader = OrdersDataLoader.__new__(OrdersDataLoader)
-        orders_by_date = defaultdict(list)
+        columns, securities = orders_to_columns(orders)
+        return self.calculate_columns(columns, securities)
+    
+    def calculate_columns(self, columns: Dict[str, np.ndarray], securities: List[str],
+                          price_panel: Optional[PricePanel] = None, end_date: Optional[str] = None) -> Tuple:
+        """
+        按订单列数组计算每日持仓金额、资产总额和持仓比例
         
-        for order in orders:
-            time_str = order['time']
-            date = time_str.split()[0]
-            orders_by_date[date].append(order)
+        指定收盘价面板时，日历为订单日期与面板交易日的并集（从第一笔订单到 end_date 或最后一笔订单），
+        持仓按当日收盘价估值；面板中没有价格的证券仍按成交价或平均成本估值。
+        
+        Args:
+            columns: 按时间排序的订单列数组（time、security、action、filled、price、commission），
+                     格式同 OrderStore.load_columns
+            securities: 证券字典，columns['security'] 为其下标
+            price_panel: 收盘价面板（可选）
+            end_date: 估值截止日期（YYYY-MM-DD，可选，仅在指定收盘价面板时用于延长日历）
+            
+        Returns:
+            Tuple: (日期列表, 持仓金额列表, 现金列表, 资产总额列表, 持仓比例列表, 买入金额列表, 卖出金额列表, 统计信息)
+        """
+        # 订单中的证券ID映射为跟踪器槽位
+        slot_map = np.array([self.tracker.security_slot(security) for security in securities], dtype=np.int64)
+        slots = slot_map[np.asarray(columns['security'])] if len(slot_map) else np.zeros(0, dtype=np.int64)
+        actions = np.asarray(columns['action'])
+        filled = np.asarray(columns['filled'], dtype=np.float64)
+        prices = np.asarray(columns['price'], dtype=np.float64)
+        commissions = np.asarray(columns['commission'], dtype=np.float64)
+        
+        # 按日期切分：订单已按时间排序，每个交易日是一段连续区间
+        days = np.asarray(columns['time']) // 86400
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate([[0], boundaries]) if len(days) else np.zeros(0, dtype=np.int64)
+        ends = np.concatenate([boundaries, [len(days)]]) if len(days) else np.zeros(0, dtype=np.int64)
+        order_days = days[starts]
         
-        # 获取所有日期并排序
-        all_dates = sorted(orders_by_date.keys())
+        # 估值日历：有收盘价面板时加入区间内没有订单的交易日
+        calendar = order_days
+        panel_columns = None
+        if price_panel is not None and len(order_days):
+            last_date = end_date or ordinal_to_date(order_days[-1])
+            panel_days = price_panel.date_ordinals(ordinal_to_date(order_days[0]), last_date)
+            calendar = np.union1d(order_days, panel_days)
+            panel_columns = price_panel.security_columns(self.tracker.securities)
+            self.tracker.position_history.market_prices = \
+                lambda date, held: price_panel.prices_on(date, panel_columns[held])
+            print(f"使用收盘价面板估值: {price_panel.panel_dir}，"
+                  f"{int((panel_columns >= 0).sum())}/{len(panel_columns)} 只证券有收盘价")
+        no_orders = np.zeros(0, dtype=np.int64)
+        no_prices = np.zeros(0, dtype=np.float64)
         
         dates = []
         position_values = []
@@ -288,18 +706,21 @@ class PositionValueCalculator:
         
         print("正在计算每日持仓金额、资产总额和持仓比例...")
         
-        for date in all_dates:
-            # 处理当日所有订单
-            daily_orders = orders_by_date[date]
-            daily_prices = {}
-            
-            for order in daily_orders:
-                self.tracker.process_order(order, date)
-                # 记录当日价格
-                daily_prices[order['security']] = order['price']
+        segment = 0
+        for ordinal in calendar.tolist():
+            date = ordinal_to_date(ordinal)
+            day_slots, day_prices = no_orders, no_prices
+            if segment < len(order_days) and order_days[segment] == ordinal:
+                day = slice(starts[segment], ends[segment])
+                segment += 1
+                
+                # 处理当日所有订单
+                self.tracker.apply_fills(date, slots[day], actions[day], filled[day], prices[day], commissions[day])
+                day_slots, day_prices = slots[day], prices[day]
             
-            # 计算当日持仓金额、资产总额和持仓比例
-            pos_value, total_asset, pos_ratio = self.tracker.calculate_daily_value(date, daily_prices)
+            # 计算当日持仓金额、资产总额和持仓比例（收盘价优先，其次当日成交价）
+            market_prices = price_panel.prices_on(date, panel_columns) if panel_columns is not None else None
+            pos_value, total_asset, pos_ratio = self.tracker.value_day(date, day_slots, day_prices, market_prices)
             
             dates.append(date)
             position_values.append(pos_value)
@@ -333,6 +754,8 @@ class PositionValueCalculator:
         print(f"最终持仓比例: {stats['final_position_ratio']:.2f}%")
         print(f"累计手续费: {stats['total_commission']:,.2f}")
         print(f"最终持仓数量: {stats['final_position_count']}")
+        stored_entries, full_entries = self.tracker.position_history.stored_entries()
+        print(f"每日持仓明细: 存储 {stored_entries:,} 条（快照+增量），逐日完整存储需 {full_entries:,} 条")
         
         # 获取每日买入和卖出金额
         buy_amounts = [self.tracker.daily_buy_amount.get(date, 0.0) for date in dates]
@@ -391,19 +814,151 @@ class CSVExporter:
             writer.writerows(rows)
         
         print(f"每日交易和资产汇总已导出: {output_file}")
+    
+    def export_position_changes(self, history: PositionHistory, output_file: str):
+        """
+        导出每日持仓变动到CSV文件
+        
+        直接按快照+增量形式输出：首个交易日为全部持仓，之后每天只包含新建仓、数量或估值价格变化、
+        清仓（数量为0）的证券。从首行开始依次应用即可还原任意一天的完整持仓。
+        按收盘价面板估值时，有收盘价的持仓只在数量变化时输出，价格和市值为变化当天的收盘价估值。
+        
+        Args:
+            history: 每日持仓明细
+            output_file: 输出文件路径
+        """
+        rows = 0
+        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['date', 'security', 'quantity', 'price', 'value'])
+            for date, slots, quantities, prices in history.iter_changes():
+                for slot, quantity, price in zip(slots.tolist(), quantities.tolist(), prices.tolist()):
+                    writer.writerow([date, history.securities[slot], quantity, price, quantity * price])
+                    rows += 1
+        
+        print(f"每日持仓变动已导出: {output_file}（{rows} 行）")
 
 
 class HTMLVisualizer:
     """HTML可视化器"""
     
-    def __init__(self):
-        """初始化可视化器"""
-        pass
+    def __init__(self, inline_echarts: bool = False):
+        """
+        初始化可视化器
+        
+        Args:
+            inline_echarts: 是否将本地 ECharts 文件嵌入HTML（见 libs.echarts_asset）
+        """
+        self.inline_echarts = inline_echarts
+    
+    def _holdings_parts(self, position_history: Optional[PositionHistory]) -> Tuple[str, str]:
+        """
+        生成每日持仓明细的HTML片段和脚本
+        
+        页面中只嵌入快照和每日增量，选中日期时从最近的快照开始应用增量还原当天持仓。
+        
+        Returns:
+            Tuple[str, str]: (HTML片段, JavaScript片段)；没有持仓明细时均为空字符串
+        """
+        if position_history is None or not position_history.dates:
+            return '', ''
+        
+        # 防止证券名称等内容提前结束 <script> 标签
+        holdings_json = json.dumps(position_history.to_compact_json(), ensure_ascii=False,
+                                   separators=(',', ':')).replace('</', '<\\/')
+        
+        section = """
+        <h2>每日持仓明细</h2>
+        <div class="holdings-toolbar">
+            日期: <select id="holdingsDate"></select>
+            <span id="holdingsSummary"></span>
+            <span class="holdings-hint">（点击上方任一图表选择日期，最多显示市值前100的持仓）</span>
+        </div>
+        <table id="holdingsTable" class="holdings-table">
+            <thead><tr><th>证券代码</th><th>数量</th><th>价格</th><th>市值</th><th>占持仓比例</th></tr></thead>
+            <tbody></tbody>
+        </table>
+        """
+        
+        script = """
+        // 每日持仓明细：快照+增量，按需还原
+        var holdingsData = """ + holdings_json + """;
+        var holdingsSelect = document.getElementById('holdingsDate');
+        var holdingsTimes = holdingsData.dates.map(function(d) { return Date.parse(d); });
+        
+        holdingsData.dates.forEach(function(d, i) {
+            var option = document.createElement('option');
+            option.value = i;
+            option.text = d;
+            holdingsSelect.appendChild(option);
+        });
+        
+        function holdingsAt(index) {
+            var base = index - index % holdingsData.interval;
+            var state = {};
+            holdingsData.snapshots[base / holdingsData.interval].forEach(function(r) { state[r[0]] = r; });
+            for (var i = base + 1; i <= index; i++) {
+                holdingsData.deltas[i].forEach(function(r) {
+                    if (r[1] > 0) { state[r[0]] = r; } else { delete state[r[0]]; }
+                });
+            }
+            var rows = Object.keys(state).map(function(k) { return state[k]; });
+            if (holdingsData.prices) {
+                // 收盘价估值：按槽位顺序替换为当天价格
+                var prices = holdingsData.prices[index];
+                rows.sort(function(a, b) { return a[0] - b[0]; });
+                rows = rows.map(function(r, j) { return [r[0], r[1], prices[j]]; });
+            }
+            return rows;
+        }
+        
+        function formatNumber(value, digits) {
+            return value.toFixed(digits).replace(/\\B(?=(\\d{3})+(?!\\d))/g, ',');
+        }
+        
+        function showHoldings(index) {
+            holdingsSelect.value = index;
+            var rows = holdingsAt(index).map(function(r) {
+                return {security: holdingsData.securities[r[0]], quantity: r[1], price: r[2], value: r[1] * r[2]};
+            });
+            rows.sort(function(a, b) { return b.value - a.value; });
+            var total = rows.reduce(function(sum, r) { return sum + r.value; }, 0);
+            document.getElementById('holdingsSummary').textContent =
+                '持仓 ' + rows.length + ' 只，持仓金额 ¥' + formatNumber(total, 2) +
+                '，当日变动 ' + holdingsData.deltas[index].length + ' 条';
+            var html = rows.slice(0, 100).map(function(r) {
+                return '<tr><td>' + r.security + '</td><td>' + formatNumber(r.quantity, 0) + '</td><td>' +
+                       r.price.toFixed(2) + '</td><td>' + formatNumber(r.value, 2) + '</td><td>' +
+                       (total > 0 ? (r.value / total * 100).toFixed(2) : '0.00') + '%</td></tr>';
+            }).join('');
+            document.querySelector('#holdingsTable tbody').innerHTML = html;
+        }
+        
+        function nearestDateIndex(time) {
+            var lo = 0, hi = holdingsTimes.length - 1;
+            while (lo < hi) {
+                var mid = (lo + hi) >> 1;
+                if (holdingsTimes[mid] < time) { lo = mid + 1; } else { hi = mid; }
+            }
+            if (lo > 0 && Math.abs(holdingsTimes[lo - 1] - time) < Math.abs(holdingsTimes[lo] - time)) { lo -= 1; }
+            return lo;
+        }
+        
+        holdingsSelect.addEventListener('change', function() { showHoldings(parseInt(holdingsSelect.value, 10)); });
+        [ratioChart, assetsChart, totalAssetsChart].forEach(function(chart) {
+            chart.getZr().on('click', function(e) {
+                var point = chart.convertFromPixel({gridIndex: 0}, [e.offsetX, e.offsetY]);
+                if (point) { showHoldings(nearestDateIndex(point[0])); }
+            });
+        });
+        showHoldings(holdingsData.dates.length - 1);
+        """
+        return section, script
     
     def generate_html(self, dates: List[str], position_values: List[float], 
                      cash_values: List[float], total_assets: List[float],
                      position_ratios: List[float], output_file: str, stats: Dict, 
-                     title: str = "持仓分析可视化"):
+                     title: str = "持仓分析可视化", position_history: Optional[PositionHistory] = None):
         """
         生成HTML可视化文件
         
@@ -416,7 +971,10 @@ class HTMLVisualizer:
             output_file: 输出文件路径
             stats: 统计信息
             title: 图表标题
+            position_history: 每日持仓明细；提供时以快照+增量形式嵌入页面，点击图表查看当天持仓
         """
+        holdings_section, holdings_script = self._holdings_parts(position_history)
+        
         # 准备数据
         position_data = [[date, value] for date, value in zip(dates, position_values)]
         cash_data = [[date, value] for date, value in zip(dates, cash_values)]
@@ -429,7 +987,7 @@ class HTMLVisualizer:
 <head>
     <meta charset="utf-8">
     <title>{title}</title>
-    <script src="https://cdn.jsdelivr.net/npm/echarts@5.0.0/dist/echarts.min.js"></script>
+    {echarts_script_tag(output_file, inline=self.inline_echarts)}
     <style>
         body {{
             font-family: Arial, sans-serif;
@@ -484,6 +1042,28 @@ class HTMLVisualizer:
             margin-top: 20px;
             margin-bottom: 40px;
         }}
+        .holdings-toolbar {{
+            margin-bottom: 10px;
+            color: #555;
+        }}
+        .holdings-hint {{
+            color: #999;
+            font-size: 12px;
+        }}
+        .holdings-table {{
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 13px;
+            margin-bottom: 40px;
+        }}
+        .holdings-table th, .holdings-table td {{
+            border-bottom: 1px solid #eee;
+            padding: 6px 10px;
+            text-align: right;
+        }}
+        .holdings-table th:first-child, .holdings-table td:first-child {{
+            text-align: left;
+        }}
         .footer {{
             text-align: center;
             margin-top: 20px;
@@ -535,7 +1115,7 @@ class HTMLVisualizer:
         
         <h2>资产总额变化</h2>
         <div id="totalAssetsChart" class="chart"></div>
-        
+        {holdings_section}
         <div class="footer">
             生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         </div>
@@ -825,6 +1405,7 @@ class HTMLVisualizer:
             assetsChart.resize();
             totalAssetsChart.resize();
         }});
+        {holdings_script}
     </script>
 </body>
 </html>
@@ -839,14 +1420,26 @@ class HTMLVisualizer:
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='持仓金额可视化脚本')
-    parser.add_argument('--input', required=True, help='交易记录文件路径（.jsonl格式）')
+    parser.add_argument('--input', required=True, help='交易记录文件路径（.jsonl格式）或订单列式存储目录')
     parser.add_argument('--output', default=None, help='输出HTML文件路径（默认: output/position_value.html）')
     parser.add_argument('--initial_cash', type=float, default=1000000000.0, help='初始资金（默认: 1000000000.0）')
+    parser.add_argument('--snapshot_interval', type=int, default=20, help='每日持仓明细的完整快照间隔交易日数（默认: 20）')
+    parser.add_argument('--embed_holdings', action='store_true',
+                        help='在HTML中嵌入每日持仓明细（快照+增量），点击图表查看当天持仓；会显著增大HTML文件，'
+                             '默认只导出到 <输出文件名>_position_changes.csv')
+    parser.add_argument('--price_panel', default=None,
+                        help='收盘价面板目录（build_columnar_store --kind prices 生成），指定时按收盘价逐日估值')
+    parser.add_argument('--end_date', default=None,
+                        help='估值截止日期 (YYYY-MM-DD)，指定收盘价面板时可将日历延长到最后一笔订单之后')
+    parser.add_argument('--echarts_js', default=None,
+                        help='本地 echarts.min.js 文件路径，复制到 output/assets/ 供所有报告共用（只需指定一次）')
+    parser.add_argument('--inline_echarts', action='store_true',
+                        help='将本地 ECharts 文件嵌入HTML，生成可单独拷贝、离线打开的单文件报告'
+                             '（需先运行 python main.py install_echarts 或指定 --echarts_js）')
     
     args = parser.parse_args()
     
     # 转换为绝对路径
-    project_root = Path(__file__).parent.parent
     input_file = Path(args.input)
     if not input_file.is_absolute():
         input_file = project_root / input_file
@@ -865,17 +1458,28 @@ def main():
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
     try:
+        # 0. 准备共享的本地 ECharts 文件（output/assets/echarts.min.js）
+        install_echarts_asset(args.echarts_js, required=args.inline_echarts)
+        
         # 1. 加载交易记录
         loader = OrdersDataLoader(str(input_file))
-        orders = loader.load_orders()
+        order_columns, securities = loader.load_order_columns()
         
-        if not orders:
+        if not len(order_columns['time']):
             print("错误: 没有找到有效的交易记录")
             return 1
         
+        price_panel = None
+        if args.price_panel:
+            panel_dir = Path(args.price_panel)
+            if not panel_dir.is_absolute():
+                panel_dir = project_root / panel_dir
+            price_panel = PricePanel(str(panel_dir))
+        
         # 2. 计算每日持仓金额、资产总额和持仓比例
-        calculator = PositionValueCalculator(args.initial_cash)
-        dates, position_values, cash_values, total_assets, position_ratios, buy_amounts, sell_amounts, stats = calculator.calculate(orders)
+        calculator = PositionValueCalculator(args.initial_cash, args.snapshot_interval)
+        dates, position_values, cash_values, total_assets, position_ratios, buy_amounts, sell_amounts, stats = calculator.calculate_columns(
+            order_columns, securities, price_panel, args.end_date)
         
         if not dates:
             print("错误: 无法计算持仓金额")
@@ -886,11 +1490,15 @@ def main():
         exporter = CSVExporter()
         exporter.export_daily_summary(dates, buy_amounts, sell_amounts, cash_values, 
                                      total_assets, position_values, position_ratios, str(csv_file))
+        position_history = calculator.tracker.position_history
+        changes_file = output_file.with_name(f"{output_file.stem}_position_changes.csv")
+        exporter.export_position_changes(position_history, str(changes_file))
         
         # 4. 生成可视化
-        visualizer = HTMLVisualizer()
+        visualizer = HTMLVisualizer(args.inline_echarts)
         visualizer.generate_html(dates, position_values, cash_values, total_assets, 
-                                position_ratios, str(output_file), stats)
+                                position_ratios, str(output_file), stats,
+                                position_history=position_history if args.embed_holdings else None)
         
         print("处理完成!")
         
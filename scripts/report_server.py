@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地报告服务（仅依赖标准库与项目已有依赖，可完全离线运行）
+
+启动时将回测、对冲和指数曲线一次性加载到内存（与 hedge_analysis_visualization 共用
+output/<输入目录名>/cache/ 中的增量缓存，未命中时计算并写入缓存），为每条曲线预先计算前缀数组
+（见 libs.range_statistics），之后任意日期区间的统计指标按请求即时计算，无需重新运行脚本生成HTML。
+
+接口：
+- GET /                       图表页面：缩放图表或输入日期区间后，页面请求区间统计并显示在表格中
+- GET /api/series             所有曲线的名称、类型与共享日期轴编码的数据（格式见 libs.report_encoding）
+- GET /api/stats?start=&end=  指定日期区间（YYYY-MM-DD，含首尾，均可省略）内每条曲线的统计指标
+- GET /assets/echarts.min.js  本地 ECharts 文件（python main.py install_echarts 安装到 output/assets/echarts.min.js，
+                              未安装时页面回退到CDN；
+                              两者都不可用时图表不显示，日期区间统计仍可使用）
+
+使用方法:
+    python main.py serve --input_dir backtest_data/ex_tm1_top30 --index zz500
+    python main.py serve --input_dir backtest_data/ex_tm1_top30 --index zz500,hs300 --port 8766 --no_hedge
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.echarts_asset import ECHARTS_ASSET_FILE, ECHARTS_CDN, ECHARTS_INSTALL_HINT
+from libs.range_statistics import STATISTICS_COLUMNS, RangeSeries, range_statistics
+from libs.report_cache import ReportCache
+from libs.report_encoding import PAYLOAD_DECODER_JS, align_series, encode_series_payload
+from scripts.hedge_analysis_visualization import (
+    BacktestFileIdentifier,
+    IndexDataManager,
+    ReportSeriesCollector,
+    StageTimer,
+    StatisticsCalculator
+)
+
+
+def load_range_series(input_dir: Path, index_data_dir: Path, specified_indices: List[str], cache: ReportCache,
+                      include_hedges: bool = True, workers: int = 1) -> List[RangeSeries]:
+    """
+    加载回测、对冲和指数曲线并计算前缀数组
+
+    Args:
+        input_dir: 回测数据目录
+        index_data_dir: 指数数据目录
+        specified_indices: 对冲指数名称列表
+        cache: 增量缓存
+        include_hedges: 是否包含对冲曲线
+        workers: 缓存未命中时计算回测的进程数
+
+    Returns:
+        List[RangeSeries]: 按回测、对冲、指数顺序排列的曲线
+    """
+    timer = StageTimer()
+    files_info = BacktestFileIdentifier(str(input_dir)).identify_files()
+    print(f"找到 {len(files_info)} 个回测文件")
+    index_manager = IndexDataManager(str(index_data_dir))
+    available_indices = index_manager.get_available_indices()
+    for index_name in specified_indices:
+        if index_name not in available_indices:
+            raise ValueError(f"指定的指数 '{index_name}' 不存在，可用指数: {', '.join(available_indices)}")
+
+    collector = ReportSeriesCollector(index_manager, cache, timer)
+    results = collector.collect_backtests(files_info, specified_indices, workers)
+    start_dates = [result['start_date'] for result in results if result['start_date']]
+    index_results = collector.collect_indices(min(start_dates) if start_dates else None, StatisticsCalculator())
+    cache.save()
+
+    backtests = []
+    hedges = []
+    for result in results:
+        backtests.append(RangeSeries(f"回测-{result['backtest_name']}", 'backtest', result['dates'],
+                                     result['daily_returns'], result['cumulative_returns']))
+        if include_hedges:
+            for hedge in result['hedges']:
+                hedges.append(RangeSeries(f"对冲-{hedge['name']}", 'hedge', hedge['dates'],
+                                          hedge['daily_returns'], hedge['cumulative_returns']))
+    indices = [RangeSeries(f"指数-{index_name}", 'index', artifact['dates'], artifact['daily_returns'],
+                           artifact['cumulative_returns'])
+               for index_name, artifact in index_results]
+    return backtests + hedges + indices
+
+
+def build_page(title: str, echarts_local: bool) -> str:
+    """
+    生成图表页面HTML（数据由页面通过 /api/series 获取）
+
+    Args:
+        title: 页面标题
+        echarts_local: 是否有本地 ECharts 文件
+
+    Returns:
+        str: 页面HTML
+    """
+    echarts_src = '/assets/echarts.min.js' if echarts_local else ECHARTS_CDN
+    header = ''.join(f'<th>{label}</th>' for _, label in STATISTICS_COLUMNS)
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <script src="{echarts_src}"></script>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            margin: 20px;
+        }}
+        #chart {{
+            width: 100%;
+            height: 560px;
+        }}
+        .info {{
+            margin-bottom: 20px;
+            padding: 10px;
+            background-color: #f5f5f5;
+            border-radius: 5px;
+        }}
+        table {{
+            border-collapse: collapse;
+            font-size: 13px;
+        }}
+        th, td {{
+            border: 1px solid #ddd;
+            padding: 4px 8px;
+            text-align: right;
+        }}
+        th {{
+            background-color: #f5f5f5;
+        }}
+        td:first-child, td:nth-child(2) {{
+            text-align: left;
+        }}
+    </style>
+</head>
+<body>
+    <div class="info">
+        <h1>{title}</h1>
+        <p>启动时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p>
+            区间: <input type="date" id="start"> 至 <input type="date" id="end">
+            <button id="apply">计算区间统计</button>
+            <span id="status"></span>
+        </p>
+    </div>
+    <div id="chart"></div>
+    <table>
+        <thead><tr>{header}</tr></thead>
+        <tbody id="statistics"></tbody>
+    </table>
+
+    <script>
+        var columns = {json.dumps([key for key, _ in STATISTICS_COLUMNS])};
+        {PAYLOAD_DECODER_JS.strip()}
+
+        // ECharts 按本地时间解析 YYYY-MM-DD，这里保持一致
+        function parseDate(text) {{
+            var parts = text.split('-');
+            return new Date(+parts[0], parts[1] - 1, +parts[2]).getTime();
+        }}
+
+        function formatDate(timestamp) {{
+            var date = new Date(timestamp);
+            return date.getFullYear() + '-' + String(date.getMonth() + 1).padStart(2, '0') + '-' +
+                   String(date.getDate()).padStart(2, '0');
+        }}
+
+        function loadStatistics() {{
+            var start = document.getElementById('start').value;
+            var end = document.getElementById('end').value;
+            var status = document.getElementById('status');
+            status.textContent = '计算中...';
+            fetch('/api/stats?start=' + encodeURIComponent(start) + '&end=' + encodeURIComponent(end))
+                .then(function(response) {{ return response.json(); }})
+                .then(function(result) {{
+                    if (result.error) {{
+                        status.textContent = result.error;
+                        return;
+                    }}
+                    var rows = result.statistics.map(function(item) {{
+                        return '<tr>' + columns.map(function(key) {{ return '<td>' + item[key] + '</td>'; }}).join('') + '</tr>';
+                    }});
+                    document.getElementById('statistics').innerHTML = rows.join('');
+                    status.textContent = '服务端计算耗时 ' + result.elapsed_ms.toFixed(2) + ' ms';
+                }});
+        }}
+
+        document.getElementById('apply').addEventListener('click', loadStatistics);
+
+        fetch('/api/series')
+            .then(function(response) {{ return response.json(); }})
+            .then(function(result) {{ return decodeSeriesPayload(result.payload).then(function(data) {{ return [result, data]; }}); }})
+            .then(function(pair) {{
+                var result = pair[0], data = pair[1];
+                document.getElementById('start').value = data.dates[0] || '';
+                document.getElementById('end').value = data.dates[data.dates.length - 1] || '';
+                loadStatistics();
+                if (typeof echarts === 'undefined') {{
+                    document.getElementById('chart').textContent = '未能加载 ECharts，图表不可用；日期区间统计仍可使用。';
+                    document.getElementById('chart').style.height = 'auto';
+                    return;
+                }}
+                var myChart = echarts.init(document.getElementById('chart'));
+                myChart.setOption({{
+                    tooltip: {{
+                        trigger: 'axis',
+                        formatter: function(params) {{
+                            var text = formatDate(params[0].axisValue) + '<br/>';
+                            params.forEach(function(item) {{
+                                text += item.marker + item.seriesName + ': ' + item.value[1].toFixed(2) + '%<br/>';
+                            }});
+                            return text;
+                        }}
+                    }},
+                    legend: {{ top: 0, type: 'scroll' }},
+                    grid: {{ left: '3%', right: '4%', bottom: '15%', top: '40px', containLabel: true }},
+                    dataZoom: [
+                        {{ type: 'slider', xAxisIndex: [0], start: 0, end: 100, bottom: '5%', height: '8%' }},
+                        {{ type: 'inside', xAxisIndex: [0], start: 0, end: 100 }}
+                    ],
+                    xAxis: {{ type: 'time', boundaryGap: false }},
+                    yAxis: {{ type: 'value', name: '收益率 (%)', axisLabel: {{ formatter: '{{value}}%' }} }},
+                    series: result.series.map(function(series, i) {{
+                        return {{
+                            name: series.name,
+                            type: 'line',
+                            symbol: 'none',
+                            lineStyle: {{ width: 1, type: series.type === 'hedge' ? 'dashed' : 'solid' }},
+                            data: seriesPoints(data.dates, data.values[i], null)
+                        }};
+                    }})
+                }});
+                window.addEventListener('resize', function() {{ myChart.resize(); }});
+
+                // 缩放停止后按可见范围请求区间统计
+                var timer = null;
+                myChart.on('datazoom', function() {{
+                    clearTimeout(timer);
+                    timer = setTimeout(function() {{
+                        var zoom = myChart.getOption().dataZoom[0];
+                        var first = parseDate(data.dates[0]), last = parseDate(data.dates[data.dates.length - 1]);
+                        document.getElementById('start').value = formatDate(first + (last - first) * zoom.start / 100);
+                        document.getElementById('end').value = formatDate(first + (last - first) * zoom.end / 100);
+                        loadStatistics();
+                    }}, 200);
+                }});
+            }});
+    </script>
+</body>
+</html>
+"""
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """报告服务的请求处理器，数据由所属服务器提供"""
+
+    server_version = "ReportServer/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Dict):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/":
+            self._send(200, self.server.page, "text/html; charset=utf-8")
+        elif parsed.path == "/api/series":
+            self._send(200, self.server.series_body, "application/json; charset=utf-8")
+        elif parsed.path == "/api/stats":
+            query = parse_qs(parsed.query)
+            start = query.get("start", [""])[0] or None
+            end = query.get("end", [""])[0] or None
+            began = time.perf_counter()
+            try:
+                statistics = range_statistics(self.server.series, start, end)
+            except ValueError:
+                self._send_json(400, {"error": f"日期格式错误，应为 YYYY-MM-DD: start={start}, end={end}"})
+                return
+            self._send_json(200, {
+                "start": start,
+                "end": end,
+                "elapsed_ms": (time.perf_counter() - began) * 1000,
+                "statistics": statistics
+            })
+        elif parsed.path == "/assets/echarts.min.js" and self.server.echarts_file:
+            self._send(200, self.server.echarts_file.read_bytes(), "application/javascript")
+        else:
+            self._send(404, b"Not Found", "text/plain")
+
+
+class ReportServer(ThreadingHTTPServer):
+    """本地报告服务的多线程HTTP服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, series: List[RangeSeries], title: str, host: str = "127.0.0.1", port: int = 0,
+                 echarts_file: Optional[Path] = None, verbose: bool = False):
+        """
+        初始化服务器
+
+        Args:
+            series: 已计算前缀数组的曲线
+            title: 页面标题
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            echarts_file: 本地 ECharts 文件（可选）
+            verbose: 是否输出访问日志
+        """
+        super().__init__((host, port), ReportRequestHandler)
+        self.series = series
+        self.echarts_file = echarts_file if echarts_file and echarts_file.exists() else None
+        self.verbose = verbose
+        self.page = build_page(title, self.echarts_file is not None).encode("utf-8")
+
+        # 曲线数据在启动时编码一次，每次请求直接返回
+        dates, values = align_series([s.dates for s in series], [(s.values - 100.0).tolist() for s in series])
+        self.series_body = json.dumps({
+            "series": [{"name": s.name, "type": s.type} for s in series],
+            "payload": encode_series_payload(dates, values)
+        }, ensure_ascii=False).encode("utf-8")
+
+    @property
+    def base_url(self) -> str:
+        """服务器根地址，如 http://127.0.0.1:8766"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地报告服务：加载回测、对冲与指数曲线，按请求计算任意日期区间的统计指标')
+    parser.add_argument('--input_dir', required=True, help='回测数据目录路径')
+    parser.add_argument('--index', required=True, help='对冲指数名称，支持多个指数用逗号分隔（如：zz500 或 zz500,hs300）')
+    parser.add_argument('--index_data_dir', default='index_data', help='指数数据目录路径')
+    parser.add_argument('--no_hedge', action='store_true', help='不包含对冲曲线')
+    parser.add_argument('--no_cache', action='store_true', help='不复用 output/<输入目录名>/cache/ 中的计算结果（仍会更新缓存）')
+    parser.add_argument('--workers', type=int, default=1, help='缓存未命中时计算回测的进程数（默认: 1）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8766, help='监听端口 (默认: 8766)')
+    parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+
+    args = parser.parse_args()
+
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_absolute():
+        input_dir = project_root / input_dir
+    index_data_dir = Path(args.index_data_dir)
+    if not index_data_dir.is_absolute():
+        index_data_dir = project_root / index_data_dir
+    specified_indices = [idx.strip() for idx in args.index.split(',')]
+    cache = ReportCache(project_root / 'output' / input_dir.name / 'cache', read=not args.no_cache)
+
+    print("正在加载曲线数据...")
+    start = time.perf_counter()
+    try:
+        series = load_range_series(input_dir, index_data_dir, specified_indices, cache,
+                                   include_hedges=not args.no_hedge, workers=args.workers)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+    print(f"已加载 {len(series)} 条曲线，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    server = ReportServer(series, f"对冲分析 - {input_dir.name} - {','.join(specified_indices)}",
+                          host=args.host, port=args.port, echarts_file=ECHARTS_ASSET_FILE,
+                          verbose=args.verbose)
+    if server.echarts_file is None:
+        print(f"提示: 未找到本地 ECharts 文件 {ECHARTS_ASSET_FILE}，页面将从CDN加载图表库（离线时只显示区间统计；离线使用请先运行 {ECHARTS_INSTALL_HINT}）")
+    print(f"报告服务已启动: {server.base_url}")
+    print("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
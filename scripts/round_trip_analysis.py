@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+交易回合分析脚本
+
+按证券先进先出匹配买入与卖出成交（见 libs.lot_matcher），输出：
+1. <名称>_round_trips.csv: 交易回合（买入/卖出时间、持有天数、匹配数量、价格、分摊手续费、盈亏）
+2. <名称>_unmatched_sells.csv: 超出当前持仓、没有对应买入的卖出
+3. <名称>_round_trip_summary.csv: 按证券汇总的回合数、胜率、盈亏与平均持有天数
+
+输入可以是订单JSONL文件或 build_columnar_store 生成的订单列式存储目录，大量成交时建议使用列式存储。
+
+使用方法:
+    python main.py round_trip_analysis --input backtest_data/xxx_orders_<id>.orders
+    python main.py round_trip_analysis --input backtest_data/xxx_orders_<id>.jsonl --output_dir output/round_trips
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.columnar_store import seconds_to_time
+from libs.lot_matcher import match_fifo_lots
+from scripts.position_value_visualization import OrdersDataLoader
+
+# 写入CSV时每次转换为Python对象的行数
+WRITE_CHUNK_ROWS = 100000
+
+
+def write_columns_csv(output_file: Path, header: List[str], columns: List[np.ndarray], securities: List[str],
+                      security_column: int, time_columns: List[int]) -> int:
+    """
+    分块将列数组写入CSV
+
+    Args:
+        output_file: 输出文件路径
+        header: 表头
+        columns: 与表头对应的列数组
+        securities: 证券字典
+        security_column: 证券ID列的位置（写出为证券代码）
+        time_columns: 时间序数列的位置（写出为 YYYY-MM-DD HH:MM:SS）
+
+    Returns:
+        int: 写入的行数
+    """
+    rows = len(columns[0]) if columns else 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for start in range(0, rows, WRITE_CHUNK_ROWS):
+            chunk = [column[start:start + WRITE_CHUNK_ROWS].tolist() for column in columns]
+            chunk[security_column] = [securities[i] for i in chunk[security_column]]
+            for i in time_columns:
+                chunk[i] = [seconds_to_time(value) for value in chunk[i]]
+            writer.writerows(zip(*chunk))
+    return rows
+
+
+def summarize_by_security(round_trips: Dict[str, np.ndarray], security_count: int) -> Dict[str, np.ndarray]:
+    """
+    按证券汇总交易回合
+
+    Args:
+        round_trips: match_fifo_lots 返回的交易回合列数组
+        security_count: 证券数量
+
+    Returns:
+        Dict[str, np.ndarray]: 每个证券的回合数、盈利回合数、匹配数量、盈亏、手续费和数量加权平均持有天数
+    """
+    security = round_trips['security']
+    quantity = round_trips['quantity']
+    trips = np.bincount(security, minlength=security_count)
+    matched = np.bincount(security, weights=quantity, minlength=security_count)
+    weighted_days = np.bincount(security, weights=quantity * round_trips['holding_days'], minlength=security_count)
+    return {
+        'trips': trips,
+        'wins': np.bincount(security, weights=round_trips['pnl'] > 0, minlength=security_count).astype(np.int64),
+        'quantity': matched,
+        'pnl': np.bincount(security, weights=round_trips['pnl'], minlength=security_count),
+        'commission': np.bincount(security, weights=round_trips['commission'], minlength=security_count),
+        'holding_days': np.divide(weighted_days, matched, out=np.zeros(security_count), where=matched > 0),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='交易回合分析：按证券先进先出匹配买入与卖出成交')
+    parser.add_argument('--input', required=True, help='订单JSONL文件或订单列式存储目录')
+    parser.add_argument('--output_dir', default=None, help='输出目录（默认: output）')
+    parser.add_argument('--name', default=None, help='输出文件名前缀（默认: 输入文件名）')
+
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if not input_path.is_absolute():
+        input_path = project_root / input_path
+    output_dir = Path(args.output_dir) if args.output_dir else project_root / 'output'
+    if not output_dir.is_absolute():
+        output_dir = project_root / output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = args.name or input_path.name.rsplit('.', 1)[0]
+
+    try:
+        columns, securities = OrdersDataLoader(str(input_path)).load_order_columns()
+    except (FileNotFoundError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+
+    print("正在按先进先出匹配买入与卖出...")
+    start = time.perf_counter()
+    round_trips, unmatched_sells = match_fifo_lots(columns)
+    elapsed = time.perf_counter() - start
+
+    trips = len(round_trips['pnl'])
+    total_pnl = float(round_trips['pnl'].sum())
+    wins = int((round_trips['pnl'] > 0).sum())
+    matched = float(round_trips['quantity'].sum())
+    print(f"匹配完成，耗时 {elapsed:.2f} 秒")
+    print(f"  交易回合: {trips:,}，匹配数量: {matched:,.0f}")
+    if trips:
+        avg_days = float((round_trips['holding_days'] * round_trips['quantity']).sum() / matched)
+        print(f"  胜率: {wins / trips * 100:.2f}%，总盈亏: {total_pnl:,.2f}，"
+              f"分摊手续费: {float(round_trips['commission'].sum()):,.2f}，平均持有天数: {avg_days:.1f}")
+    print(f"  未匹配卖出: {len(unmatched_sells['index']):,} 笔，数量 {float(unmatched_sells['unmatched'].sum()):,.0f}")
+
+    round_trips_file = output_dir / f"{name}_round_trips.csv"
+    rows = write_columns_csv(
+        round_trips_file,
+        ['security', 'entry_time', 'exit_time', 'holding_days', 'quantity', 'entry_price', 'exit_price',
+         'commission', 'pnl'],
+        [round_trips['security'], round_trips['entry_time'], round_trips['exit_time'], round_trips['holding_days'],
+         round_trips['quantity'], round_trips['entry_price'], round_trips['exit_price'],
+         round_trips['commission'], round_trips['pnl']],
+        securities, 0, [1, 2])
+    print(f"交易回合已导出: {round_trips_file}（{rows:,} 行）")
+
+    unmatched_file = output_dir / f"{name}_unmatched_sells.csv"
+    rows = write_columns_csv(
+        unmatched_file,
+        ['security', 'time', 'filled', 'unmatched', 'price', 'commission'],
+        [unmatched_sells['security'], unmatched_sells['time'], unmatched_sells['filled'],
+         unmatched_sells['unmatched'], unmatched_sells['price'], unmatched_sells['commission']],
+        securities, 0, [1])
+    print(f"未匹配卖出已导出: {unmatched_file}（{rows:,} 行）")
+
+    summary = summarize_by_security(round_trips, len(securities))
+    traded = np.flatnonzero(summary['trips'] > 0)
+    summary_file = output_dir / f"{name}_round_trip_summary.csv"
+    with open(summary_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['security', 'trips', 'win_rate', 'quantity', 'pnl', 'commission', 'avg_holding_days'])
+        for i in traded.tolist():
+            writer.writerow([securities[i], int(summary['trips'][i]),
+                             round(summary['wins'][i] / summary['trips'][i] * 100, 2),
+                             summary['quantity'][i], summary['pnl'][i], summary['commission'][i],
+                             round(summary['holding_days'][i], 2)])
+    print(f"按证券汇总已导出: {summary_file}（{len(traded):,} 行）")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+回测数据打包测试
+
+核对 package_backtest_data 对同一回测ID重复打包：之前生成的归档文件不会被当作成员再次打包，
+非 JSONL 成员按字节原样复制。非聚宽环境下归档文件名使用 unknown 名称和日期范围。
+
+使用方法:
+    python -m pytest tests/test_backtest_downloader.py
+"""
+
+import json
+import os
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 下载器依赖聚宽研究环境中预装的 psutil、tqdm
+pytest.importorskip('psutil')
+pytest.importorskip('tqdm')
+
+from joinquant_lib.backtest_downloader import package_backtest_data
+
+BACKTEST_ID = '0123456789abcdef0123456789abcdef'
+
+
+def write_backtest_files(directory: Path):
+    """
+    写入一组已下载的回测数据文件（余额JSON和持仓JSONL）
+
+    Returns:
+        Tuple[Path, Path]: (余额JSON路径, 持仓JSONL路径)
+    """
+    balances = directory / f'模拟盘_position_ratio_{BACKTEST_ID}.json'
+    balances.write_text(json.dumps({'balances': [{'time': '2020-01-02 15:00:00', 'name': '模拟盘'},
+                                                 {'time': '2020-06-30 15:00:00', 'name': '模拟盘'}]},
+                                   ensure_ascii=False), encoding='utf-8')
+    positions = directory / f'模拟盘_position_details_{BACKTEST_ID}.jsonl'
+    positions.write_text(''.join(json.dumps({'time': day, 'security': '000001.XSHE'}) + '\n'
+                                 for day in ['2020-01-02', '2020-03-31', '2020-04-01', '2020-06-30']),
+                         encoding='utf-8')
+    return balances, positions
+
+
+def test_package_zip_twice(tmp_path):
+    balances, _ = write_backtest_files(tmp_path)
+
+    first = package_backtest_data(BACKTEST_ID, str(tmp_path), str(tmp_path), 'zip')
+    second = package_backtest_data(BACKTEST_ID, str(tmp_path), str(tmp_path), 'zip')
+
+    assert first is not None and second is not None
+    with zipfile.ZipFile(second) as archive:
+        names = archive.namelist()
+        assert not any(name.endswith('.zip') for name in names)
+        assert archive.read(balances.name) == balances.read_bytes()
+        assert sum(name.endswith('.jsonl') for name in names) == 2  # 按季度拆分为两个分段
+
+
+@pytest.mark.parametrize('compression', ['gz', ''])
+def test_package_tar_twice(tmp_path, compression):
+    balances, positions = write_backtest_files(tmp_path)
+
+    first = package_backtest_data(BACKTEST_ID, str(tmp_path), str(tmp_path), compression)
+    second = package_backtest_data(BACKTEST_ID, str(tmp_path), str(tmp_path), compression)
+
+    assert first is not None and second is not None
+    with tarfile.open(second) as archive:
+        assert sorted(archive.getnames()) == sorted([balances.name, positions.name])
+
+
+def test_package_without_files(tmp_path):
+    (tmp_path / f'unknown_unknown_start_unknown_end_{BACKTEST_ID}.zip').write_bytes(b'')
+    assert package_backtest_data(BACKTEST_ID, str(tmp_path), str(tmp_path), 'zip') is None
+    assert os.listdir(tmp_path) == [f'unknown_unknown_start_unknown_end_{BACKTEST_ID}.zip']
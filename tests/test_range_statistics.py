@@ -0,0 +1,217 @@
+"""
+区间统计一致性测试
+
+以 libs.returns_calculator 为唯一基准，核对 RangeSeries.statistics（本地报告服务使用）和 RANGE_STATISTICS_JS
+（静态报告缩放时在浏览器中使用）在随机曲线、随机日期区间（含空区间和起止颠倒的区间）上的统计指标。
+浏览器端实现通过 node 运行，未安装 node 时跳过（可用环境变量 NODE 指定 node 路径）。
+
+使用方法:
+    python -m pytest tests/test_range_statistics.py
+"""
+
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import warnings
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from libs.range_statistics import (
+    RANGE_STATISTICS_JS,
+    STATISTICS_EXACT_FIELDS,
+    STATISTICS_TOLERANCES,
+    TRADING_DAYS,
+    RangeSeries,
+    irregular_returns,
+    statistics_mismatches
+)
+from libs.returns_calculator import calculate_annualized_return, calculate_max_drawdown, calculate_sharpe_ratio
+
+SEEDS = [0, 1, 2, 3]
+RANGES_PER_SERIES = 60
+# 年化波动率保留两位小数
+VOLATILITY_TOLERANCE = 0.01
+
+
+def make_series(seed: int):
+    """
+    生成一条随机曲线：交易日之间随机间隔1~4个自然日，日收益率（百分比）含少量大幅波动
+
+    Returns:
+        Tuple[List[str], np.ndarray, np.ndarray]: (日期, 日收益率, 累积收益率)
+    """
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(150, 400))
+    day = date(2020, 1, 2)
+    dates = []
+    for _ in range(n):
+        dates.append(day.isoformat())
+        day += timedelta(days=int(rng.integers(1, 5)))
+    daily_returns = rng.normal(0.03, 1.5, n)
+    shocks = rng.random(n) < 0.02
+    daily_returns[shocks] *= 6
+    daily_returns[0] = 0.0
+    cumulative_returns = 100.0 * np.cumprod(1.0 + daily_returns / 100.0) - 100.0
+    return dates, daily_returns, cumulative_returns
+
+
+def make_ranges(dates, seed: int):
+    """
+    生成随机日期区间 (start, end)，None 表示不限；包含不在曲线中的日期、单日、空区间和起止颠倒的区间
+    """
+    rng = np.random.default_rng(seed + 1000)
+    first = date.fromisoformat(dates[0])
+    last = date.fromisoformat(dates[-1])
+    span = (last - first).days
+
+    def random_day():
+        return (first + timedelta(days=int(rng.integers(-10, span + 10)))).isoformat()
+
+    ranges = [(None, None), (dates[0], dates[0]), (dates[-1], None), (None, dates[5]),
+              # 空区间：早于曲线起点、晚于曲线终点、起止颠倒
+              ((first - timedelta(days=30)).isoformat(), (first - timedelta(days=1)).isoformat()),
+              ((last + timedelta(days=1)).isoformat(), None),
+              (dates[20], dates[10])]
+    for _ in range(RANGES_PER_SERIES):
+        start, end = sorted([random_day(), random_day()])
+        choice = rng.random()
+        if choice < 0.1:
+            start = None
+        elif choice < 0.2:
+            end = None
+        elif choice < 0.3:
+            start, end = end, start
+        ranges.append((start, end))
+    return ranges
+
+
+def expected_statistics(dates, daily_returns, cumulative_returns, start, end):
+    """
+    由 returns_calculator 计算日期区间内的统计指标（基准）
+
+    Returns:
+        Dict: 字段与 RangeSeries.statistics 相同，数值不做舍入
+    """
+    index = [k for k, day in enumerate(dates) if (start is None or day >= start) and (end is None or day <= end)]
+    if not index:
+        return {'start_date': '', 'end_date': '', 'total_return': 0.0, 'annualized_return': 0.0,
+                'annualized_volatility': 0.0, 'max_drawdown': 0.0, 'max_drawdown_start_date': '',
+                'max_drawdown_end_date': '', 'sharpe_ratio': 0.0, 'trading_days': 0}
+    i, j = index[0], index[-1] + 1
+    returns = daily_returns[i:j].tolist()
+    values = 100.0 + cumulative_returns[i:j]
+
+    total_return = (np.prod(1.0 + daily_returns[i:j] / 100.0) - 1.0) * 100.0
+    volatility = np.std(daily_returns[i:j] / 100.0, ddof=1) * math.sqrt(TRADING_DAYS) * 100 if j - i > 1 else 0.0
+    peak = np.maximum.accumulate(values)
+    end_index = int(np.argmin((values - peak) / peak))
+    start_index = max(k for k in range(end_index + 1) if values[k] == peak[end_index])
+    with warnings.catch_warnings():
+        # 单日区间的样本标准差为 NaN（statistics_mismatches 视为 0）
+        warnings.simplefilter('ignore', RuntimeWarning)
+        sharpe_ratio = calculate_sharpe_ratio(returns, start_date=dates[i], end_date=dates[j - 1])
+    return {
+        'start_date': dates[i],
+        'end_date': dates[j - 1],
+        'total_return': total_return,
+        'annualized_return': calculate_annualized_return(returns, start_date=dates[i], end_date=dates[j - 1]),
+        'annualized_volatility': volatility,
+        'max_drawdown': calculate_max_drawdown(values.tolist()),
+        'max_drawdown_start_date': dates[i + start_index],
+        'max_drawdown_end_date': dates[i + end_index],
+        'sharpe_ratio': sharpe_ratio,
+        'trading_days': j - i
+    }
+
+
+def assert_matches(expected, actual, label):
+    """核对统计指标，允许保留位数最后一位的误差"""
+    mismatches = statistics_mismatches(expected, actual)
+    if not math.isclose(expected['annualized_volatility'], actual['annualized_volatility'],
+                        rel_tol=1e-6, abs_tol=VOLATILITY_TOLERANCE + 1e-9):
+        mismatches.append(f"annualized_volatility: {expected['annualized_volatility']} != "
+                          f"{actual['annualized_volatility']}")
+    assert not mismatches, f"{label}: {'; '.join(mismatches)}"
+
+
+def test_tolerances_cover_all_numeric_columns():
+    fields = set(STATISTICS_TOLERANCES) | set(STATISTICS_EXACT_FIELDS) | {'annualized_volatility'}
+    assert fields == {'start_date', 'end_date', 'total_return', 'annualized_return', 'annualized_volatility',
+                      'max_drawdown', 'max_drawdown_start_date', 'max_drawdown_end_date', 'sharpe_ratio',
+                      'trading_days'}
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_range_series_matches_returns_calculator(seed):
+    dates, daily_returns, cumulative_returns = make_series(seed)
+    series = RangeSeries('s', 'backtest', dates, daily_returns, cumulative_returns)
+    for start, end in make_ranges(dates, seed):
+        expected = expected_statistics(dates, daily_returns, cumulative_returns, start, end)
+        assert_matches(expected, series.statistics(start, end), f"seed={seed} [{start}, {end}]")
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_range_series_without_cumulative_returns(seed):
+    # 未提供累积收益率时由日收益率连乘得到，结果应与提供累积收益率时一致
+    dates, daily_returns, cumulative_returns = make_series(seed)
+    with_cumulative = RangeSeries('s', 'backtest', dates, daily_returns, cumulative_returns)
+    from_returns = RangeSeries('s', 'backtest', dates, daily_returns)
+    for start, end in make_ranges(dates, seed):
+        assert_matches(with_cumulative.statistics(start, end), from_returns.statistics(start, end),
+                       f"seed={seed} [{start}, {end}]")
+
+
+def test_empty_and_inverted_ranges():
+    dates, daily_returns, cumulative_returns = make_series(0)
+    series = RangeSeries('s', 'backtest', dates, daily_returns, cumulative_returns)
+    for start, end in [(dates[30], dates[10]), ('2000-01-01', '2000-12-31'), ('2099-01-01', None)]:
+        result = series.statistics(start, end)
+        assert result['trading_days'] == 0
+        assert result['start_date'] == result['end_date'] == ''
+        assert result['total_return'] == result['max_drawdown'] == result['sharpe_ratio'] == 0.0
+
+
+def find_node():
+    """node 可执行文件路径，未安装时返回 None"""
+    return os.environ.get('NODE') or shutil.which('node') or shutil.which('nodejs')
+
+
+@pytest.mark.skipif(find_node() is None, reason='未安装 node，跳过浏览器端区间统计测试')
+@pytest.mark.parametrize('seed', SEEDS)
+def test_range_statistics_js_matches_returns_calculator(seed, tmp_path):
+    dates, daily_returns, cumulative_returns = make_series(seed)
+    ranges = make_ranges(dates, seed)
+    # 与报告相同：页面只有累积收益率和无法由其还原的日收益率
+    fixture = {
+        'dates': dates,
+        'values': cumulative_returns.tolist(),
+        'irregular': irregular_returns(cumulative_returns, daily_returns),
+        'ranges': ranges
+    }
+    script = tmp_path / 'range_statistics.js'
+    script.write_text(RANGE_STATISTICS_JS + """
+        var fixture = """ + json.dumps(fixture) + """;
+        var series = buildRangeSeries(fixture.dates, fixture.values, fixture.irregular);
+        var results = fixture.ranges.map(function(range) {
+            return rangeStatistics(series, range[0] === null ? -Infinity : dayNumber(range[0]),
+                                   range[1] === null ? Infinity : dayNumber(range[1]));
+        });
+        process.stdout.write(JSON.stringify(results));
+""", encoding='utf-8')
+    output = subprocess.run([find_node(), str(script)], check=True, capture_output=True, text=True).stdout
+    results = json.loads(output)
+
+    assert len(results) == len(ranges)
+    for (start, end), actual in zip(ranges, results):
+        expected = expected_statistics(dates, daily_returns, cumulative_returns, start, end)
+        assert_matches(expected, actual, f"seed={seed} [{start}, {end}]")